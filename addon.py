@@ -1,9 +1,15 @@
 import bpy
 
 from .controller import get_controller
-from .operators import LoadFileOperator
+from .operators import (
+    ExportPerformanceOperator,
+    LoadFileOperator,
+    LoadTrajectoryOperator,
+    PointRegionOperator,
+    ReloadStructureOperator,
+    SelectStructureOperator,
+)
 from .props import AtomColorPropertyGroup, AtomPropertyGroup, register_scene_properties, unregister_scene_properties
-from .state import state
 from .ui import FILE_PT_loader_panel
 
 
@@ -11,7 +17,7 @@ bl_info = {
     "name": "Atoms Visualizer",
     "author": "Albert Linda",
     "version": (0, 2, 0),
-    "blender": (2, 80, 0),
+    "blender": (3, 0, 0),
     "location": "3D Viewport > SideBar > Atoms Visualizer",
     "description": "A simple addon to load atoms in .xyz format.",
     "category": "Import-Export",
@@ -22,6 +28,11 @@ CLASSES = (
     AtomPropertyGroup,
     AtomColorPropertyGroup,
     LoadFileOperator,
+    LoadTrajectoryOperator,
+    PointRegionOperator,
+    ReloadStructureOperator,
+    SelectStructureOperator,
+    ExportPerformanceOperator,
     FILE_PT_loader_panel,
 )
 
@@ -30,12 +41,21 @@ def menu_func(self, context):
     self.layout.operator(LoadFileOperator.bl_idname, text="Load File...")
 
 
+# Handlers without the persistent tag are dropped when a file is opened
+@bpy.app.handlers.persistent
 def initialize_all_scenes(dummy=None):
-    if not state.elem_list:
-        return
-    builder = get_controller().scene_builder
-    for scene in bpy.data.scenes:
-        builder.initialize_radius_collection(scene)
+    # Restoring fills the per-element sliders of every scene without running their update callbacks
+    get_controller().restore_from_blend()
+
+
+@bpy.app.handlers.persistent
+def save_structure_data(dummy=None):
+    get_controller().save_to_blend()
+
+
+@bpy.app.handlers.persistent
+def update_trajectory_frame(scene, depsgraph=None):
+    get_controller().update_trajectory_frame(scene)
 
 
 def register():
@@ -48,11 +68,26 @@ def register():
     if initialize_all_scenes not in bpy.app.handlers.load_post:
         bpy.app.handlers.load_post.append(initialize_all_scenes)
 
+    if save_structure_data not in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.append(save_structure_data)
+
+    if update_trajectory_frame not in bpy.app.handlers.frame_change_post:
+        bpy.app.handlers.frame_change_post.append(update_trajectory_frame)
+
 
 def unregister():
+    if update_trajectory_frame in bpy.app.handlers.frame_change_post:
+        bpy.app.handlers.frame_change_post.remove(update_trajectory_frame)
+    get_controller().cancel_background_load()
+    get_controller().cancel_file_watch()
+    get_controller().clear_structures()
+
     if initialize_all_scenes in bpy.app.handlers.load_post:
         bpy.app.handlers.load_post.remove(initialize_all_scenes)
 
+    if save_structure_data in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.remove(save_structure_data)
+
     if hasattr(bpy.types, "TOPBAR_MT_file"):
         bpy.types.TOPBAR_MT_file.remove(menu_func)
 
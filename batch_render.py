@@ -0,0 +1,402 @@
+"""Headless batch renderer.
+
+Renders every ``.xyz`` file matched by the given directories or glob patterns::
+
+    blender --background --factory-startup --python batch_render.py -- \\
+        "data/**/*.xyz" --output renders --workers 4
+
+The invoked process is the coordinator: it splits the files into chunks and
+runs them in ``--workers`` Blender subprocesses, each of which loads the addon
+from this directory and renders its chunk with the regular controller
+pipeline (loading, materials, light and camera). Workers append one JSON line
+per file to a results log, so a crash only loses the file being rendered. That
+file is retried up to ``--retries`` times and then skipped; a worker that
+exits before starting any file uses up an attempt of its whole chunk. A
+``manifest.json`` listing every input, its image and its status is written
+to the output directory.
+
+The coordinator also runs under plain Python as long as ``--blender`` points
+to a Blender executable.
+"""
+
+import argparse
+import glob
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDON_PACKAGE = "atoms_visualizer"
+MANIFEST_NAME = "manifest.json"
+POLL_INTERVAL = 0.5
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"
+STATUS_STARTED = "started"
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="batch_render.py", description="Render .xyz files headlessly")
+    parser.add_argument("inputs", nargs="*", help="Directories or glob patterns of .xyz files")
+    parser.add_argument("--output", default="renders", help="Directory for images and the manifest")
+    parser.add_argument("--workers", type=int, default=max((os.cpu_count() or 2) // 2, 1))
+    parser.add_argument("--chunk-size", type=int, default=25, help="Files handed to a worker at a time")
+    parser.add_argument("--retries", type=int, default=1, help="Retries for a file that failed or crashed a worker")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds without progress before a worker is killed")
+    parser.add_argument("--blender", help="Blender executable (default: the running Blender)")
+    parser.add_argument("--resolution", type=int, nargs=2, default=(1920, 1080), metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--engine", default="", help="Render engine, e.g. BLENDER_EEVEE, CYCLES or BLENDER_WORKBENCH")
+    parser.add_argument("--samples", type=int, default=0, help="Render samples (0 keeps the engine default)")
+    parser.add_argument("--format", default="PNG", help="Image file format")
+    parser.add_argument("--material-style", default="", help="Material preset, e.g. PBR, METAL, GLASS")
+    parser.add_argument("--display-mode", default="", help="Atom display mode: AUTO, OBJECTS, INSTANCED or POINTS")
+    parser.add_argument("--skip-existing", action="store_true", help="Skip files whose image already exists")
+    parser.add_argument("--worker-job", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def script_args() -> List[str]:
+    # Blender stops parsing its own options at "--"; everything after belongs to the script
+    if "--" in sys.argv:
+        return sys.argv[sys.argv.index("--") + 1:]
+    return sys.argv[1:]
+
+
+def collect_inputs(patterns: List[str]) -> List[str]:
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**", "*.xyz")
+        files.extend(path for path in glob.glob(pattern, recursive=True) if path.lower().endswith(".xyz"))
+    return sorted(set(os.path.abspath(path) for path in files))
+
+
+def image_paths(files: List[str], output_dir: str, file_format: str) -> Dict[str, str]:
+    extension = {"JPEG": ".jpg", "OPEN_EXR": ".exr", "TIFF": ".tif"}.get(file_format, "." + file_format.lower())
+    images = {}
+    used = set()
+    for path in files:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name = stem
+        suffix = 1
+        while name in used:
+            name = f"{stem}_{suffix}"
+            suffix += 1
+        used.add(name)
+        images[path] = os.path.join(output_dir, name + extension)
+    return images
+
+
+def render_settings(args: argparse.Namespace) -> Dict[str, object]:
+    return {
+        "resolution": list(args.resolution),
+        "engine": args.engine,
+        "samples": args.samples,
+        "format": args.format,
+        "material_style": args.material_style,
+        "display_mode": args.display_mode,
+    }
+
+
+class BatchCoordinator:
+    def __init__(self, args: argparse.Namespace, blender: str):
+        self.args = args
+        self.blender = blender
+        self.output_dir = os.path.abspath(args.output)
+        self.settings = render_settings(args)
+        self.records: Dict[str, Dict[str, object]] = {}
+        self.attempts: Dict[str, int] = {}
+        self.job_dir = tempfile.mkdtemp(prefix="atoms_visualizer_batch_")
+        self._next_worker = 0
+
+    def run(self, files: List[str]) -> List[Dict[str, object]]:
+        os.makedirs(self.output_dir, exist_ok=True)
+        images = image_paths(files, self.output_dir, self.args.format)
+        pending = deque()
+        for path in files:
+            if self.args.skip_existing and os.path.exists(images[path]):
+                self.records[path] = self._record(path, images[path], STATUS_SKIPPED)
+            else:
+                pending.append(path)
+
+        running = []
+        while pending or running:
+            while pending and len(running) < max(self.args.workers, 1):
+                chunk = [pending.popleft() for _ in range(min(self.args.chunk_size, len(pending)))]
+                running.append(self._launch(chunk, images))
+
+            time.sleep(POLL_INTERVAL)
+            for worker in list(running):
+                if self._poll(worker, pending):
+                    running.remove(worker)
+                    self.write_manifest(files)
+
+        self.write_manifest(files)
+        return [self.records[path] for path in files]
+
+    def write_manifest(self, files: List[str]) -> None:
+        manifest = {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "settings": self.settings,
+            "files": [self.records[path] for path in files if path in self.records],
+        }
+        temp_path = os.path.join(self.output_dir, MANIFEST_NAME + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, os.path.join(self.output_dir, MANIFEST_NAME))
+
+    def cleanup(self, keep_logs: bool) -> None:
+        if not keep_logs:
+            shutil.rmtree(self.job_dir, ignore_errors=True)
+
+    def _launch(self, chunk: List[str], images: Dict[str, str]) -> Dict[str, object]:
+        worker_id = self._next_worker
+        self._next_worker += 1
+        job_path = os.path.join(self.job_dir, f"worker_{worker_id}.json")
+        results_path = os.path.join(self.job_dir, f"worker_{worker_id}.jsonl")
+        with open(job_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "files": [[path, images[path]] for path in chunk],
+                    "settings": self.settings,
+                    "results": results_path,
+                },
+                f,
+            )
+
+        command = [
+            self.blender,
+            "--background",
+            "--factory-startup",
+            "--python",
+            os.path.abspath(__file__),
+            "--",
+            "--worker-job",
+            job_path,
+        ]
+        log = open(os.path.join(self.job_dir, f"worker_{worker_id}.log"), "wb")
+        process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+        return {
+            "process": process,
+            "log": log,
+            "chunk": chunk,
+            "images": images,
+            "results": results_path,
+            "progress_time": time.monotonic(),
+            "progress_lines": 0,
+        }
+
+    def _poll(self, worker: Dict[str, object], pending: deque) -> bool:
+        lines = _read_results(worker["results"])
+        if len(lines) != worker["progress_lines"]:
+            worker["progress_lines"] = len(lines)
+            worker["progress_time"] = time.monotonic()
+
+        process = worker["process"]
+        timed_out = time.monotonic() - worker["progress_time"] > self.args.timeout
+        if process.poll() is None and not timed_out:
+            return False
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        worker["log"].close()
+
+        finished = {}
+        started = set()
+        for line in lines:
+            if line["status"] == STATUS_STARTED:
+                started.add(line["input"])
+            else:
+                finished[line["input"]] = line
+
+        if timed_out:
+            worker_error = f"worker timed out after {self.args.timeout:.0f}s"
+        else:
+            worker_error = f"worker exited with code {process.returncode}"
+        # A worker that reported nothing failed on its own (bad executable, addon import or register
+        # error), so the failure counts against every file it was given or it would be relaunched forever
+        worker_failed = not lines
+
+        for path in worker["chunk"]:
+            image = worker["images"][path]
+            result = finished.get(path)
+            if result is not None and result["status"] == STATUS_OK:
+                self.attempts[path] = self.attempts.get(path, 0) + 1
+                self.records[path] = self._record(path, image, STATUS_OK, seconds=result.get("seconds"))
+            elif result is not None or path in started or worker_failed:
+                # The render raised, the worker died while this file was in flight, or before any file
+                self.attempts[path] = self.attempts.get(path, 0) + 1
+                if result is not None:
+                    error = result.get("error", "")
+                elif worker_failed:
+                    error = f"{worker_error} before starting any file"
+                else:
+                    error = worker_error
+                if self.attempts[path] <= self.args.retries:
+                    pending.append(path)
+                else:
+                    self.records[path] = self._record(path, image, STATUS_FAILED, error=error)
+            else:
+                # Not reached because an earlier file in the chunk took the worker down; that file
+                # was charged the attempt, so requeueing this one always makes progress
+                pending.append(path)
+        return True
+
+    def _record(self, path: str, image: str, status: str, seconds=None, error: str = "") -> Dict[str, object]:
+        record = {
+            "input": path,
+            "image": image if status != STATUS_FAILED else None,
+            "status": status,
+            "attempts": self.attempts.get(path, 0),
+        }
+        if seconds is not None:
+            record["seconds"] = seconds
+        if error:
+            record["error"] = error
+        return record
+
+
+def _read_results(results_path: str) -> List[Dict[str, object]]:
+    if not os.path.exists(results_path):
+        return []
+    lines = []
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                lines.append(json.loads(line))
+            except ValueError:
+                # A worker killed mid-write leaves a partial last line
+                continue
+    return lines
+
+
+def import_addon():
+    if ADDON_PACKAGE in sys.modules:
+        return sys.modules[ADDON_PACKAGE]
+    spec = importlib.util.spec_from_file_location(
+        ADDON_PACKAGE, os.path.join(ADDON_DIR, "__init__.py"), submodule_search_locations=[ADDON_DIR]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[ADDON_PACKAGE] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_worker(job_path: str) -> int:
+    import bpy
+
+    with open(job_path, "r", encoding="utf-8") as f:
+        job = json.load(f)
+
+    addon = import_addon()
+    addon.register()
+    controller = sys.modules[f"{ADDON_PACKAGE}.controller"].get_controller()
+    settings = job["settings"]
+
+    with open(job["results"], "a", encoding="utf-8") as results:
+        for input_path, image_path in job["files"]:
+            _write_result(results, {"input": input_path, "status": STATUS_STARTED})
+            start = time.perf_counter()
+            try:
+                bpy.ops.wm.read_homefile(use_empty=True)
+                _apply_scene_settings(controller, settings)
+                # The level of detail is picked from the render resolution while loading
+                _apply_render_settings(bpy.context.scene, settings)
+                controller.load_structure(input_path)
+                _render(bpy.context.scene, image_path, settings)
+            except Exception as exc:
+                traceback.print_exc()
+                _write_result(results, {"input": input_path, "status": STATUS_FAILED, "error": str(exc)})
+                continue
+            _write_result(
+                results,
+                {"input": input_path, "status": STATUS_OK, "seconds": round(time.perf_counter() - start, 3)},
+            )
+    return 0
+
+
+def _apply_scene_settings(controller, settings: Dict[str, object]) -> None:
+    if settings.get("material_style"):
+        controller.state.material_style = settings["material_style"]
+    if settings.get("display_mode"):
+        controller.state.atom_display_mode = settings["display_mode"]
+
+
+def _apply_render_settings(scene, settings: Dict[str, object]) -> None:
+    render = scene.render
+    render.resolution_x, render.resolution_y = settings["resolution"]
+    render.resolution_percentage = 100
+    if settings.get("engine"):
+        render.engine = settings["engine"]
+    if settings.get("samples"):
+        if render.engine == "CYCLES":
+            scene.cycles.samples = settings["samples"]
+        elif hasattr(scene, "eevee"):
+            scene.eevee.taa_render_samples = settings["samples"]
+
+
+def _render(scene, image_path: str, settings: Dict[str, object]) -> None:
+    import bpy
+
+    render = scene.render
+    render.image_settings.file_format = settings["format"]
+    render.filepath = image_path
+    bpy.ops.render.render(write_still=True)
+
+
+def _write_result(results, record: Dict[str, object]) -> None:
+    results.write(json.dumps(record) + "\n")
+    results.flush()
+    os.fsync(results.fileno())
+
+
+def default_blender() -> Optional[str]:
+    try:
+        import bpy
+    except ImportError:
+        return None
+    return bpy.app.binary_path or None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(script_args() if argv is None else argv)
+    if args.worker_job:
+        return run_worker(args.worker_job)
+
+    blender = args.blender or default_blender()
+    if not blender:
+        print("No Blender executable found; pass --blender", file=sys.stderr)
+        return 2
+
+    files = collect_inputs(args.inputs)
+    if not files:
+        print("No .xyz files matched", file=sys.stderr)
+        return 2
+
+    coordinator = BatchCoordinator(args, blender)
+    records = coordinator.run(files)
+    failed = [record for record in records if record["status"] == STATUS_FAILED]
+    coordinator.cleanup(keep_logs=bool(failed))
+    print(
+        f"Rendered {len(records) - len(failed)} of {len(records)} files; "
+        f"manifest written to {os.path.join(coordinator.output_dir, MANIFEST_NAME)}"
+    )
+    if failed:
+        print(f"{len(failed)} file(s) failed; worker logs kept in {coordinator.job_dir}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    # Inside Blender, sys.exit also ends the background session with the right status
+    sys.exit(exit_code)
@@ -0,0 +1,611 @@
+"""Minimal in-memory stand-ins for ``bpy`` and ``mathutils``.
+
+Only the API surface used by the addon is modelled. Mesh data is kept in NumPy
+arrays so ``foreach_set`` costs roughly what a real bulk copy costs, while
+per-datablock Python overhead (objects, modifiers, node trees) is still paid.
+The numbers are useful for catching regressions, not for predicting Blender
+wall time.
+"""
+
+import math
+import sys
+import types
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class IDProperties:
+    def __init__(self):
+        self._id_props: Dict[str, object] = {}
+
+    def __getitem__(self, key):
+        return self._id_props[key]
+
+    def __setitem__(self, key, value):
+        self._id_props[key] = value
+
+    def __delitem__(self, key):
+        del self._id_props[key]
+
+    def __contains__(self, key):
+        return key in self._id_props
+
+    def get(self, key, default=None):
+        return self._id_props.get(key, default)
+
+
+class ID(IDProperties):
+    def __init__(self, name: str):
+        super().__init__()
+        self.name = name
+        self.users = 0
+
+    def update_tag(self, *args, **kwargs):
+        pass
+
+
+class IDCollection:
+    def __init__(self, factory):
+        self._factory = factory
+        self._items: Dict[str, ID] = {}
+
+    def new(self, name: str, *args, **kwargs) -> ID:
+        unique = name
+        suffix = 1
+        while unique in self._items:
+            unique = f"{name}.{suffix:03d}"
+            suffix += 1
+        item = self._factory(unique, *args, **kwargs)
+        self._items[unique] = item
+        return item
+
+    def get(self, name: str, default=None):
+        return self._items.get(name, default)
+
+    def remove(self, item: ID, do_unlink: bool = True) -> None:
+        self._items.pop(item.name, None)
+        if do_unlink and isinstance(item, Object):
+            for collection in list(item.users_collection):
+                collection.objects.unlink(item)
+
+    def __getitem__(self, name: str) -> ID:
+        return self._items[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._items
+
+    def __iter__(self):
+        return iter(list(self._items.values()))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class _ArrayElements:
+    def __init__(self, width: int, dtype, attribute: str):
+        self._width = width
+        self._attribute = attribute
+        self._data = np.zeros((0, width), dtype=dtype)
+
+    def add(self, count: int) -> None:
+        self._data = np.concatenate([self._data, np.zeros((count, self._width), dtype=self._data.dtype)])
+
+    def foreach_set(self, attribute: str, values) -> None:
+        self._data[...] = np.asarray(values).reshape(self._data.shape)
+
+    def foreach_get(self, attribute: str, values) -> None:
+        values[...] = self._data.reshape(values.shape)
+
+    def clear(self) -> None:
+        self._data = self._data[:0]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class Polygon:
+    def __init__(self):
+        self.use_smooth = False
+
+
+class MeshPolygons(_ArrayElements):
+    def __init__(self):
+        super().__init__(1, np.int32, "loop_start")
+        self._smooth: Optional[List[Polygon]] = None
+
+    def foreach_set(self, attribute: str, values) -> None:
+        if attribute == "loop_start":
+            super().foreach_set(attribute, values)
+
+    def __iter__(self):
+        if self._smooth is None or len(self._smooth) != len(self):
+            self._smooth = [Polygon() for _ in range(len(self))]
+        return iter(self._smooth)
+
+
+class AttributeData:
+    def __init__(self, count: int, dtype, width: int = 1):
+        self.values = np.zeros((count, width) if width > 1 else count, dtype=dtype)
+
+    def foreach_set(self, attribute: str, values) -> None:
+        self.values[...] = np.asarray(values).reshape(self.values.shape)
+
+    def foreach_get(self, attribute: str, values) -> None:
+        values[...] = self.values.reshape(values.shape)
+
+
+class Attribute:
+    def __init__(self, name: str, count: int, data_type: str, domain: str):
+        self.name = name
+        self.data_type = data_type
+        self.domain = domain
+        dtype = np.int32 if data_type == "INT" else np.float32
+        self.data = AttributeData(count, dtype, {"FLOAT_COLOR": 4, "FLOAT_VECTOR": 3}.get(data_type, 1))
+
+
+class MeshAttributes:
+    def __init__(self, mesh: "Mesh"):
+        self._mesh = mesh
+        self._items: Dict[str, Attribute] = {}
+
+    def new(self, name: str, type: str, domain: str) -> Attribute:
+        elements = self._mesh.edges if domain == "EDGE" else self._mesh.vertices
+        attribute = Attribute(name, len(elements), type, domain)
+        self._items[name] = attribute
+        return attribute
+
+    def remove(self, attribute: Attribute) -> None:
+        self._items.pop(attribute.name, None)
+
+    def get(self, name: str, default=None):
+        return self._items.get(name, default)
+
+    def __getitem__(self, name: str) -> Attribute:
+        return self._items[name]
+
+
+class Mesh(ID):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.vertices = _ArrayElements(3, np.float32, "co")
+        self.edges = _ArrayElements(2, np.int32, "vertices")
+        self.loops = _ArrayElements(1, np.int32, "vertex_index")
+        self.polygons = MeshPolygons()
+        self.attributes = MeshAttributes(self)
+        self.materials: List[ID] = []
+        self.use_fake_user = False
+
+    def clear_geometry(self) -> None:
+        self.vertices.clear()
+        self.edges.clear()
+        self.loops.clear()
+        self.polygons.clear()
+
+    def update(self, calc_edges: bool = False) -> None:
+        pass
+
+
+class Material(ID):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.use_nodes = False
+        self.blend_method = "OPAQUE"
+        self.shadow_method = "OPAQUE"
+        self.node_tree = NodeTree(name)
+        bsdf = self.node_tree.nodes.new("ShaderNodeBsdfPrincipled")
+        bsdf.name = "Principled BSDF"
+        for input_name in (
+            "Base Color",
+            "Metallic",
+            "Roughness",
+            "IOR",
+            "Transmission",
+            "Specular",
+            "Emission",
+            "Emission Strength",
+        ):
+            bsdf.inputs[input_name]
+
+
+class Socket:
+    def __init__(self, name: str):
+        self.name = name
+        self.identifier = name
+        self.default_value = None
+
+
+class SocketMap:
+    def __init__(self):
+        self._items: Dict[str, Socket] = {}
+
+    def __getitem__(self, name: str) -> Socket:
+        if name not in self._items:
+            self._items[name] = Socket(name)
+        return self._items[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._items
+
+    def __iter__(self):
+        return iter(list(self._items.values()))
+
+
+class Node:
+    def __init__(self, node_type: str):
+        self.bl_idname = node_type
+        self.name = node_type
+        self.location = (0.0, 0.0)
+        self.data_type = "FLOAT"
+        self.inputs = SocketMap()
+        self.outputs = SocketMap()
+
+
+class Nodes:
+    def __init__(self):
+        self._items: List[Node] = []
+
+    def new(self, node_type: str) -> Node:
+        node = Node(node_type)
+        self._items.append(node)
+        return node
+
+    def get(self, name: str, default=None):
+        for node in self._items:
+            if node.name == name:
+                return node
+        return default
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class Links:
+    def __init__(self):
+        self.items = []
+
+    def new(self, output_socket: Socket, input_socket: Socket):
+        self.items.append((output_socket, input_socket))
+        return self.items[-1]
+
+
+class InterfaceSocket:
+    item_type = "SOCKET"
+
+    def __init__(self, name: str, in_out: str, socket_type: str, identifier: str):
+        self.name = name
+        self.in_out = in_out
+        self.socket_type = socket_type
+        self.identifier = identifier
+
+
+class Interface:
+    def __init__(self):
+        self.items_tree: List[InterfaceSocket] = []
+
+    def new_socket(self, name: str, in_out: str = "INPUT", socket_type: str = "NodeSocketFloat") -> InterfaceSocket:
+        item = InterfaceSocket(name, in_out, socket_type, f"Socket_{len(self.items_tree)}")
+        self.items_tree.append(item)
+        return item
+
+    def remove(self, item: InterfaceSocket) -> None:
+        self.items_tree.remove(item)
+
+
+class NodeTree(ID):
+    def __init__(self, name: str, tree_type: str = "ShaderNodeTree"):
+        super().__init__(name)
+        self.bl_idname = tree_type
+        self.nodes = Nodes()
+        self.links = Links()
+        self.interface = Interface()
+
+
+class Modifier(IDProperties):
+    def __init__(self, owner: "Object", name: str, modifier_type: str):
+        super().__init__()
+        self.name = name
+        self.type = modifier_type
+        self.node_group = None
+        self.id_data = owner
+
+
+class Modifiers:
+    def __init__(self, owner: "Object"):
+        self._owner = owner
+        self._items: Dict[str, Modifier] = {}
+
+    def new(self, name: str, type: str) -> Modifier:
+        modifier = Modifier(self._owner, name, type)
+        self._items[name] = modifier
+        return modifier
+
+    def get(self, name: str, default=None):
+        return self._items.get(name, default)
+
+    def __iter__(self):
+        return iter(list(self._items.values()))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class Light(ID):
+    def __init__(self, name: str, type: str = "POINT"):
+        super().__init__(name)
+        self.type = type
+        self.energy = 10.0
+        self.angle = 0.0
+
+
+class Camera(ID):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.type = "PERSP"
+        self.lens = 50.0
+        self.sensor_width = 36.0
+
+    @property
+    def angle_x(self) -> float:
+        return 2.0 * math.atan(self.sensor_width / (2.0 * self.lens))
+
+    @property
+    def angle_y(self) -> float:
+        return self.angle_x * 9.0 / 16.0
+
+
+class Object(ID):
+    def __init__(self, name: str, data: Optional[ID] = None):
+        super().__init__(name)
+        self.data = data
+        self.location = Vector((0.0, 0.0, 0.0))
+        self.scale = (1.0, 1.0, 1.0)
+        self.rotation_euler = (0.0, 0.0, 0.0)
+        self.modifiers = Modifiers(self)
+        self.users_collection: List["Collection"] = []
+        self.instance_type = "NONE"
+        self.instance_collection = None
+
+    @property
+    def type(self) -> str:
+        if isinstance(self.data, Mesh):
+            return "MESH"
+        if isinstance(self.data, Light):
+            return "LIGHT"
+        if isinstance(self.data, Camera):
+            return "CAMERA"
+        return "EMPTY"
+
+
+class CollectionObjects:
+    def __init__(self, owner: "Collection"):
+        self._owner = owner
+        self._items: Dict[str, Object] = {}
+
+    def link(self, obj: Object) -> None:
+        if obj.name in self._items:
+            raise RuntimeError(f"Object '{obj.name}' already in collection '{self._owner.name}'")
+        self._items[obj.name] = obj
+        obj.users_collection.append(self._owner)
+
+    def unlink(self, obj: Object) -> None:
+        self._items.pop(obj.name, None)
+        if self._owner in obj.users_collection:
+            obj.users_collection.remove(self._owner)
+
+    def __iter__(self):
+        return iter(list(self._items.values()))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class CollectionChildren:
+    def __init__(self):
+        self._items: List["Collection"] = []
+
+    def link(self, collection: "Collection") -> None:
+        self._items.append(collection)
+
+    def unlink(self, collection: "Collection") -> None:
+        self._items.remove(collection)
+
+    def __contains__(self, name: str) -> bool:
+        return any(collection.name == name for collection in self._items)
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+
+class Collection(ID):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.objects = CollectionObjects(self)
+        self.children = CollectionChildren()
+        self.hide_viewport = False
+        self.hide_render = False
+
+
+class PropertyItem:
+    def __init__(self):
+        self.value = None
+
+
+class PropertyCollection:
+    def __init__(self):
+        self._items: List[PropertyItem] = []
+
+    def add(self) -> PropertyItem:
+        self._items.append(PropertyItem())
+        return self._items[-1]
+
+    def clear(self) -> None:
+        self._items = []
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, index: int) -> PropertyItem:
+        return self._items[index]
+
+
+class Scene(ID):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.collection = Collection("Scene Collection")
+        self.camera = None
+        self.frame_start = 1
+        self.frame_end = 250
+        self.frame_current = 1
+        self.render = types.SimpleNamespace(resolution_x=1920, resolution_y=1080, resolution_percentage=100)
+        self.atomic_radius = PropertyCollection()
+        self.atomic_color = PropertyCollection()
+
+
+class Vector(tuple):
+    def __new__(cls, values=(0.0, 0.0, 0.0)):
+        return super().__new__(cls, (float(value) for value in values))
+
+    def __add__(self, other):
+        return Vector(a + b for a, b in zip(self, other))
+
+    def __sub__(self, other):
+        return Vector(a - b for a, b in zip(self, other))
+
+    def __mul__(self, scalar):
+        return Vector(a * scalar for a in self)
+
+    __rmul__ = __mul__
+
+    @property
+    def length(self) -> float:
+        return math.sqrt(sum(a * a for a in self))
+
+    def normalized(self) -> "Vector":
+        length = self.length
+        return Vector(a / length for a in self) if length > 0.0 else Vector(self)
+
+    def to_track_quat(self, track: str = "Z", up: str = "Y") -> "Quaternion":
+        return Quaternion()
+
+
+class Quaternion(tuple):
+    def __new__(cls, values=(1.0, 0.0, 0.0, 0.0)):
+        return super().__new__(cls, values)
+
+    def to_euler(self):
+        return (0.0, 0.0, 0.0)
+
+
+class BlendData:
+    def __init__(self):
+        self.objects = IDCollection(Object)
+        self.meshes = IDCollection(Mesh)
+        self.materials = IDCollection(Material)
+        self.collections = IDCollection(Collection)
+        self.node_groups = IDCollection(NodeTree)
+        self.lights = IDCollection(Light)
+        self.cameras = IDCollection(Camera)
+        self.scenes = IDCollection(Scene)
+
+
+class Context:
+    def __init__(self, scene: Scene):
+        self.scene = scene
+
+
+def _property(*args, **kwargs):
+    return (args, kwargs)
+
+
+class _Registrable:
+    pass
+
+
+class _Menu:
+    @staticmethod
+    def append(func):
+        pass
+
+    @staticmethod
+    def remove(func):
+        pass
+
+
+def reset() -> None:
+    """Replace bpy.data and bpy.context with an empty file holding one scene."""
+    bpy = sys.modules["bpy"]
+    bpy.data = BlendData()
+    scene = bpy.data.scenes.new("Scene")
+    bpy.context = Context(scene)
+
+
+def install() -> types.ModuleType:
+    """Register the fake modules in sys.modules and return the fake ``bpy``."""
+    bpy = types.ModuleType("bpy")
+    bpy.app = types.SimpleNamespace(
+        version=(4, 0, 0),
+        handlers=types.SimpleNamespace(
+            load_post=[],
+            save_pre=[],
+            frame_change_post=[],
+            render_init=[],
+            render_complete=[],
+            persistent=lambda func: func,
+        ),
+        timers=types.SimpleNamespace(
+            register=lambda *args, **kwargs: None, unregister=lambda *args: None, is_registered=lambda *args: False
+        ),
+    )
+    bpy.path = types.SimpleNamespace(abspath=lambda path: path)
+    bpy.utils = types.SimpleNamespace(register_class=lambda cls: None, unregister_class=lambda cls: None)
+
+    bpy.props = types.ModuleType("bpy.props")
+    for name in (
+        "BoolProperty",
+        "CollectionProperty",
+        "EnumProperty",
+        "FloatProperty",
+        "FloatVectorProperty",
+        "IntProperty",
+        "IntVectorProperty",
+        "PointerProperty",
+        "StringProperty",
+    ):
+        setattr(bpy.props, name, _property)
+
+    bpy.types = types.ModuleType("bpy.types")
+    for name in ("Operator", "Panel", "PropertyGroup", "Menu", "UIList"):
+        setattr(bpy.types, name, type(name, (_Registrable,), {}))
+    bpy.types.Scene = Scene
+    bpy.types.Object = Object
+    bpy.types.TOPBAR_MT_file = _Menu
+
+    bpy_extras = types.ModuleType("bpy_extras")
+    io_utils = types.ModuleType("bpy_extras.io_utils")
+    io_utils.ImportHelper = type("ImportHelper", (), {})
+    io_utils.ExportHelper = type("ExportHelper", (), {})
+    bpy_extras.io_utils = io_utils
+
+    mathutils = types.ModuleType("mathutils")
+    mathutils.Vector = Vector
+    mathutils.Quaternion = Quaternion
+
+    sys.modules.update(
+        {
+            "bpy": bpy,
+            "bpy.props": bpy.props,
+            "bpy.types": bpy.types,
+            "bpy_extras": bpy_extras,
+            "bpy_extras.io_utils": io_utils,
+            "mathutils": mathutils,
+        }
+    )
+    reset()
+    return bpy
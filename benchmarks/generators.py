@@ -0,0 +1,121 @@
+"""Synthetic structures for benchmarking.
+
+Every generator returns ``(elements, positions, lattice)`` with exactly
+``atom_count`` atoms (water boxes round down to whole molecules) and is
+deterministic for a given seed.
+"""
+
+import math
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+Structure = Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]
+
+_FCC_BASIS = np.array([(0.0, 0.0, 0.0), (0.5, 0.5, 0.0), (0.5, 0.0, 0.5), (0.0, 0.5, 0.5)])
+_BCC_BASIS = np.array([(0.0, 0.0, 0.0), (0.5, 0.5, 0.5)])
+
+WATER_OH_LENGTH = 0.9572
+WATER_HOH_ANGLE = math.radians(104.52)
+WATER_SPACING = 3.1
+
+
+def fcc_lattice(atom_count: int, element: str = "Cu", lattice_constant: float = 3.61) -> Structure:
+    return _cubic_lattice(atom_count, element, lattice_constant, _FCC_BASIS)
+
+
+def bcc_lattice(atom_count: int, element: str = "Fe", lattice_constant: float = 2.87) -> Structure:
+    return _cubic_lattice(atom_count, element, lattice_constant, _BCC_BASIS)
+
+
+def water_box(atom_count: int, seed: int = 0) -> Structure:
+    rng = np.random.default_rng(seed)
+    molecule_count = max(atom_count // 3, 1)
+    per_axis = math.ceil(molecule_count ** (1.0 / 3.0))
+    oxygen = _grid(per_axis)[:molecule_count] * WATER_SPACING
+
+    # Two O-H bonds at the water angle, rotated by a random orthonormal frame per molecule
+    half_angle = WATER_HOH_ANGLE / 2.0
+    local = WATER_OH_LENGTH * np.array(
+        [(math.sin(half_angle), 0.0, math.cos(half_angle)), (-math.sin(half_angle), 0.0, math.cos(half_angle))]
+    )
+    rotations = _random_rotations(rng, molecule_count)
+    hydrogens = oxygen[:, None, :] + np.einsum("mij,hj->mhi", rotations, local)
+
+    positions = np.concatenate([oxygen[:, None, :], hydrogens], axis=1).reshape(-1, 3)
+    elements = np.tile(np.array(["O", "H", "H"]), molecule_count)
+    lattice = np.eye(3) * per_axis * WATER_SPACING
+    return elements, positions, lattice
+
+
+def random_cluster(
+    atom_count: int,
+    elements: Sequence[str] = ("C", "H", "O", "N"),
+    density: float = 0.1,
+    seed: int = 0,
+) -> Structure:
+    rng = np.random.default_rng(seed)
+    radius = (3.0 * atom_count / (4.0 * math.pi * density)) ** (1.0 / 3.0)
+    directions = rng.normal(size=(atom_count, 3))
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    distances = radius * rng.random(atom_count) ** (1.0 / 3.0)
+    positions = directions * distances[:, None]
+    atom_elements = np.asarray(elements)[rng.integers(0, len(elements), atom_count)]
+    return atom_elements, positions, None
+
+
+GENERATORS: Dict[str, Callable[[int], Structure]] = {
+    "fcc": fcc_lattice,
+    "bcc": bcc_lattice,
+    "water": water_box,
+    "cluster": random_cluster,
+}
+
+
+def write_xyz(file_path: str, elements: np.ndarray, positions: np.ndarray, lattice: Optional[np.ndarray] = None) -> None:
+    with open(file_path, "w", encoding="utf-8") as f:
+        _write_frame(f, elements, positions, lattice, "synthetic structure")
+
+
+def write_trajectory(
+    file_path: str,
+    elements: np.ndarray,
+    positions: np.ndarray,
+    frame_count: int,
+    amplitude: float = 0.05,
+    lattice: Optional[np.ndarray] = None,
+    seed: int = 0,
+) -> None:
+    rng = np.random.default_rng(seed)
+    with open(file_path, "w", encoding="utf-8") as f:
+        for frame in range(frame_count):
+            jitter = rng.normal(scale=amplitude, size=positions.shape)
+            _write_frame(f, elements, positions + jitter, lattice, f"frame {frame}")
+
+
+def _write_frame(f, elements: np.ndarray, positions: np.ndarray, lattice: Optional[np.ndarray], comment: str) -> None:
+    if lattice is not None:
+        cell = " ".join(f"{value:.6f}" for value in np.asarray(lattice).ravel())
+        comment = f'Lattice="{cell}" Properties=species:S:1:pos:R:3 pbc="T T T" {comment}'
+    f.write(f"{len(elements)}\n{comment}\n")
+    rows = np.column_stack([np.asarray(elements, dtype=object), positions])
+    f.writelines("%s %.6f %.6f %.6f\n" % tuple(row) for row in rows)
+
+
+def _cubic_lattice(atom_count: int, element: str, lattice_constant: float, basis: np.ndarray) -> Structure:
+    per_axis = math.ceil((atom_count / len(basis)) ** (1.0 / 3.0))
+    cells = _grid(per_axis)
+    positions = ((cells[:, None, :] + basis[None, :, :]).reshape(-1, 3) * lattice_constant)[:atom_count]
+    elements = np.full(len(positions), element)
+    lattice = np.eye(3) * per_axis * lattice_constant
+    return elements, positions, lattice
+
+
+def _grid(per_axis: int) -> np.ndarray:
+    axis = np.arange(per_axis, dtype=np.float64)
+    return np.stack(np.meshgrid(axis, axis, axis, indexing="ij"), axis=-1).reshape(-1, 3)
+
+
+def _random_rotations(rng: np.random.Generator, count: int) -> np.ndarray:
+    matrices, _ = np.linalg.qr(rng.normal(size=(count, 3, 3)))
+    return matrices
@@ -0,0 +1,280 @@
+"""Headless benchmark runner.
+
+Run from the addon directory::
+
+    python -m benchmarks.runner
+    python -m benchmarks.runner --sizes 100 1000 10000 100000 1000000
+    python -m benchmarks.runner --update-baseline
+
+Each benchmark reports the best of ``--repeat`` runs. Results are compared
+against ``baseline.json``; a benchmark regresses when it is slower than its
+baseline time multiplied by its threshold and also more than ``min_delta_seconds``
+slower in absolute terms (so sub-millisecond timings do not flap), and the
+runner then exits with status 1.
+"""
+
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from . import fake_bpy
+from .generators import GENERATORS, write_trajectory, write_xyz
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDON_PACKAGE = "atoms_visualizer"
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+DEFAULT_THRESHOLD = 1.5
+DEFAULT_MIN_DELTA_SECONDS = 0.005
+
+
+def import_addon():
+    """Import the addon package against the fake bpy so it runs without Blender."""
+    if ADDON_PACKAGE in sys.modules:
+        return sys.modules[ADDON_PACKAGE]
+
+    fake_bpy.install()
+    spec = importlib.util.spec_from_file_location(
+        ADDON_PACKAGE, os.path.join(ADDON_DIR, "__init__.py"), submodule_search_locations=[ADDON_DIR]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[ADDON_PACKAGE] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def best_time(func: Callable[[], object], repeat: int, setup: Optional[Callable[[], None]] = None) -> float:
+    # Like timeit, keep the collector out of the timed region; scene builds allocate many small objects
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best
+
+
+def run_benchmarks(
+    sizes: List[int],
+    generators: List[str],
+    repeat: int,
+    frame_count: int,
+    scene_max_atoms: int,
+    workdir: str,
+) -> Dict[str, float]:
+    import_addon()
+    data_loader = sys.modules[f"{ADDON_PACKAGE}.data_loader"]
+    neighbor_search = sys.modules[f"{ADDON_PACKAGE}.neighbor_search"]
+    controller_module = sys.modules[f"{ADDON_PACKAGE}.controller"]
+    state_module = sys.modules[f"{ADDON_PACKAGE}.state"]
+    structure_module = sys.modules[f"{ADDON_PACKAGE}.structure"]
+
+    controller = controller_module.get_controller()
+    controller.state.cache_enabled = False
+    controller.profiler.enabled = False
+    repository = data_loader.MaterialRepository(ADDON_DIR)
+
+    results: Dict[str, float] = {}
+
+    def record(name: str, seconds: float) -> None:
+        results[name] = seconds
+        print(f"{name:<40} {seconds * 1000:10.2f} ms", flush=True)
+
+    for generator_name in generators:
+        for size in sizes:
+            elements, positions, lattice = GENERATORS[generator_name](size)
+            file_path = os.path.join(workdir, f"{generator_name}_{size}.xyz")
+            write_xyz(file_path, elements, positions, lattice)
+            suffix = f"{generator_name}/{size}"
+
+            record(f"read_xyz/{suffix}", best_time(lambda: data_loader.StructureLoader.read_xyz(file_path), repeat))
+            structure = data_loader.StructureLoader.read_xyz(file_path)
+            element_list = list(structure.elements)
+
+            def load_element_data():
+                repository.load_for_elements(element_list)
+                repository.bond_matrices(element_list)
+
+            record(
+                f"load_for_elements/{suffix}",
+                best_time(load_element_data, repeat, setup=data_loader._DATABASE_CACHE.clear),
+            )
+
+            compatibility, pair_cutoffs = repository.bond_matrices(element_list)
+            record(
+                f"bond_search/{suffix}",
+                best_time(
+                    lambda: neighbor_search.bond_candidates(
+                        structure.positions,
+                        structure.element_indices,
+                        compatibility,
+                        state_module.MAX_BOND_CUTOFF,
+                        pair_cutoffs,
+                    ),
+                    repeat,
+                ),
+            )
+            record(
+                f"bond_search_pbc/{suffix}",
+                best_time(
+                    lambda: neighbor_search.bond_candidates(
+                        structure.positions,
+                        structure.element_indices,
+                        compatibility,
+                        state_module.MAX_BOND_CUTOFF,
+                        pair_cutoffs,
+                        structure.lattice,
+                        structure.pbc,
+                    ),
+                    repeat,
+                ),
+            )
+
+            if size <= scene_max_atoms:
+                prepared = controller.prepare_structure(file_path)
+                record(
+                    f"scene_build/{suffix}",
+                    best_time(lambda: controller.apply_prepared_structure(prepared), repeat, setup=fake_bpy.reset),
+                )
+                controller.clear_structures()
+
+    for size in sizes:
+        if size > scene_max_atoms:
+            continue
+        elements, positions, lattice = GENERATORS["fcc"](size)
+        file_path = os.path.join(workdir, f"trajectory_{size}.xyz")
+        write_trajectory(file_path, elements, positions, frame_count, lattice=lattice)
+
+        def read_all_frames():
+            for _ in data_loader.XYZTrajectoryReader(file_path).frames():
+                pass
+
+        record(f"trajectory_read/fcc/{size}x{frame_count}", best_time(read_all_frames, repeat))
+
+        # Copper has no bonds in the table, so bond tracking runs on water
+        elements, positions, lattice = GENERATORS["water"](size)
+        file_path = os.path.join(workdir, f"water_trajectory_{size}.xyz")
+        write_trajectory(file_path, elements, positions, frame_count, lattice=lattice)
+        frames = list(data_loader.XYZTrajectoryReader(file_path).frames())
+        structure = structure_module.AtomArrays.from_arrays(
+            frames[0].elements, frames[0].positions, frames[0].columns, frames[0].lattice, frames[0].pbc
+        )
+        compatibility, pair_cutoffs = repository.bond_matrices(list(structure.elements))
+
+        def track_bonds():
+            bond_list = neighbor_search.VerletBondList(
+                structure.element_indices,
+                compatibility,
+                state_module.MAX_BOND_CUTOFF,
+                pair_cutoffs,
+                structure.lattice,
+                structure.pbc,
+            )
+            for frame in frames:
+                bond_list.update(frame.positions)
+
+        record(f"trajectory_bonds/water/{size}x{frame_count}", best_time(track_bonds, repeat))
+
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, object]) -> List[str]:
+    regressions = []
+    entries = baseline.get("benchmarks", {})
+    default_threshold = float(baseline.get("default_threshold", DEFAULT_THRESHOLD))
+    min_delta = float(baseline.get("min_delta_seconds", DEFAULT_MIN_DELTA_SECONDS))
+    for name, seconds in results.items():
+        entry = entries.get(name)
+        if entry is None:
+            continue
+        threshold = float(entry.get("threshold", default_threshold))
+        reference = float(entry["seconds"])
+        regressed = seconds > reference * threshold and seconds - reference > min_delta
+        ratio = seconds / reference if reference else float("inf")
+        print(f"{name:<40} {ratio:6.2f}x baseline (limit {threshold:.2f}x) {'REGRESSION' if regressed else 'ok'}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def update_baseline(results: Dict[str, float], baseline: Dict[str, object], threshold: float) -> Dict[str, object]:
+    entries = dict(baseline.get("benchmarks", {}))
+    for name, seconds in results.items():
+        previous = entries.get(name, {})
+        entries[name] = {"seconds": round(seconds, 6), "threshold": previous.get("threshold", threshold)}
+    return {
+        "default_threshold": baseline.get("default_threshold", threshold),
+        "min_delta_seconds": baseline.get("min_delta_seconds", DEFAULT_MIN_DELTA_SECONDS),
+        "benchmarks": dict(sorted(entries.items())),
+    }
+
+
+def load_baseline(file_path: str) -> Dict[str, object]:
+    if not os.path.exists(file_path):
+        return {}
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Atoms Visualizer headless benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--generators", nargs="+", choices=sorted(GENERATORS), default=sorted(GENERATORS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--frames", type=int, default=10, help="Frames in the synthetic trajectory")
+    parser.add_argument("--scene-max-atoms", type=int, default=10000, help="Largest size run through the scene builder")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Threshold for new baseline entries")
+    parser.add_argument("--output", help="Write raw results to this JSON file")
+    parser.add_argument("--workdir", help="Directory for generated files (default: a temporary directory)")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="atoms_visualizer_bench_")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        results = run_benchmarks(
+            args.sizes, args.generators, args.repeat, args.frames, args.scene_max_atoms, workdir
+        )
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    baseline = load_baseline(args.baseline)
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(update_baseline(results, baseline, args.threshold), f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+
+    regressions = compare(results, baseline)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .structure import AtomArrays
+
+CACHE_FORMAT_VERSION = 3
+CACHE_SUFFIX = ".avcache.npz"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "atoms_visualizer")
+
+# first, second, distance, and the lattice image of the second atom
+BondCandidateArrays = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+_DIGEST_CACHE: Dict[Tuple[str, int, int], str] = {}
+
+
+def file_digest(file_path: str) -> str:
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    digest = _DIGEST_CACHE.get(memo_key)
+    if digest is None:
+        hasher = hashlib.blake2b(digest_size=20)
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 22), b""):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+        _DIGEST_CACHE[memo_key] = digest
+    return digest
+
+
+class StructureCache:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = 2 << 30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def key(self, file_path: str, candidate_cutoff: float, table_version: int) -> str:
+        parts = (file_digest(file_path), f"{candidate_cutoff:.6f}", str(table_version), str(CACHE_FORMAT_VERSION))
+        return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=20).hexdigest()
+
+    def load(self, key: str) -> Optional[Tuple[AtomArrays, BondCandidateArrays]]:
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                columns = {
+                    name[len("column:"):]: data[name] for name in data.files if name.startswith("column:")
+                }
+                structure = AtomArrays(
+                    positions=data["positions"],
+                    element_indices=data["element_indices"],
+                    elements=[str(elem) for elem in data["elements"]],
+                    columns=columns,
+                    lattice=data["lattice"] if "lattice" in data.files else None,
+                    pbc=data["pbc"] if "pbc" in data.files else None,
+                )
+                candidates = (data["bond_first"], data["bond_second"], data["bond_distances"], data["bond_shifts"])
+        except (OSError, KeyError, ValueError):
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return structure, candidates
+
+    def store(self, key: str, structure: AtomArrays, candidates: BondCandidateArrays) -> None:
+        arrays = {
+            "positions": structure.positions,
+            "element_indices": structure.element_indices,
+            "elements": np.asarray(structure.elements, dtype=str),
+            "bond_first": candidates[0],
+            "bond_second": candidates[1],
+            "bond_distances": candidates[2],
+            "bond_shifts": candidates[3],
+        }
+        for name, column in structure.columns.items():
+            if column.dtype != object:
+                arrays[f"column:{name}"] = column
+        if structure.lattice is not None:
+            arrays["lattice"] = structure.lattice
+        if structure.pbc is not None:
+            arrays["pbc"] = structure.pbc
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(temp_path, self._path(key))
+        except OSError:
+            return
+
+        self.evict()
+
+    def evict(self) -> None:
+        try:
+            names = [name for name in os.listdir(self.cache_dir) if name.endswith(CACHE_SUFFIX)]
+        except OSError:
+            return
+
+        entries = []
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        # Oldest use first; load() touches entries on every hit
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + CACHE_SUFFIX)
+
+
+class StructureMemoryCache:
+    """Parsed arrays of recently used structures, held in memory up to a byte budget."""
+
+    def __init__(self, max_bytes: int = 1 << 30):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[AtomArrays, BondCandidateArrays]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+
+    def get(self, key: str) -> Optional[Tuple[AtomArrays, BondCandidateArrays]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, structure: AtomArrays, candidates: BondCandidateArrays) -> None:
+        self._entries[key] = (structure, candidates)
+        self._entries.move_to_end(key)
+        self._sizes[key] = structure.nbytes() + sum(array.nbytes for array in candidates)
+        self.evict()
+
+    def discard(self, key: str) -> None:
+        self._entries.pop(key, None)
+        self._sizes.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._sizes.clear()
+
+    def nbytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def evict(self) -> None:
+        # The newest entry stays even when it alone is over budget; it is the structure on screen
+        total = self.nbytes()
+        while total > self.max_bytes and len(self._entries) > 1:
+            key, _ = self._entries.popitem(last=False)
+            total -= self._sizes.pop(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
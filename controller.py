@@ -1,10 +1,41 @@
+import functools
 import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
 
 import bpy
+import numpy as np
 
+from . import persistence
+from .cache import BondCandidateArrays, StructureCache, StructureMemoryCache
 from .data_loader import MaterialRepository, StructureLoader
-from .scene_builder import StructureSceneBuilder
-from .state import state
+from .loading import BackgroundLoad
+from .lod import LevelOfDetail
+from .neighbor_search import VerletBondList, bond_candidates
+from .profiling import PerformanceRecorder, PerformanceReport
+from .registry import ROLE_DATA, ROLE_STRUCTURE
+from .scene_builder import PreparedBondMesh, StructureSceneBuilder
+from .state import MAX_BOND_CUTOFF, StructureRecord, state
+from .structure import AtomArrays
+from .trajectory import TrajectoryPlayback
+
+LOAD_POLL_INTERVAL = 0.1
+# Slider drags fire an update per mouse move; appearance writes are batched at about the redraw rate
+APPEARANCE_FLUSH_INTERVAL = 1.0 / 30.0
+WATCH_POLL_INTERVAL = 1.0
+
+
+@dataclass
+class PreparedStructure:
+    file_path: str
+    structure: AtomArrays
+    atom_info: Dict[str, Dict[str, object]]
+    bond_info: Dict[str, List[str]]
+    bond_compatibility: np.ndarray
+    bond_pair_cutoffs: np.ndarray
+    bond_candidates: BondCandidateArrays
+    level_of_detail: LevelOfDetail
+    bond_mesh: PreparedBondMesh
 
 
 class AtomsVisualizerController:
@@ -13,36 +44,500 @@ class AtomsVisualizerController:
         self.loader = StructureLoader()
         self.material_repository = MaterialRepository(os.path.dirname(__file__))
         self.scene_builder = StructureSceneBuilder(self.state)
+        self.profiler = PerformanceRecorder(_datablock_counts)
+        self._style_dirty = False
+        self._dirty_colors: Set[str] = set()
+        # Kept as one object so bpy.app.timers.is_registered can find it again
+        self._appearance_timer = self._flush_appearance
+        self.structure_arrays = StructureMemoryCache(self.state.memory_cache_megabytes * 1024 * 1024)
+        # Set when the active structure's arrays have not been read back yet
+        self._arrays_pending = False
+        self._syncing_scene = False
+        # (mtime, size) of each structure's file when it was last read
+        self._file_stamps: Dict[str, Tuple[int, int]] = {}
+        self._pending_stamp: Optional[Tuple[int, int]] = None
+        self._watch_timer = self._poll_watched_file
 
     def load_structure(self, file_path: str) -> None:
+        self._capture_render_resolution()
+        with self.profiler.record("load_structure", os.path.basename(file_path), count_datablocks=True) as report:
+            self.apply_prepared_structure(self.prepare_structure(file_path, report=report), report)
+
+    def prepare_structure(
+        self,
+        file_path: str,
+        progress: Optional[BackgroundLoad] = None,
+        report: Optional[PerformanceReport] = None,
+    ) -> PreparedStructure:
+        # Reads and computes everything the scene needs without touching bpy or the shared state
+        report = report or PerformanceReport("prepare_structure", enabled=False)
+        structure, candidates = self.read_structure_arrays(file_path, progress, report)
+        with report.stage("element data"):
+            atom_info, bond_info = self.material_repository.load_for_elements(list(structure.elements))
+            compatibility, pair_cutoffs = self.material_repository.bond_matrices(list(structure.elements))
+
+        _set_progress(progress, "Building bond mesh", 0.75)
+        with report.stage("bond mesh arrays"):
+            lod = self.scene_builder.level_of_detail(structure, atom_info)
+            bond_mesh = self.scene_builder.prepare_bond_mesh(structure, candidates, lod.bond_segments)
+        return PreparedStructure(
+            file_path, structure, atom_info, bond_info, compatibility, pair_cutoffs, candidates, lod, bond_mesh
+        )
+
+    def read_structure_arrays(
+        self,
+        file_path: str,
+        progress: Optional[BackgroundLoad] = None,
+        report: Optional[PerformanceReport] = None,
+    ) -> Tuple[AtomArrays, BondCandidateArrays]:
+        report = report or PerformanceReport("read_structure_arrays", enabled=False)
+        _set_progress(progress, "Reading file", 0.0)
+        cache = None
+        cache_key = ""
+        if self.state.cache_enabled:
+            with report.stage("cache lookup"):
+                cache = StructureCache(self.state.cache_dir, self.state.cache_max_megabytes * 1024 * 1024)
+                cache_key = cache.key(file_path, MAX_BOND_CUTOFF, self.material_repository.database().version)
+                cached = cache.load(cache_key)
+            if cached is not None:
+                return cached
+
+        with report.stage("parse"):
+            structure = self.loader.read_xyz(file_path)
+
+        _set_progress(progress, "Finding bonds", 0.4)
+        with report.stage("bond search"):
+            compatibility, pair_cutoffs = self.material_repository.bond_matrices(list(structure.elements))
+            candidates = bond_candidates(
+                structure.positions,
+                structure.element_indices,
+                compatibility,
+                MAX_BOND_CUTOFF,
+                pair_cutoffs,
+                structure.lattice,
+                structure.pbc,
+            )
+        if cache is not None:
+            with report.stage("cache store"):
+                cache.store(cache_key, structure, candidates)
+        return structure, candidates
+
+    def apply_prepared_structure(self, prepared: PreparedStructure, report: Optional[PerformanceReport] = None) -> None:
+        self._stash_active()
         self.state.reset_structure()
-        self.state.atoms = self.loader.read_xyz(file_path)
-        self.state.elem_list = list(dict.fromkeys(atom[0] for atom in self.state.atoms))
-        self.state.atom_info, self.state.bond_info = self.material_repository.load_for_elements(self.state.elem_list)
+        self.state.file_path = prepared.file_path
+        self.state.structure_name = _structure_name(prepared.file_path)
+        self.state.structure = prepared.structure
+        self.state.elem_list = list(prepared.structure.elements)
+        self.state.atom_info = prepared.atom_info
+        self.state.bond_info = prepared.bond_info
+        self.state.bond_compatibility = prepared.bond_compatibility
+        self.state.bond_pair_cutoffs = prepared.bond_pair_cutoffs
+        self._set_bond_candidates(prepared.bond_candidates)
+        self.state.level_of_detail = prepared.level_of_detail
+        self._build_scene(prepared.bond_mesh, report)
+        self._register_active()
+
+    def start_background_load(self, file_path: str) -> BackgroundLoad:
+        self.cancel_background_load()
+        self._capture_render_resolution()
+        report = self.profiler.begin("load_structure", os.path.basename(file_path), count_datablocks=True)
+        job = BackgroundLoad(file_path, functools.partial(self.prepare_structure, report=report))
+        self.state.load_job = job
+        bpy.app.timers.register(
+            functools.partial(self._poll_background_load, job, report), first_interval=LOAD_POLL_INTERVAL
+        )
+        return job
 
-        self.scene_builder.create_atom_spheres()
-        self.scene_builder.create_bonds()
-        self.scene_builder.organize_into_collections()
-        self.scene_builder.apply_materials()
-        self.scene_builder.setup_default_sun_light()
-        self.scene_builder.setup_camera_isometric_view()
+    def cancel_background_load(self) -> None:
+        job = self.state.load_job
+        if job is not None:
+            job.cancel()
+            self.state.load_job = None
 
-        for scene in bpy.data.scenes:
-            self.scene_builder.initialize_radius_collection(scene)
+    def _poll_background_load(self, job: BackgroundLoad, report: PerformanceReport) -> Optional[float]:
+        if job.cancelled:
+            self.profiler.end(report, keep=False)
+            return None
+        if not job.worker_done:
+            return LOAD_POLL_INTERVAL
+
+        # Datablocks can only be created on the main thread, which is where timers run
+        if job.error is None and job.result is not None:
+            job.stage = "Creating objects"
+            try:
+                self.apply_prepared_structure(job.result, report)
+            except Exception as exc:
+                self.profiler.end(report, keep=False)
+                job.finish(exc)
+                return None
+        self.profiler.end(report, keep=job.error is None)
+        job.finish()
+        return None
+
+    def load_trajectory(self, file_path: str) -> None:
+        with self.profiler.record("load_trajectory", os.path.basename(file_path), count_datablocks=True) as report:
+            with report.stage("frame index"):
+                playback = TrajectoryPlayback(file_path)
+            previous_key = self.state.structure_key
+            self._stash_active()
+            self.state.reset_structure()
+            try:
+                self.state.file_path = file_path
+                self.state.structure_name = _structure_name(file_path)
+                self.state.trajectory = playback
+                self.state.structure = playback.structure
+                with report.stage("element data"):
+                    self._load_element_data()
+                with report.stage("bond search"):
+                    self._track_trajectory_bonds()
+                self._capture_render_resolution()
+                self.state.level_of_detail = self.scene_builder.level_of_detail(
+                    self.state.structure, self.state.atom_info
+                )
+                self._build_scene(report=report)
+                self._register_active()
+            except Exception:
+                # Nothing else holds the playback yet, so its prefetch thread and file must be closed here
+                playback.close()
+                self._abandon_load(previous_key)
+                raise
 
         scene = bpy.context.scene
-        if hasattr(scene, "bond_thickness_scene"):
-            scene.bond_thickness_scene = self.state.bond_thickness
-        if hasattr(scene, "atom_metallic_scene"):
-            scene.atom_metallic_scene = self.state.atom_metallic
-        if hasattr(scene, "atom_translucency_scene"):
-            scene.atom_translucency_scene = self.state.atom_translucency
-        if hasattr(scene, "atom_glossiness_scene"):
-            scene.atom_glossiness_scene = self.state.atom_glossiness
-        if hasattr(scene, "material_style_scene"):
-            scene.material_style_scene = self.state.material_style
+        scene.frame_end = scene.frame_start + playback.frame_count - 1
+        self.update_trajectory_frame(scene)
+
+    def update_trajectory_frame(self, scene) -> None:
+        playback = self.state.trajectory
+        if playback is None:
+            return
+        self._ensure_hydrated()
+
+        positions = playback.positions(scene.frame_current - scene.frame_start)
+        if positions is not None:
+            self.state.structure.positions = positions
+            if self.state.trajectory_bonds is not None:
+                self._set_bond_candidates(self.state.trajectory_bonds.update(positions))
+                self.scene_builder.select_visible_bonds()
+            self.scene_builder.update_atom_positions()
+
+    def _load_element_data(self) -> None:
+        self.state.elem_list = list(self.state.structure.elements)
+        self.state.atom_info, self.state.bond_info = self.material_repository.load_for_elements(self.state.elem_list)
+        self.state.bond_compatibility, self.state.bond_pair_cutoffs = self.material_repository.bond_matrices(
+            self.state.elem_list
+        )
+
+    def _track_trajectory_bonds(self) -> None:
+        structure = self.state.structure
+        self.state.trajectory_bonds = VerletBondList(
+            structure.element_indices,
+            self.state.bond_compatibility,
+            MAX_BOND_CUTOFF,
+            self.state.bond_pair_cutoffs,
+            structure.lattice,
+            structure.pbc,
+        )
+        self._set_bond_candidates(self.state.trajectory_bonds.update(structure.positions))
+
+    def _capture_render_resolution(self) -> None:
+        # Read on the main thread so background loads can size the geometry without touching bpy
+        render = bpy.context.scene.render
+        self.state.render_resolution = int(render.resolution_y * render.resolution_percentage / 100)
+
+    def _set_bond_candidates(self, candidates) -> None:
+        (
+            self.state.bond_candidate_first,
+            self.state.bond_candidate_second,
+            self.state.bond_candidate_distances,
+            self.state.bond_candidate_shifts,
+        ) = candidates
+
+    def _build_scene(
+        self, bond_mesh: Optional[PreparedBondMesh] = None, report: Optional[PerformanceReport] = None
+    ) -> None:
+        report = report or PerformanceReport("build_scene", enabled=False)
+        self.scene_builder.use_structure(self.state.structure_key)
+        with report.stage("atoms"):
+            self.scene_builder.create_atom_spheres()
+        with report.stage("bonds"):
+            self.scene_builder.create_bonds(bond_mesh)
+        with report.stage("collections"):
+            self.scene_builder.organize_into_collections()
+        with report.stage("supercell"):
+            self.scene_builder.update_supercell()
+        with report.stage("materials"):
+            self.scene_builder.apply_materials()
+        with report.stage("light"):
+            self.scene_builder.setup_default_sun_light()
+        with report.stage("camera"):
+            self.scene_builder.setup_camera_isometric_view()
+
+        with report.stage("scene properties"):
+            self._sync_scene_properties()
+
+    def activate_structure(self, structure_key: str) -> None:
+        record = self.state.structures.get(structure_key)
+        if record is None or structure_key == self.state.structure_key:
+            return
+
+        self.flush_appearance()
+        self._stash_active()
+        self.state.activate(record)
+        self.scene_builder.use_structure(structure_key)
+        # Arrays come from the memory cache, the .blend or the file the first time a control needs them
+        self._arrays_pending = True
+        self._sync_scene_properties()
+
+    def remove_structure(self, structure_key: str) -> None:
+        record = self.state.structures.pop(structure_key, None)
+        if record is None:
+            return
+
+        active = structure_key == self.state.structure_key
+        if active:
+            self.cancel_appearance_flush()
+            record.trajectory = self.state.trajectory
+        if record.trajectory is not None:
+            record.trajectory.close()
+        self.structure_arrays.discard(structure_key)
+        with self.profiler.record("remove_structure", record.structure_name, count_datablocks=True):
+            self.scene_builder.remove_structure(structure_key)
+
+        if active:
+            self.state.reset_structure()
+            self._arrays_pending = False
+            if self.state.structures:
+                self.activate_structure(next(reversed(self.state.structures)))
+            else:
+                self._sync_scene_properties()
+
+    def clear_structures(self) -> None:
+        self.cancel_appearance_flush()
+        self.state.clear_structures()
+        self.structure_arrays.clear()
+        self.scene_builder.forget_structures()
+        self._arrays_pending = False
+
+    def save_to_blend(self) -> None:
+        self._stash_active()
+        for record in self.state.structures.values():
+            registry = self.scene_builder.registry_for(record.structure_key)
+            collection = registry.datablock(ROLE_STRUCTURE)
+            if collection is None:
+                continue
+            data_mesh = registry.datablock(ROLE_DATA)
+            if record.trajectory is not None:
+                # Trajectories are re-read from their file, so a stale snapshot must not come back on open
+                persistence.clear_metadata(collection)
+                if data_mesh is not None:
+                    bpy.data.meshes.remove(data_mesh)
+                continue
+
+            arrays = None
+            if data_mesh is None or persistence.stored_arrays_key(data_mesh) != record.structure_key:
+                arrays = self._find_arrays(record)
+            lattice, pbc = self._record_lattice(record, collection, arrays)
+            persistence.store_metadata(
+                collection,
+                {
+                    "structure_key": record.structure_key,
+                    "file_path": record.file_path,
+                    "elements": record.elem_list,
+                    "atom_info": record.atom_info,
+                    "current_atoms_info": record.current_atoms_info,
+                    "bond_info": record.bond_info,
+                    "bond_thickness": record.bond_thickness,
+                    "bond_cutoff_distance": record.bond_cutoff_distance,
+                    "supercell": list(record.supercell),
+                    "level_of_detail": list(record.level_of_detail),
+                    "lattice": lattice.tolist() if lattice is not None else None,
+                    "pbc": pbc.tolist() if pbc is not None else None,
+                    "active": record.structure_key == self.state.structure_key,
+                },
+            )
+            # Arrays are only written once per structure; later saves just refresh the settings
+            if arrays is not None:
+                if data_mesh is None:
+                    data_mesh = persistence.new_data_mesh()
+                    registry.set_datablock(ROLE_DATA, "", data_mesh)
+                with self.profiler.record("save_to_blend", record.structure_name, count_datablocks=True):
+                    persistence.store_arrays(data_mesh, *arrays, record.structure_key)
+
+    def restore_from_blend(self) -> bool:
+        self.cancel_background_load()
+        self.clear_structures()
+        self.scene_builder.forget_material_inputs()
+        self._read_cache_settings(bpy.context.scene)
+        self._read_performance_settings(bpy.context.scene)
+
+        # Element tables and settings come back now; atom and bond arrays wait until something needs them
+        active = None
+        for collection, metadata in persistence.stored_structures():
+            elements = list(metadata["elements"])
+            compatibility, pair_cutoffs = self.material_repository.bond_matrices(elements)
+            record = StructureRecord(
+                structure_key=metadata["structure_key"],
+                structure_name=collection.name,
+                file_path=metadata["file_path"],
+                elem_list=elements,
+                current_atoms_info=metadata["current_atoms_info"],
+                atom_info=metadata["atom_info"],
+                bond_info=metadata["bond_info"],
+                bond_compatibility=compatibility,
+                bond_pair_cutoffs=pair_cutoffs,
+                bond_thickness=metadata["bond_thickness"],
+                bond_cutoff_distance=metadata["bond_cutoff_distance"],
+                level_of_detail=LevelOfDetail(*metadata["level_of_detail"]),
+                supercell=tuple(metadata["supercell"]),
+            )
+            self.state.structures[record.structure_key] = record
+            self.scene_builder.registry_for(record.structure_key).rebuild_from_data()
+            if active is None or metadata["active"]:
+                active = record
+        if active is None:
+            return False
+
+        self._read_scene_settings(bpy.context.scene)
+        self.state.activate(active)
+        self.scene_builder.use_structure(active.structure_key)
+        self._arrays_pending = True
+        self._sync_scene_properties()
+        # Timers do not survive opening a file
+        if self.state.watch_file:
+            self._schedule_file_watch()
+        return True
+
+    def _ensure_hydrated(self) -> None:
+        if not self._arrays_pending:
+            return
+        self._arrays_pending = False
+        record = self.state.structures.get(self.state.structure_key)
+        if record is None:
+            return
+
+        with self.profiler.record("hydrate_structure", record.structure_name):
+            arrays = self._find_arrays(record)
+            if arrays is None:
+                return
+            self.state.structure, candidates = arrays
+            self._set_bond_candidates(candidates)
+            self.scene_builder.select_visible_bonds()
+            self.structure_arrays.put(record.structure_key, *arrays)
+
+    def _find_arrays(self, record: StructureRecord) -> Optional[Tuple[AtomArrays, BondCandidateArrays]]:
+        arrays = self.structure_arrays.get(record.structure_key)
+        if arrays is not None:
+            return arrays
+
+        if record.trajectory is not None and record.trajectory_bonds is not None:
+            structure = record.trajectory.structure
+            return structure, record.trajectory_bonds.update(structure.positions)
+
+        registry = self.scene_builder.registry_for(record.structure_key)
+        data_mesh = registry.datablock(ROLE_DATA)
+        collection = registry.datablock(ROLE_STRUCTURE)
+        metadata = persistence.stored_metadata(collection) if collection is not None else None
+        if data_mesh is not None and metadata is not None:
+            arrays = persistence.load_arrays(
+                data_mesh,
+                record.structure_key,
+                record.elem_list,
+                _optional_array(metadata["lattice"], np.float64),
+                _optional_array(metadata["pbc"], bool),
+            )
+            if arrays is not None:
+                return arrays
+
+        if record.file_path and os.path.exists(record.file_path):
+            return self.read_structure_arrays(record.file_path)
+        return None
+
+    def _record_lattice(self, record: StructureRecord, collection, arrays):
+        if arrays is None:
+            arrays = self.structure_arrays.get(record.structure_key)
+        if arrays is not None:
+            return arrays[0].lattice, arrays[0].pbc
+        # Neither in memory nor re-read, so the last saved value still holds
+        metadata = persistence.stored_metadata(collection)
+        if metadata is None:
+            return None, None
+        return _optional_array(metadata["lattice"], np.float64), _optional_array(metadata["pbc"], bool)
+
+    def _abandon_load(self, previous_key: str) -> None:
+        # Drop whatever the failed load created and show the structure that was active before it
+        self.scene_builder.remove_structure(self.state.structure_key)
+        self.state.reset_structure()
+        record = self.state.structures.get(previous_key)
+        if record is not None:
+            self.state.activate(record)
+            self.scene_builder.use_structure(previous_key)
+            self._arrays_pending = True
+        self._sync_scene_properties()
+
+    def _stash_active(self) -> None:
+        if self.state.structure_key in self.state.structures:
+            self.state.record_active()
+
+    def _register_active(self) -> None:
+        self._arrays_pending = False
+        self.state.record_active()
+        self.structure_arrays.put(self.state.structure_key, self.state.structure, self._bond_candidate_arrays())
+        self._file_stamps[self.state.structure_key] = _file_stamp(self.state.file_path)
+
+    def _sync_scene_properties(self) -> None:
+        # Sliders show the active structure; writing them must not run their update callbacks against it
+        self._syncing_scene = True
+        try:
+            for scene in bpy.data.scenes:
+                self.scene_builder.initialize_radius_collection(scene)
+            scene = bpy.context.scene
+            if hasattr(scene, "bond_thickness_scene"):
+                scene.bond_thickness_scene = self.state.bond_thickness
+            if hasattr(scene, "bond_cutoff_distance_scene"):
+                scene.bond_cutoff_distance_scene = self.state.bond_cutoff_distance
+            if hasattr(scene, "supercell_scene"):
+                scene.supercell_scene = self.state.supercell
+            # The materials were just built with these, so they must not be flushed again
+            if hasattr(scene, "atom_metallic_scene"):
+                scene.atom_metallic_scene = self.state.atom_metallic
+            if hasattr(scene, "atom_translucency_scene"):
+                scene.atom_translucency_scene = self.state.atom_translucency
+            if hasattr(scene, "atom_glossiness_scene"):
+                scene.atom_glossiness_scene = self.state.atom_glossiness
+            if hasattr(scene, "material_style_scene"):
+                scene.material_style_scene = self.state.material_style
+            if hasattr(scene, "atom_display_mode_scene"):
+                scene.atom_display_mode_scene = self.state.atom_display_mode
+        finally:
+            self._syncing_scene = False
+
+    def _read_scene_settings(self, scene) -> None:
+        # Settings shared by every structure are saved with the scene
+        for attribute, prop in (
+            ("atom_metallic", "atom_metallic_scene"),
+            ("atom_translucency", "atom_translucency_scene"),
+            ("atom_glossiness", "atom_glossiness_scene"),
+            ("material_style", "material_style_scene"),
+            ("atom_display_mode", "atom_display_mode_scene"),
+            ("atom_lod", "atom_lod_scene"),
+            ("viewport_proxy", "viewport_proxy_scene"),
+            ("watch_file", "watch_file_scene"),
+        ):
+            if hasattr(scene, prop):
+                setattr(self.state, attribute, getattr(scene, prop))
+
+    def _bond_candidate_arrays(self) -> BondCandidateArrays:
+        return (
+            self.state.bond_candidate_first,
+            self.state.bond_candidate_second,
+            self.state.bond_candidate_distances,
+            self.state.bond_candidate_shifts,
+        )
 
     def update_atomic_radius(self, prop, context) -> None:
+        if self._syncing_scene:
+            return
         scene = context.scene
         index = None
         for i, radius_prop in enumerate(scene.atomic_radius):
@@ -54,40 +549,192 @@ class AtomsVisualizerController:
             return
 
         element = self.state.elem_list[index]
-        for obj in bpy.data.objects:
-            if obj.type == "MESH" and obj.name.startswith(f"{element}_"):
-                obj.scale = (prop.value, prop.value, prop.value)
-                self.state.current_atoms_info[element]["radius"] = prop.value
+        with self.profiler.record("update_atomic_radius", element):
+            self.scene_builder.set_element_radius(element, prop.value)
+        if element in self.state.current_atoms_info:
+            self.state.current_atoms_info[element]["radius"] = prop.value
 
     def update_bond_thickness(self, context) -> None:
-        scene = context.scene
-        self.state.bond_thickness = scene.bond_thickness_scene
-
-        for obj in bpy.data.objects:
-            if obj.type == "MESH" and obj.name.startswith("bond"):
-                obj.scale.x = self.state.bond_thickness / 2
-                obj.scale.y = self.state.bond_thickness / 2
-                obj.scale.z = 1
+        if self._syncing_scene:
+            return
+        self._ensure_hydrated()
+        self.state.bond_thickness = context.scene.bond_thickness_scene
+        with self.profiler.record("update_bond_thickness"):
+            self.scene_builder.update_bond_thickness()
 
     def update_bond_cutoff_distance(self, context) -> None:
-        bpy.ops.object.select_all(action="DESELECT")
-        for obj in bpy.data.objects:
-            if obj.type == "MESH" and obj.name.startswith("bond"):
-                obj.select_set(True)
-        bpy.ops.object.delete()
-
+        if self._syncing_scene:
+            return
+        self._ensure_hydrated()
         self.state.bond_cutoff_distance = context.scene.bond_cutoff_distance_scene
-        self.scene_builder.create_bonds()
+        with self.profiler.record("update_bond_cutoff"):
+            self.scene_builder.update_bond_cutoff()
 
     def update_atom_appearance(self, context) -> None:
+        if self._syncing_scene:
+            return
         scene = context.scene
         self.state.atom_metallic = scene.atom_metallic_scene
         self.state.atom_translucency = scene.atom_translucency_scene
         self.state.atom_glossiness = scene.atom_glossiness_scene
         self.state.material_style = scene.material_style_scene
-        self.scene_builder.apply_materials()
+        self._style_dirty = True
+        self._schedule_appearance_flush()
+
+    def update_atom_display_mode(self, context) -> None:
+        if self._syncing_scene:
+            return
+        self.state.atom_display_mode = context.scene.atom_display_mode_scene
+
+    def update_level_of_detail(self, context) -> None:
+        scene = context.scene
+        self.state.atom_lod = scene.atom_lod_scene
+        self.state.viewport_proxy = scene.viewport_proxy_scene
+        self._ensure_hydrated()
+        if len(self.state.structure) == 0:
+            return
+
+        self._capture_render_resolution()
+        self.state.level_of_detail = self.scene_builder.level_of_detail(self.state.structure, self.state.atom_info)
+        with self.profiler.record("update_level_of_detail"):
+            self.scene_builder.apply_level_of_detail()
+
+    def add_point_region(self) -> None:
+        with self.profiler.record("add_point_region", count_datablocks=True):
+            self.scene_builder.add_point_region()
+
+    def clear_point_region(self) -> None:
+        self.scene_builder.clear_point_region()
+
+    def update_supercell(self, context) -> None:
+        if self._syncing_scene:
+            return
+        self.state.supercell = tuple(context.scene.supercell_scene)
+        self._ensure_hydrated()
+        if len(self.state.structure) == 0:
+            return
+        label = "x".join(str(count) for count in self.state.supercell)
+        with self.profiler.record("update_supercell", label, count_datablocks=True):
+            self.scene_builder.update_supercell()
+
+    def can_reload(self) -> bool:
+        return bool(self.state.file_path) and self.state.trajectory is None and self.state.load_job is None
+
+    def reload_structure(self) -> None:
+        """Re-read the active structure's file and apply only what differs from the scene.
+
+        Positions of matched atoms are written in bulk, atoms that appeared or went away are added or
+        removed per element, and bonds are rewritten in place. Materials, collections, camera, light and
+        slider edits are left alone.
+        """
+        if not self.can_reload():
+            return
+        self._ensure_hydrated()
+        self.flush_appearance()
+        file_path = self.state.file_path
+        stamp = _file_stamp(file_path)
+        with self.profiler.record("reload_structure", self.state.structure_name, count_datablocks=True) as report:
+            structure, candidates = self.read_structure_arrays(file_path, report=report)
+            self._file_stamps[self.state.structure_key] = stamp
+            previous = self.state.structure
+            elements_changed = list(structure.elements) != self.state.elem_list
+
+            with report.stage("element data"):
+                atom_info, bond_info = self.material_repository.load_for_elements(list(structure.elements))
+                # Elements already on screen keep their edited radius and color
+                for element in structure.elements:
+                    if element in self.state.atom_info:
+                        atom_info[element] = self.state.atom_info[element]
+                self.state.atom_info = atom_info
+                self.state.bond_info = bond_info
+                self.state.current_atoms_info = {
+                    element: info
+                    for element, info in self.state.current_atoms_info.items()
+                    if element in structure.elements
+                }
+                self.state.elem_list = list(structure.elements)
+                self.state.bond_compatibility, self.state.bond_pair_cutoffs = self.material_repository.bond_matrices(
+                    self.state.elem_list
+                )
+
+            self.state.structure = structure
+            self._set_bond_candidates(candidates)
+            with report.stage("atoms"):
+                self.scene_builder.update_changed_atoms(previous)
+            with report.stage("bonds"):
+                # The cutoff path picks the visible prefix and writes the bond mesh in place
+                self.scene_builder.update_bond_cutoff()
+            if not _same_lattice(previous.lattice, structure.lattice):
+                with report.stage("supercell"):
+                    self.scene_builder.update_supercell()
+
+        self.structure_arrays.put(self.state.structure_key, structure, candidates)
+        data_mesh = self.scene_builder.registry.datablock(ROLE_DATA)
+        if data_mesh is not None:
+            # The saved arrays describe the file as it was; the next save writes the reloaded ones
+            persistence.forget_arrays(data_mesh)
+        self.state.record_active()
+        if elements_changed:
+            self._sync_scene_properties()
+
+    def update_watch_file(self, context) -> None:
+        self.state.watch_file = context.scene.watch_file_scene
+        if self.state.watch_file:
+            self._schedule_file_watch()
+        else:
+            self.cancel_file_watch()
+
+    def cancel_file_watch(self) -> None:
+        if bpy.app.timers.is_registered(self._watch_timer):
+            bpy.app.timers.unregister(self._watch_timer)
+        self._pending_stamp = None
+
+    def _schedule_file_watch(self) -> None:
+        if not bpy.app.timers.is_registered(self._watch_timer):
+            bpy.app.timers.register(self._watch_timer, first_interval=WATCH_POLL_INTERVAL)
+
+    def _poll_watched_file(self) -> Optional[float]:
+        if not self.state.watch_file:
+            return None
+        if not self.can_reload():
+            return WATCH_POLL_INTERVAL
+
+        # Only a stat per poll; the file is read once its mtime and size hold still for one interval,
+        # so a simulation caught mid-write is not parsed half-written
+        stamp = _file_stamp(self.state.file_path)
+        loaded = self._file_stamps.setdefault(self.state.structure_key, stamp)
+        if stamp == loaded or stamp is None:
+            self._pending_stamp = None
+        elif stamp != self._pending_stamp:
+            self._pending_stamp = stamp
+        else:
+            self._pending_stamp = None
+            try:
+                self.reload_structure()
+                self.state.watch_error = ""
+            except (OSError, ValueError) as exc:
+                # Wait for the next change rather than re-reading a broken file every poll
+                self._file_stamps[self.state.structure_key] = stamp
+                self.state.watch_error = str(exc)
+        return WATCH_POLL_INTERVAL
+
+    def update_cache_settings(self, context) -> None:
+        self._read_cache_settings(context.scene)
+
+    def _read_cache_settings(self, scene) -> None:
+        # Also run when a file is opened, whose panel may show a cache setup other than the defaults
+        if not hasattr(scene, "structure_cache_enabled_scene"):
+            return
+        self.state.cache_enabled = scene.structure_cache_enabled_scene
+        self.state.cache_dir = bpy.path.abspath(scene.structure_cache_dir_scene)
+        self.state.cache_max_megabytes = scene.structure_cache_size_scene
+        self.state.memory_cache_megabytes = scene.structure_memory_size_scene
+        self.structure_arrays.max_bytes = self.state.memory_cache_megabytes * 1024 * 1024
+        self.structure_arrays.evict()
 
     def update_atom_color(self, prop, context) -> None:
+        if self._syncing_scene:
+            return
         scene = context.scene
         index = None
         for i, color_prop in enumerate(scene.atomic_color):
@@ -102,7 +749,87 @@ class AtomsVisualizerController:
         r, g, b, a = prop.value
         self.state.atom_info[element]["color"] = (r, g, b, a)
         self.state.current_atoms_info[element]["color"] = (r, g, b, a)
-        self.scene_builder.apply_collection_color(element, (r, g, b, a))
+        self._dirty_colors.add(element)
+        self._schedule_appearance_flush()
+
+    def flush_appearance(self) -> None:
+        if bpy.app.timers.is_registered(self._appearance_timer):
+            bpy.app.timers.unregister(self._appearance_timer)
+            self._flush_appearance()
+
+    def cancel_appearance_flush(self) -> None:
+        if bpy.app.timers.is_registered(self._appearance_timer):
+            bpy.app.timers.unregister(self._appearance_timer)
+        self._style_dirty = False
+        self._dirty_colors = set()
+
+    def _schedule_appearance_flush(self) -> None:
+        if not bpy.app.timers.is_registered(self._appearance_timer):
+            bpy.app.timers.register(self._appearance_timer, first_interval=APPEARANCE_FLUSH_INTERVAL)
+
+    def _flush_appearance(self) -> Optional[float]:
+        style_dirty, dirty_colors = self._style_dirty, self._dirty_colors
+        self._style_dirty = False
+        self._dirty_colors = set()
+
+        label = ", ".join(sorted(dirty_colors))
+        with self.profiler.record("update_atom_appearance", label):
+            if style_dirty:
+                self.scene_builder.update_material_style()
+            for element in dirty_colors:
+                # A structure loaded since the edit has already written its own colors
+                if element in self.state.atom_info:
+                    self.scene_builder.apply_collection_color(element, self.state.atom_info[element]["color"])
+        return None
+
+    def update_performance_settings(self, context) -> None:
+        self._read_performance_settings(context.scene)
+
+    def _read_performance_settings(self, scene) -> None:
+        if not hasattr(scene, "record_performance_scene"):
+            return
+        self.state.record_performance = scene.record_performance_scene
+        self.state.capture_profile = scene.capture_profile_scene
+        self.state.track_memory = scene.track_memory_scene
+        self.profiler.enabled = self.state.record_performance
+        self.profiler.capture_profile = self.state.capture_profile
+        self.profiler.track_memory = self.state.track_memory
+
+
+def _datablock_counts():
+    return {
+        "objects": len(bpy.data.objects),
+        "meshes": len(bpy.data.meshes),
+        "materials": len(bpy.data.materials),
+        "collections": len(bpy.data.collections),
+    }
+
+
+def _structure_name(file_path: str) -> str:
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+
+def _file_stamp(file_path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _same_lattice(first: Optional[np.ndarray], second: Optional[np.ndarray]) -> bool:
+    if first is None or second is None:
+        return first is None and second is None
+    return np.array_equal(first, second)
+
+
+def _optional_array(values, dtype) -> Optional[np.ndarray]:
+    return np.asarray(values, dtype=dtype) if values is not None else None
+
+
+def _set_progress(progress: Optional[BackgroundLoad], stage: str, fraction: float) -> None:
+    if progress is not None:
+        progress.report(stage, fraction)
 
 
 _controller = AtomsVisualizerController()
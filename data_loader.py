@@ -1,8 +1,34 @@
+import itertools
 import json
 import os
-from typing import Dict, List, Tuple
+import re
+from typing import Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple
 
-AtomRecord = Tuple[str, float, float, float]
+import numpy as np
+
+from .neighbor_search import bond_compatibility_matrix
+from .structure import AtomArrays
+
+
+PropertySpec = Tuple[str, str, int]
+
+DEFAULT_PROPERTIES: List[PropertySpec] = [("species", "S", 1), ("pos", "R", 3)]
+
+# Field types for np.loadtxt; strings, logicals and unnamed trailing columns are read as fixed-width text
+_LOADTXT_TYPES = {"R": np.float64, "I": np.int64}
+_STRING_WIDTH = 16
+
+_HEADER_PAIR = re.compile(r'([A-Za-z_][\w-]*)\s*=\s*("[^"]*"|\{[^}]*\}|\S+)')
+
+
+class TrajectoryFrame(NamedTuple):
+    index: int
+    elements: np.ndarray
+    positions: np.ndarray
+    comment: str
+    columns: Dict[str, np.ndarray]
+    lattice: Optional[np.ndarray]
+    pbc: Optional[np.ndarray]
 
 
 def normalize_rgba(color_value):
@@ -15,51 +41,281 @@ def normalize_rgba(color_value):
 
 class StructureLoader:
     @staticmethod
-    def read_xyz(file_path: str) -> List[AtomRecord]:
-        with open(file_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
+    def read_xyz(file_path: str) -> AtomArrays:
+        frame = next(XYZTrajectoryReader(file_path).frames(stop=1), None)
+        if frame is None:
+            raise ValueError(f"No atoms found in {file_path}")
+
+        return AtomArrays.from_arrays(frame.elements, frame.positions, frame.columns, frame.lattice, frame.pbc)
+
+
+class XYZTrajectoryReader:
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def count_frames(self) -> int:
+        count = 0
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            num_atoms = self._read_frame_size(f)
+            while num_atoms is not None:
+                self._skip_lines(f, num_atoms + 1)
+                count += 1
+                num_atoms = self._read_frame_size(f)
+        return count
+
+    def frames(self, start: int = 0, stop: Optional[int] = None, step: int = 1) -> Iterator[TrajectoryFrame]:
+        if start < 0 or step < 1 or (stop is not None and stop < 0):
+            raise ValueError("Frame selection needs start >= 0, stop >= 0 and step >= 1")
+
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            index = 0
+            while stop is None or index < stop:
+                num_atoms = self._read_frame_size(f)
+                if num_atoms is None:
+                    return
+
+                if index < start or (index - start) % step != 0:
+                    self._skip_lines(f, num_atoms + 1)
+                else:
+                    comment = f.readline().rstrip("\n")
+                    lines = list(itertools.islice(f, num_atoms))
+                    if len(lines) < num_atoms:
+                        raise ValueError(f"Frame {index} in {self.file_path} is truncated")
+                    yield parse_frame(index, comment, lines)
+                index += 1
+
+    def _read_frame_size(self, f: TextIO) -> Optional[int]:
+        for line in f:
+            if line.strip():
+                return int(line)
+        return None
+
+    def _skip_lines(self, f: TextIO, count: int) -> None:
+        for _ in itertools.islice(f, count):
+            pass
+
+
+def parse_frame(index: int, comment: str, lines: List[str]) -> TrajectoryFrame:
+    properties, lattice, pbc = parse_comment_line(comment)
+    elements, positions, columns = parse_atom_lines(lines, properties)
+    return TrajectoryFrame(index, elements, positions, comment, columns, lattice, pbc)
+
+
+def parse_comment_line(
+    comment: str,
+) -> Tuple[Optional[List[PropertySpec]], Optional[np.ndarray], Optional[np.ndarray]]:
+    values = {key.lower(): value.strip('"{}') for key, value in _HEADER_PAIR.findall(comment)}
+
+    properties = None
+    if "properties" in values:
+        fields = values["properties"].split(":")
+        if len(fields) % 3 != 0:
+            raise ValueError(f"Malformed Properties header: {values['properties']}")
+        properties = [
+            (fields[i], fields[i + 1].upper(), int(fields[i + 2])) for i in range(0, len(fields), 3)
+        ]
+
+    lattice = None
+    if "lattice" in values:
+        lattice = np.array(values["lattice"].replace(",", " ").split(), dtype=np.float64)
+        if lattice.size != 9:
+            raise ValueError(f"Lattice header needs 9 values, got {lattice.size}")
+        lattice = lattice.reshape(3, 3)
+
+    pbc = None
+    if "pbc" in values:
+        pbc = np.array([flag.upper() in ("T", "TRUE", "1") for flag in values["pbc"].split()], dtype=bool)
+    elif lattice is not None:
+        pbc = np.ones(3, dtype=bool)
+
+    return properties, lattice, pbc
+
+
+def parse_atom_lines(
+    lines: List[str],
+    properties: Optional[List[PropertySpec]] = None,
+) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+    explicit = properties is not None
+    properties = properties or DEFAULT_PROPERTIES
+    width = sum(count for _, _, count in properties)
+    row_width = len(lines[0].split()) if lines else width
+
+    table = _load_table(lines, properties, width, row_width, f"U{_STRING_WIDTH}")
+    if _has_full_strings(table):
+        # A string that fills its field may have been cut short; read again with unbounded strings
+        table = _load_table(lines, properties, width, row_width, object)
+    return _parse_table(table, properties, explicit)
+
+
+def _load_table(
+    lines: List[str], properties: List[PropertySpec], width: int, row_width: int, string_type
+) -> np.ndarray:
+    if not lines:
+        return np.zeros(0, dtype=_table_dtype(properties, width, string_type))
+    try:
+        # A dtype as wide as the first row makes loadtxt reject any line with a different field count
+        table = _loadtxt(lines, _table_dtype(properties, row_width, string_type))
+    except ValueError:
+        # Ragged block: every line needs the declared columns, and anything after them is ignored
+        for line in lines:
+            _check_fields(line, width)
+        table = _loadtxt(lines, _table_dtype(properties, width, string_type), width)
+    if len(table) != len(lines):
+        raise ValueError(f"Expected {len(lines)} atom lines, found {len(table)}")
+    return table
+
+
+def _table_dtype(properties: List[PropertySpec], row_width: int, string_type) -> np.dtype:
+    kinds = [kind for _, kind, count in properties for _ in range(count)]
+    kinds += ["X"] * max(row_width - len(kinds), 0)
+    return np.dtype([(f"f{i}", _LOADTXT_TYPES.get(kind, string_type)) for i, kind in enumerate(kinds)])
+
 
-        num_atoms = int(lines[0])
-        atoms: List[AtomRecord] = []
-        for i in range(num_atoms):
-            line_index = i + 2
-            atom_data = lines[line_index].split()
-            element = atom_data[0]
-            x, y, z = float(atom_data[1]), float(atom_data[2]), float(atom_data[3])
-            atoms.append((element, x, y, z))
+def _loadtxt(lines: List[str], dtype: np.dtype, usecols: Optional[int] = None) -> np.ndarray:
+    return np.loadtxt(
+        lines,
+        dtype=dtype,
+        comments=None,
+        usecols=None if usecols is None else range(usecols),
+        ndmin=1,
+    )
 
-        return atoms
+
+def _has_full_strings(table: np.ndarray) -> bool:
+    return len(table) > 0 and any(
+        table.dtype[name].kind == "U" and int(np.char.str_len(table[name]).max()) >= _STRING_WIDTH
+        for name in table.dtype.names
+    )
+
+
+def _check_fields(line: str, width: int) -> None:
+    if len(line.split()) < width:
+        raise ValueError(f"Expected {width} columns in atom line: {line.strip()}")
+
+
+def _parse_table(
+    table: np.ndarray, properties: List[PropertySpec], explicit: bool
+) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+    row_width = len(table.dtype.names)
+    columns: Dict[str, np.ndarray] = {}
+    elements = np.zeros(0, dtype=str)
+    positions = np.zeros((0, 3), dtype=np.float64)
+    offset = 0
+    for name, kind, count in properties:
+        values = [_convert_column(table[f"f{offset + i}"], kind) for i in range(count)]
+        # Copied either way, so no column keeps the whole loaded table alive
+        column = np.array(values[0]) if count == 1 else np.stack(values, axis=1)
+        offset += count
+
+        if name.lower() == "species":
+            elements = column
+        elif name.lower() == "pos":
+            positions = column.astype(np.float64, copy=False).reshape(-1, 3)
+        else:
+            columns[name] = column
+
+    if not explicit and row_width > offset:
+        try:
+            extra = [table[f"f{i}"].astype(np.float64) for i in range(offset, row_width)]
+            columns["extra"] = np.stack(extra, axis=1)
+        except ValueError:
+            pass
+
+    return elements, positions, columns
+
+
+def _convert_column(values: np.ndarray, kind: str) -> np.ndarray:
+    if kind in ("R", "I"):
+        return values
+    if kind == "L":
+        return np.isin(np.char.upper(values.astype(str)), ("T", "TRUE", "1"))
+    return values.astype(str, copy=False)
+
+
+class ElementDatabase:
+    def __init__(self, data: Dict[str, object], version: int):
+        self.version = version
+        self.atom_info: Dict[str, Dict[str, object]] = {}
+        self.bond_info: Dict[str, List[str]] = {}
+        bond_cutoffs: Dict[str, Dict[str, float]] = {}
+        if isinstance(data, dict):
+            atom_info = data.get("atom_info", {})
+            bond_info = data.get("bond_info", {})
+            cutoffs = data.get("bond_cutoffs", {})
+            if isinstance(atom_info, dict):
+                self.atom_info = atom_info
+            if isinstance(bond_info, dict):
+                self.bond_info = {
+                    elem: partners if isinstance(partners, list) else []
+                    for elem, partners in bond_info.items()
+                }
+            if isinstance(cutoffs, dict):
+                bond_cutoffs = cutoffs
+
+        self.elements = list(dict.fromkeys(list(self.atom_info) + list(self.bond_info)))
+        self.element_index = {elem: i for i, elem in enumerate(self.elements)}
+
+        # One extra trailing row/column stands in for elements missing from the table
+        size = len(self.elements) + 1
+        self.compatibility = np.zeros((size, size), dtype=bool)
+        self.compatibility[:-1, :-1] = bond_compatibility_matrix(self.elements, self.bond_info)
+        self.pair_cutoffs = np.full((size, size), np.inf, dtype=np.float64)
+        for elem, partners in bond_cutoffs.items():
+            if elem not in self.element_index or not isinstance(partners, dict):
+                continue
+            for partner, distance in partners.items():
+                if partner in self.element_index:
+                    i, j = self.element_index[elem], self.element_index[partner]
+                    self.pair_cutoffs[i, j] = self.pair_cutoffs[j, i] = float(distance)
+
+    def table_indices(self, elements: List[str]) -> np.ndarray:
+        missing = len(self.elements)
+        return np.array([self.element_index.get(elem, missing) for elem in elements], dtype=np.int64)
+
+
+_DATABASE_CACHE: Dict[str, ElementDatabase] = {}
 
 
 class MaterialRepository:
     def __init__(self, base_dir: str):
         self.json_path = os.path.join(base_dir, "materials_info.json")
 
-    def load_for_elements(self, elements: List[str]) -> Tuple[Dict[str, Dict[str, object]], Dict[str, List[str]]]:
+    def database(self) -> ElementDatabase:
+        try:
+            version = os.stat(self.json_path).st_mtime_ns
+        except OSError:
+            version = -1
+
+        cached = _DATABASE_CACHE.get(self.json_path)
+        if cached is not None and cached.version == version:
+            return cached
+
         data = {}
-        if os.path.exists(self.json_path):
+        if version != -1:
             with open(self.json_path, "r", encoding="utf-8") as f:
                 data = json.load(f)
 
-        all_atom_info = {}
-        all_bond_info = {}
-        if isinstance(data, dict):
-            atom_info = data.get("atom_info", {})
-            bond_info = data.get("bond_info", {})
-            if isinstance(atom_info, dict):
-                all_atom_info = atom_info
-            if isinstance(bond_info, dict):
-                all_bond_info = bond_info
+        database = ElementDatabase(data, version)
+        _DATABASE_CACHE[self.json_path] = database
+        return database
+
+    def load_for_elements(self, elements: List[str]) -> Tuple[Dict[str, Dict[str, object]], Dict[str, List[str]]]:
+        database = self.database()
 
         atom_info_for_scene: Dict[str, Dict[str, object]] = {}
         bond_info_for_scene: Dict[str, List[str]] = {}
 
         for elem in elements:
-            info = dict(all_atom_info.get(elem, {"radius": 1.0, "color": (0.8, 0.8, 0.8, 1.0)}))
+            info = dict(database.atom_info.get(elem, {"radius": 1.0, "color": (0.8, 0.8, 0.8, 1.0)}))
             info["radius"] = float(info.get("radius", 1.0))
             info["color"] = normalize_rgba(info.get("color", (0.8, 0.8, 0.8, 1.0)))
             atom_info_for_scene[elem] = info
-            partners = all_bond_info.get(elem, [])
-            bond_info_for_scene[elem] = partners if isinstance(partners, list) else []
+            bond_info_for_scene[elem] = list(database.bond_info.get(elem, []))
 
         return atom_info_for_scene, bond_info_for_scene
+
+    def bond_matrices(self, elements: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        database = self.database()
+        indices = database.table_indices(elements)
+        selection = np.ix_(indices, indices)
+        return database.compatibility[selection], database.pair_cutoffs[selection]
@@ -0,0 +1,108 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def cylinder_vertices(starts: np.ndarray, ends: np.ndarray, radius: float, segments: int) -> np.ndarray:
+    starts = np.asarray(starts, dtype=np.float64).reshape(-1, 3)
+    ends = np.asarray(ends, dtype=np.float64).reshape(-1, 3)
+
+    axis = ends - starts
+    length = np.linalg.norm(axis, axis=1, keepdims=True)
+    direction = np.divide(axis, length, out=np.tile([0.0, 0.0, 1.0], (len(axis), 1)), where=length > 1e-9)
+
+    # Pick a reference axis that is never close to parallel with the bond direction
+    reference = np.tile([0.0, 0.0, 1.0], (len(axis), 1))
+    reference[np.abs(direction[:, 2]) > 0.9] = (1.0, 0.0, 0.0)
+    u = np.cross(direction, reference)
+    u /= np.linalg.norm(u, axis=1, keepdims=True)
+    v = np.cross(direction, u)
+
+    angles = np.linspace(0.0, 2.0 * np.pi, segments, endpoint=False)
+    ring = radius * (
+        np.cos(angles)[None, :, None] * u[:, None, :]
+        + np.sin(angles)[None, :, None] * v[:, None, :]
+    )
+
+    vertices = np.empty((len(axis), 2, segments, 3), dtype=np.float64)
+    vertices[:, 0] = starts[:, None, :] + ring
+    vertices[:, 1] = ends[:, None, :] + ring
+    return vertices.reshape(-1, 3)
+
+
+def cylinder_topology(count: int, segments: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    ring = np.arange(segments)
+    following = (ring + 1) % segments
+
+    side = np.stack([ring, following, segments + following, segments + ring], axis=1).ravel()
+    bottom_cap = ring[::-1]
+    top_cap = segments + ring
+    per_cylinder = np.concatenate([side, bottom_cap, top_cap])
+
+    base = np.arange(count, dtype=np.int64)[:, None] * (2 * segments)
+    loop_vertices = (per_cylinder[None, :] + base).ravel()
+
+    per_cylinder_totals = np.concatenate([np.full(segments, 4), [segments, segments]])
+    loop_totals = np.tile(per_cylinder_totals, count)
+    loop_starts = np.concatenate([[0], np.cumsum(loop_totals)[:-1]]) if count else np.zeros(0, dtype=np.int64)
+    return loop_vertices, loop_starts, loop_totals
+
+
+def bond_vertices(
+    positions: np.ndarray,
+    bond_first: np.ndarray,
+    bond_second: np.ndarray,
+    hidden_first: np.ndarray,
+    radius: float,
+    segments: int,
+    end_offsets: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    visible = len(bond_first)
+    ends = positions[bond_second]
+    if end_offsets is not None:
+        # Bonds through a periodic boundary run out to the partner's image in the next cell
+        ends = ends + end_offsets
+    vertices = np.empty(((visible + len(hidden_first)) * 2 * segments, 3), dtype=np.float32)
+    vertices[:visible * 2 * segments] = cylinder_vertices(positions[bond_first], ends, radius, segments)
+    # Bonds above the cutoff stay in the mesh collapsed onto their first atom
+    vertices[visible * 2 * segments:] = np.repeat(positions[hidden_first], 2 * segments, axis=0)
+    return vertices
+
+
+def icosphere(subdivisions: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Numbered like Blender's Ico Sphere: 1 subdivision is the plain icosahedron
+    golden = (1.0 + 5.0 ** 0.5) / 2.0
+    vertices = np.array(
+        [
+            (-1, golden, 0), (1, golden, 0), (-1, -golden, 0), (1, -golden, 0),
+            (0, -1, golden), (0, 1, golden), (0, -1, -golden), (0, 1, -golden),
+            (golden, 0, -1), (golden, 0, 1), (-golden, 0, -1), (-golden, 0, 1),
+        ],
+        dtype=np.float64,
+    )
+    faces = np.array(
+        [
+            (0, 11, 5), (0, 5, 1), (0, 1, 7), (0, 7, 10), (0, 10, 11),
+            (1, 5, 9), (5, 11, 4), (11, 10, 2), (10, 7, 6), (7, 1, 8),
+            (3, 9, 4), (3, 4, 2), (3, 2, 6), (3, 6, 8), (3, 8, 9),
+            (4, 9, 5), (2, 4, 11), (6, 2, 10), (8, 6, 7), (9, 8, 1),
+        ],
+        dtype=np.int64,
+    )
+    vertices /= np.linalg.norm(vertices, axis=1, keepdims=True)
+
+    for _ in range(max(subdivisions, 1) - 1):
+        # One new vertex per unique edge, shared by the two faces on either side of it
+        edges = np.sort(faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+        unique_edges, inverse = np.unique(edges, axis=0, return_inverse=True)
+        midpoints = vertices[unique_edges[:, 0]] + vertices[unique_edges[:, 1]]
+        midpoints /= np.linalg.norm(midpoints, axis=1, keepdims=True)
+
+        ab, bc, ca = (len(vertices) + inverse.reshape(-1, 3)).T
+        a, b, c = faces.T
+        vertices = np.concatenate([vertices, midpoints])
+        faces = np.concatenate(
+            [np.stack(corners, axis=1) for corners in ((a, ab, ca), (ab, b, bc), (ca, bc, c), (ab, bc, ca))]
+        )
+
+    return vertices.astype(np.float32), faces
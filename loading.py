@@ -0,0 +1,59 @@
+import threading
+from typing import Callable, Optional
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+class BackgroundLoad:
+    def __init__(self, file_path: str, work: Callable[[str, "BackgroundLoad"], object]):
+        self.file_path = file_path
+        self.stage = "Queued"
+        self.fraction = 0.0
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self._work = work
+        self._cancelled = threading.Event()
+        self._worker_done = threading.Event()
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="AtomsVisualizerLoad", daemon=True)
+        self._thread.start()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def worker_done(self) -> bool:
+        return self._worker_done.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    def report(self, stage: str, fraction: float) -> None:
+        # Stage boundaries double as cancellation points for the worker
+        if self.cancelled:
+            raise LoadCancelled()
+        self.stage = stage
+        self.fraction = fraction
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        if error is not None:
+            self.error = error
+        self.fraction = 1.0
+        self._finished.set()
+
+    def _run(self) -> None:
+        try:
+            self.result = self._work(self.file_path, self)
+        except LoadCancelled:
+            pass
+        except Exception as exc:
+            self.error = exc
+        finally:
+            self._worker_done.set()
@@ -0,0 +1,80 @@
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+MIN_SPHERE_LEVEL = 1
+MAX_SPHERE_LEVEL = 5
+FIXED_SPHERE_LEVELS = {"LOW": 2, "MEDIUM": 3, "HIGH": 4, "ULTRA": 5}
+BOND_SEGMENTS_BY_LEVEL = {1: 6, 2: 8, 3: 12, 4: 16, 5: 24}
+
+# Longest sphere edge allowed on screen before facets become visible
+TARGET_EDGE_PIXELS = 4.0
+# Viewport sphere triangles across the whole structure before the proxy level drops
+VIEWPORT_TRIANGLE_BUDGET = 4_000_000
+# Matches the framing margin used by the camera setup
+CAMERA_FIT_MARGIN = 1.25
+
+
+class LevelOfDetail(NamedTuple):
+    viewport_level: int
+    render_level: int
+    bond_segments: int
+
+
+DEFAULT_LEVEL_OF_DETAIL = LevelOfDetail(3, 3, BOND_SEGMENTS_BY_LEVEL[3])
+
+
+# Levels are numbered like Blender's Ico Sphere, where level 1 is the plain icosahedron
+def icosphere_triangles(level: int) -> int:
+    return 20 * 4 ** (level - 1)
+
+
+def icosphere_segments(level: int) -> int:
+    # Edges around a great circle of an icosphere with this many subdivisions
+    return 5 * 2 ** (level - 1)
+
+
+def level_for_diameter(diameter_pixels: float) -> int:
+    for level in range(MIN_SPHERE_LEVEL, MAX_SPHERE_LEVEL + 1):
+        if math.pi * diameter_pixels / icosphere_segments(level) <= TARGET_EDGE_PIXELS:
+            return level
+    return MAX_SPHERE_LEVEL
+
+
+def viewport_level_for_count(atom_count: int, render_level: int) -> int:
+    for level in range(render_level, MIN_SPHERE_LEVEL, -1):
+        if atom_count * icosphere_triangles(level) <= VIEWPORT_TRIANGLE_BUDGET:
+            return level
+    return MIN_SPHERE_LEVEL
+
+
+def projected_diameter(radius: float, structure_radius: float, resolution: int) -> float:
+    # The camera frames the bounding sphere with a margin, so it spans about resolution / margin pixels
+    return resolution * radius / (structure_radius * CAMERA_FIT_MARGIN)
+
+
+def bond_segments_for(level: int, bond_radius: float, structure_radius: float, resolution: int) -> int:
+    diameter = projected_diameter(bond_radius, structure_radius, resolution)
+    needed = int(math.ceil(math.pi * diameter / TARGET_EDGE_PIXELS))
+    return int(np.clip(needed, BOND_SEGMENTS_BY_LEVEL[MIN_SPHERE_LEVEL], BOND_SEGMENTS_BY_LEVEL[level]))
+
+
+def resolve_level_of_detail(
+    mode: str,
+    atom_count: int,
+    atom_radius: float,
+    bond_radius: float,
+    structure_radius: float,
+    resolution: int,
+    viewport_proxy: bool = True,
+) -> LevelOfDetail:
+    structure_radius = max(structure_radius, 1e-6)
+    if mode in FIXED_SPHERE_LEVELS:
+        render_level = FIXED_SPHERE_LEVELS[mode]
+    else:
+        render_level = level_for_diameter(projected_diameter(atom_radius, structure_radius, resolution))
+
+    viewport_level = viewport_level_for_count(atom_count, render_level) if viewport_proxy else render_level
+    bond_segments = bond_segments_for(render_level, bond_radius, structure_radius, resolution)
+    return LevelOfDetail(viewport_level, render_level, bond_segments)
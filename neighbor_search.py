@@ -0,0 +1,306 @@
+import itertools
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Cell offsets covering each unordered pair of neighbouring cells exactly once
+_HALF_SHELL_OFFSETS = np.array(
+    [
+        (dx, dy, dz)
+        for dx in (-1, 0, 1)
+        for dy in (-1, 0, 1)
+        for dz in (-1, 0, 1)
+        if (dx, dy, dz) > (0, 0, 0)
+    ],
+    dtype=np.int64,
+)
+
+# Upper bound on cells per axis so linear cell keys never overflow int64
+_MAX_CELLS_PER_AXIS = 1 << 20
+
+# Margin added to the bond limits of a Verlet list; wide enough that thermal jitter between saved
+# frames stays under half of it, which is when the list has to be rebuilt
+DEFAULT_VERLET_SKIN = 1.0
+
+
+def bond_compatibility_matrix(elements: Sequence[str], bond_info: Dict[str, List[str]]) -> np.ndarray:
+    index = {elem: i for i, elem in enumerate(elements)}
+    matrix = np.zeros((len(elements), len(elements)), dtype=bool)
+    for elem, partners in bond_info.items():
+        i = index.get(elem)
+        if i is None:
+            continue
+        for partner in partners:
+            j = index.get(partner)
+            if j is not None:
+                matrix[i, j] = True
+                matrix[j, i] = True
+    return matrix
+
+
+def neighbor_pairs(
+    positions: np.ndarray,
+    cutoff: float,
+    element_indices: Optional[np.ndarray] = None,
+    compatibility: Optional[np.ndarray] = None,
+    pair_cutoffs: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    count = len(positions)
+    if count < 2 or cutoff <= 0.0:
+        return _empty_pairs()
+
+    extent = positions.max(axis=0) - positions.min(axis=0)
+    cell_size = max(float(cutoff), float(extent.max()) / _MAX_CELLS_PER_AXIS)
+    cells = np.floor((positions - positions.min(axis=0)) / cell_size).astype(np.int64)
+    dims = cells.max(axis=0) + 1
+
+    keys = _cell_keys(cells, dims)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    cutoff_sq = float(cutoff) * float(cutoff)
+    filter_elements = element_indices is not None and compatibility is not None
+    if element_indices is not None:
+        element_indices = np.asarray(element_indices, dtype=np.int64)
+    if pair_cutoffs is not None:
+        pair_cutoffs_sq = np.minimum(np.square(pair_cutoffs), cutoff_sq)
+
+    chunks_first = []
+    chunks_second = []
+    chunks_dist = []
+
+    for offset in [np.zeros(3, dtype=np.int64)] + list(_HALF_SHELL_OFFSETS):
+        neighbor_cells = cells + offset
+        in_grid = np.all((neighbor_cells >= 0) & (neighbor_cells < dims), axis=1)
+        atoms = np.nonzero(in_grid)[0]
+        if len(atoms) == 0:
+            continue
+
+        neighbor_keys = _cell_keys(neighbor_cells[in_grid], dims)
+        start = np.searchsorted(sorted_keys, neighbor_keys, side="left")
+        stop = np.searchsorted(sorted_keys, neighbor_keys, side="right")
+        counts = stop - start
+        total = int(counts.sum())
+        if total == 0:
+            continue
+
+        first = np.repeat(atoms, counts)
+        group_start = np.repeat(np.cumsum(counts) - counts, counts)
+        second = order[np.repeat(start, counts) + np.arange(total) - group_start]
+
+        if not offset.any():
+            keep = first < second
+            first, second = first[keep], second[keep]
+
+        if filter_elements:
+            keep = compatibility[element_indices[first], element_indices[second]]
+            first, second = first[keep], second[keep]
+
+        delta = positions[second] - positions[first]
+        dist_sq = np.einsum("ij,ij->i", delta, delta)
+        if pair_cutoffs is not None:
+            keep = dist_sq < pair_cutoffs_sq[element_indices[first], element_indices[second]]
+        else:
+            keep = dist_sq < cutoff_sq
+        chunks_first.append(first[keep])
+        chunks_second.append(second[keep])
+        chunks_dist.append(np.sqrt(dist_sq[keep]))
+
+    if not chunks_first:
+        return _empty_pairs()
+
+    first = np.concatenate(chunks_first)
+    second = np.concatenate(chunks_second)
+    distances = np.concatenate(chunks_dist)
+
+    low = np.minimum(first, second)
+    high = np.maximum(first, second)
+    order = np.lexsort((high, low))
+    return low[order], high[order], distances[order]
+
+
+def periodic_neighbor_pairs(
+    positions: np.ndarray,
+    cutoff: float,
+    lattice: np.ndarray,
+    pbc: Optional[np.ndarray] = None,
+    element_indices: Optional[np.ndarray] = None,
+    compatibility: Optional[np.ndarray] = None,
+    pair_cutoffs: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Minimum-image pairs; ``shifts`` holds the lattice image of the second atom for each pair.
+
+    Atoms within ``cutoff`` of a periodic face are copied into the neighbouring images as
+    ghosts and the ordinary cell-list search runs on the padded set, so the cost stays
+    linear in the atom count. A pair through the boundary is kept once, from its lower index.
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    lattice = np.asarray(lattice, dtype=np.float64).reshape(3, 3)
+    periodic = np.ones(3, dtype=bool) if pbc is None else np.asarray(pbc, dtype=bool)
+    count = len(positions)
+    if count == 0 or cutoff <= 0.0:
+        return _empty_periodic_pairs()
+
+    inverse = np.linalg.inv(lattice)
+    fractional = positions @ inverse
+    wrap = np.where(periodic, np.floor(fractional), 0.0).astype(np.int64)
+    fractional -= wrap
+
+    # Fractional thickness of a cutoff-wide slab: cutoff over the spacing of each family of lattice planes
+    margin = float(cutoff) * np.linalg.norm(inverse, axis=0)
+    reach = np.where(periodic, np.ceil(margin), 0).astype(np.int64)
+
+    sources = [np.arange(count)]
+    images = [np.zeros((count, 3), dtype=np.int64)]
+    for shift in itertools.product(*(range(-r, r + 1) for r in reach)):
+        if not any(shift):
+            continue
+        shifted = fractional + shift
+        inside = np.all(~periodic | ((shifted > -margin) & (shifted < 1.0 + margin)), axis=1)
+        atoms = np.nonzero(inside)[0]
+        sources.append(atoms)
+        images.append(np.tile(np.array(shift, dtype=np.int64), (len(atoms), 1)))
+
+    source = np.concatenate(sources)
+    image = np.concatenate(images)
+    padded = (fractional[source] + image) @ lattice
+    padded_elements = None if element_indices is None else np.asarray(element_indices, dtype=np.int64)[source]
+    first, second, distances = neighbor_pairs(padded, cutoff, padded_elements, compatibility, pair_cutoffs)
+
+    # Real atoms come first, so the lower index of a pair tells whether it starts inside the cell
+    keep = first < count
+    first, second, distances = first[keep], second[keep], distances[keep]
+    partner = source[second]
+    shift = image[second]
+    positive = (shift[:, 0] > 0) | ((shift[:, 0] == 0) & ((shift[:, 1] > 0) | ((shift[:, 1] == 0) & (shift[:, 2] > 0))))
+    keep = (first < partner) | ((first == partner) & positive)
+    first, partner, distances, shift = first[keep], partner[keep], distances[keep], shift[keep]
+
+    # Express the image in the caller's coordinates rather than the wrapped ones
+    shift = shift + wrap[first] - wrap[partner]
+    order = np.lexsort((partner, first))
+    return first[order], partner[order], distances[order], shift[order].astype(np.int32)
+
+
+def _cell_keys(cells: np.ndarray, dims: np.ndarray) -> np.ndarray:
+    return (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+
+def _empty_pairs() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    empty_index = np.zeros(0, dtype=np.int64)
+    return empty_index, empty_index.copy(), np.zeros(0, dtype=np.float64)
+
+
+def _empty_periodic_pairs() -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    return (*_empty_pairs(), np.zeros((0, 3), dtype=np.int32))
+
+
+def is_periodic(lattice: Optional[np.ndarray], pbc: Optional[np.ndarray]) -> bool:
+    if lattice is None or (pbc is not None and not np.any(pbc)):
+        return False
+    return abs(float(np.linalg.det(np.asarray(lattice, dtype=np.float64).reshape(3, 3)))) > 1e-9
+
+
+def bond_candidates(
+    positions: np.ndarray,
+    element_indices: np.ndarray,
+    compatibility: np.ndarray,
+    max_cutoff: float,
+    pair_cutoffs: Optional[np.ndarray] = None,
+    lattice: Optional[np.ndarray] = None,
+    pbc: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    if is_periodic(lattice, pbc):
+        first, second, distances, shifts = periodic_neighbor_pairs(
+            positions, max_cutoff, lattice, pbc, element_indices, compatibility, pair_cutoffs
+        )
+    else:
+        first, second, distances = neighbor_pairs(positions, max_cutoff, element_indices, compatibility, pair_cutoffs)
+        shifts = np.zeros((len(first), 3), dtype=np.int32)
+    order = np.argsort(distances, kind="stable")
+    return first[order], second[order], distances[order], shifts[order]
+
+
+class VerletBondList:
+    """Bond candidates for a moving structure, searched once with a skin and reused across frames.
+
+    The list holds every compatible pair within its bond limit plus ``skin``. Until some atom
+    has moved more than half the skin from where the list was built, no pair outside it can
+    have come within its limit, so a frame only measures the listed pairs again.
+    """
+
+    def __init__(
+        self,
+        element_indices: np.ndarray,
+        compatibility: np.ndarray,
+        max_cutoff: float,
+        pair_cutoffs: Optional[np.ndarray] = None,
+        lattice: Optional[np.ndarray] = None,
+        pbc: Optional[np.ndarray] = None,
+        skin: float = DEFAULT_VERLET_SKIN,
+    ):
+        self.element_indices = np.asarray(element_indices, dtype=np.int64)
+        self.compatibility = compatibility
+        self.max_cutoff = float(max_cutoff)
+        self.pair_cutoffs = pair_cutoffs
+        self.lattice = None if lattice is None else np.asarray(lattice, dtype=np.float64).reshape(3, 3)
+        self.pbc = pbc
+        self.skin = float(skin)
+        self.rebuilds = 0
+        self._reference: Optional[np.ndarray] = None
+
+    def update(self, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Candidates at ``positions`` in the order of ``bond_candidates``.
+
+        Listed pairs past their bond limit in this frame stay at the end with an infinite
+        distance, so the candidate count only changes when the list is rebuilt.
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        if self.needs_rebuild(positions):
+            self._build(positions)
+
+        ends = positions[self._second]
+        if self._offsets is not None:
+            ends = ends + self._offsets
+        delta = ends - positions[self._first]
+        distances = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+        distances[distances >= self._limits] = np.inf
+
+        # The list is kept in the previous frame's order, which a stable sort handles in near-linear time
+        order = np.argsort(distances, kind="stable")
+        self._first, self._second, self._shifts, self._limits = (
+            self._first[order], self._second[order], self._shifts[order], self._limits[order]
+        )
+        if self._offsets is not None:
+            self._offsets = self._offsets[order]
+        return self._first, self._second, distances[order], self._shifts
+
+    def needs_rebuild(self, positions: np.ndarray) -> bool:
+        if self._reference is None or self._reference.shape != positions.shape:
+            return True
+        if len(positions) == 0:
+            return False
+        # An atom wrapped back into the cell jumps a lattice vector and forces a rebuild, which is correct
+        displacement = positions - self._reference
+        moved_sq = float(np.einsum("ij,ij->i", displacement, displacement).max())
+        return moved_sq > (self.skin / 2) ** 2
+
+    def _build(self, positions: np.ndarray) -> None:
+        pair_cutoffs = None if self.pair_cutoffs is None else self.pair_cutoffs + self.skin
+        self._first, self._second, _, self._shifts = bond_candidates(
+            positions,
+            self.element_indices,
+            self.compatibility,
+            self.max_cutoff + self.skin,
+            pair_cutoffs,
+            self.lattice,
+            self.pbc,
+        )
+        self._limits = np.full(len(self._first), self.max_cutoff)
+        if self.pair_cutoffs is not None:
+            pair_limits = self.pair_cutoffs[self.element_indices[self._first], self.element_indices[self._second]]
+            self._limits = np.minimum(self._limits, pair_limits)
+        self._offsets = self._shifts @ self.lattice if self.lattice is not None and self._shifts.any() else None
+        self._reference = positions.copy()
+        self.rebuilds += 1
@@ -1,10 +1,11 @@
 import os
 
-from bpy.props import StringProperty
+from bpy.props import BoolProperty, StringProperty
 from bpy.types import Operator
-from bpy_extras.io_utils import ImportHelper
+from bpy_extras.io_utils import ExportHelper, ImportHelper
 
 from .controller import get_controller
+from .state import state
 
 
 class LoadFileOperator(Operator, ImportHelper):
@@ -19,6 +20,68 @@ class LoadFileOperator(Operator, ImportHelper):
         maxlen=255,
     )
 
+    _timer = None
+    _job = None
+
+    def execute(self, context):
+        filepath = self.filepath
+        context.scene.last_loaded_file = filepath
+
+        if not filepath.lower().endswith(".xyz"):
+            self.report({"ERROR"}, "Only .xyz files are supported")
+            return {"CANCELLED"}
+
+        self._job = get_controller().start_background_load(filepath)
+        window_manager = context.window_manager
+        self._timer = window_manager.event_timer_add(0.1, window=context.window)
+        window_manager.modal_handler_add(self)
+        return {"RUNNING_MODAL"}
+
+    def modal(self, context, event):
+        job = self._job
+        filename = os.path.basename(job.file_path)
+
+        if event.type == "ESC" and event.value == "PRESS":
+            get_controller().cancel_background_load()
+            self._finish(context)
+            self.report({"WARNING"}, f"Loading cancelled: {filename}")
+            return {"CANCELLED"}
+
+        if event.type == "TIMER":
+            _redraw_sidebar(context)
+            if job.finished or job.cancelled:
+                self._finish(context)
+                if job.error is not None:
+                    self.report({"ERROR"}, f"Failed to load structure: {str(job.error)}")
+                    return {"CANCELLED"}
+                if job.cancelled:
+                    return {"CANCELLED"}
+                self.report({"INFO"}, f"Structure loaded: {filename}")
+                return {"FINISHED"}
+
+        return {"PASS_THROUGH"}
+
+    def _finish(self, context) -> None:
+        if self._timer is not None:
+            context.window_manager.event_timer_remove(self._timer)
+            self._timer = None
+        if state.load_job is self._job:
+            state.load_job = None
+        _redraw_sidebar(context)
+
+
+class LoadTrajectoryOperator(Operator, ImportHelper):
+    bl_idname = "file.load_trajectory_operator"
+    bl_label = "Load Trajectory"
+
+    filename_ext = "*.*"
+
+    filter_glob: StringProperty(
+        default="*.*",
+        options={"HIDDEN"},
+        maxlen=255,
+    )
+
     def execute(self, context):
         filepath = self.filepath
         filename = os.path.basename(filepath)
@@ -29,9 +92,105 @@ class LoadFileOperator(Operator, ImportHelper):
             return {"CANCELLED"}
 
         try:
-            get_controller().load_structure(filepath)
-            self.report({"INFO"}, f"Structure loaded: {filename}")
+            get_controller().load_trajectory(filepath)
+            self.report({"INFO"}, f"Trajectory loaded: {filename}")
             return {"FINISHED"}
         except Exception as exc:
-            self.report({"ERROR"}, f"Failed to load structure: {str(exc)}")
+            self.report({"ERROR"}, f"Failed to load trajectory: {str(exc)}")
             return {"CANCELLED"}
+
+
+class PointRegionOperator(Operator):
+    bl_idname = "object.point_region_operator"
+    bl_label = "Sphere Region"
+    bl_description = "Draw point-cloud atoms inside a box as full spheres in the viewport"
+
+    clear: BoolProperty(
+        default=False,
+        options={"HIDDEN"},
+    )
+
+    def execute(self, context):
+        controller = get_controller()
+        if self.clear:
+            controller.clear_point_region()
+        else:
+            controller.add_point_region()
+        return {"FINISHED"}
+
+
+class ReloadStructureOperator(Operator):
+    bl_idname = "object.reload_structure_operator"
+    bl_label = "Reload Structure"
+    bl_description = "Read the active structure's file again and update only the atoms and bonds that changed"
+
+    @classmethod
+    def poll(cls, context):
+        return get_controller().can_reload()
+
+    def execute(self, context):
+        try:
+            get_controller().reload_structure()
+            self.report({"INFO"}, f"Structure reloaded: {state.structure_name}")
+            return {"FINISHED"}
+        except Exception as exc:
+            self.report({"ERROR"}, f"Failed to reload structure: {str(exc)}")
+            return {"CANCELLED"}
+
+
+class SelectStructureOperator(Operator):
+    bl_idname = "object.select_structure_operator"
+    bl_label = "Select Structure"
+    bl_description = "Edit this structure with the sidebar controls"
+
+    structure_key: StringProperty(
+        default="",
+        options={"HIDDEN"},
+    )
+
+    remove: BoolProperty(
+        default=False,
+        options={"HIDDEN"},
+    )
+
+    def execute(self, context):
+        controller = get_controller()
+        if self.remove:
+            controller.remove_structure(self.structure_key)
+        else:
+            controller.activate_structure(self.structure_key)
+        _redraw_sidebar(context)
+        return {"FINISHED"}
+
+
+class ExportPerformanceOperator(Operator, ExportHelper):
+    bl_idname = "file.export_performance_operator"
+    bl_label = "Export Performance"
+
+    filename_ext = ".json"
+
+    filter_glob: StringProperty(
+        default="*.json",
+        options={"HIDDEN"},
+        maxlen=255,
+    )
+
+    def execute(self, context):
+        profiler = get_controller().profiler
+        if not profiler.reports:
+            self.report({"ERROR"}, "No performance reports recorded yet")
+            return {"CANCELLED"}
+
+        try:
+            profiler.export_json(self.filepath)
+            self.report({"INFO"}, f"Performance exported: {os.path.basename(self.filepath)}")
+            return {"FINISHED"}
+        except OSError as exc:
+            self.report({"ERROR"}, f"Failed to export performance: {str(exc)}")
+            return {"CANCELLED"}
+
+
+def _redraw_sidebar(context) -> None:
+    for area in context.screen.areas if context.screen else ():
+        if area.type == "VIEW_3D":
+            area.tag_redraw()
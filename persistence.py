@@ -0,0 +1,188 @@
+import json
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import bpy
+import numpy as np
+
+from .cache import BondCandidateArrays
+from .structure import AtomArrays
+
+DATA_MESH_NAME = "AtomsVisualizer_Data"
+METADATA_KEY = "atoms_visualizer_metadata"
+ARRAYS_KEY = "atoms_visualizer_arrays"
+COLUMNS_KEY = "atoms_visualizer_columns"
+STORE_FORMAT_VERSION = 2
+
+ELEMENT_ATTRIBUTE = "element_index"
+DISTANCE_ATTRIBUTE = "bond_distance"
+IMAGE_ATTRIBUTE = "bond_image"
+COLUMN_ATTRIBUTE_PREFIX = "column"
+
+# Mesh attribute types for the per-atom columns; strings are stored as indices into a value table
+_COLUMN_TYPES = {"f": ("FLOAT", np.float32), "i": ("INT", np.int32), "u": ("INT", np.int32), "b": ("BOOLEAN", bool)}
+
+
+def new_data_mesh():
+    mesh = bpy.data.meshes.new(DATA_MESH_NAME)
+    # Nothing links the data mesh, so the fake user is what keeps it in the saved file
+    mesh.use_fake_user = True
+    return mesh
+
+
+def store_metadata(collection, metadata: Dict[str, object]) -> None:
+    """Write the small per-structure settings as a JSON custom property on the structure's root collection."""
+    collection[METADATA_KEY] = json.dumps(dict(metadata, version=STORE_FORMAT_VERSION))
+
+
+def clear_metadata(collection) -> None:
+    if METADATA_KEY in collection:
+        del collection[METADATA_KEY]
+
+
+def store_arrays(mesh, structure: AtomArrays, candidates: BondCandidateArrays, structure_key: str) -> None:
+    """Write atoms as vertices and bond candidates as edges, in candidate order.
+
+    Positions, distances and float columns are kept as 32-bit floats, which is what the scene meshes use
+    anyway, and integer columns as 32-bit integers. Each column component is a point attribute.
+    """
+    first, second, distances, shifts = candidates
+    mesh.clear_geometry()
+    mesh.vertices.add(len(structure))
+    mesh.edges.add(len(first))
+    mesh.vertices.foreach_set("co", structure.positions.astype(np.float32).ravel())
+    mesh.edges.foreach_set("vertices", np.column_stack([first, second]).astype(np.int32).ravel())
+
+    _new_attribute(mesh, ELEMENT_ATTRIBUTE, "INT", "POINT").data.foreach_set(
+        "value", structure.element_indices.astype(np.int32)
+    )
+    _new_attribute(mesh, DISTANCE_ATTRIBUTE, "FLOAT", "EDGE").data.foreach_set(
+        "value", distances.astype(np.float32)
+    )
+    # Lattice images are small integers, exact in a float vector
+    _new_attribute(mesh, IMAGE_ATTRIBUTE, "FLOAT_VECTOR", "EDGE").data.foreach_set(
+        "vector", shifts.astype(np.float32).ravel()
+    )
+    _store_columns(mesh, structure.columns)
+    mesh.update()
+    mesh[ARRAYS_KEY] = structure_key
+
+
+def stored_metadata(collection) -> Optional[Dict[str, object]]:
+    if METADATA_KEY not in collection:
+        return None
+    try:
+        metadata = json.loads(collection[METADATA_KEY])
+    except ValueError:
+        return None
+    if metadata.get("version") != STORE_FORMAT_VERSION:
+        return None
+    return metadata
+
+
+def stored_structures() -> Iterator[Tuple[object, Dict[str, object]]]:
+    for collection in bpy.data.collections:
+        metadata = stored_metadata(collection)
+        if metadata is not None:
+            yield collection, metadata
+
+
+def stored_arrays_key(mesh) -> str:
+    return mesh.get(ARRAYS_KEY, "")
+
+
+def forget_arrays(mesh) -> None:
+    """Mark the stored arrays as stale so the next save writes them again."""
+    if ARRAYS_KEY in mesh:
+        del mesh[ARRAYS_KEY]
+
+
+def load_arrays(
+    mesh, structure_key: str, elements: List[str], lattice, pbc
+) -> Optional[Tuple[AtomArrays, BondCandidateArrays]]:
+    if mesh.get(ARRAYS_KEY) != structure_key:
+        return None
+
+    atom_count = len(mesh.vertices)
+    bond_count = len(mesh.edges)
+    positions = np.empty(atom_count * 3, dtype=np.float32)
+    element_indices = np.empty(atom_count, dtype=np.int32)
+    edges = np.empty(bond_count * 2, dtype=np.int32)
+    distances = np.empty(bond_count, dtype=np.float32)
+    shifts = np.empty(bond_count * 3, dtype=np.float32)
+    try:
+        mesh.vertices.foreach_get("co", positions)
+        mesh.edges.foreach_get("vertices", edges)
+        mesh.attributes[ELEMENT_ATTRIBUTE].data.foreach_get("value", element_indices)
+        mesh.attributes[DISTANCE_ATTRIBUTE].data.foreach_get("value", distances)
+        mesh.attributes[IMAGE_ATTRIBUTE].data.foreach_get("vector", shifts)
+        columns = _load_columns(mesh, atom_count)
+    except (KeyError, RuntimeError, ValueError):
+        return None
+
+    structure = AtomArrays(
+        positions=positions.astype(np.float64).reshape(-1, 3),
+        element_indices=element_indices,
+        elements=list(elements),
+        columns=columns,
+        lattice=lattice,
+        pbc=pbc,
+    )
+    edges = edges.reshape(-1, 2).astype(np.int64)
+    candidates = (
+        edges[:, 0].copy(),
+        edges[:, 1].copy(),
+        distances.astype(np.float64),
+        np.rint(shifts).astype(np.int32).reshape(-1, 3),
+    )
+    return structure, candidates
+
+
+def _store_columns(mesh, columns: Dict[str, np.ndarray]) -> None:
+    layout = []
+    for position, (name, column) in enumerate(columns.items()):
+        values = column.reshape(len(column), -1)
+        entry = {"name": name, "kind": column.dtype.kind, "width": values.shape[1] if column.ndim > 1 else 0}
+        if column.dtype.kind in _COLUMN_TYPES:
+            data_type, dtype = _COLUMN_TYPES[column.dtype.kind]
+        else:
+            table, inverse = np.unique(values.astype(str), return_inverse=True)
+            entry["values"] = table.tolist()
+            values = inverse.reshape(values.shape)
+            data_type, dtype = "INT", np.int32
+        for component in range(values.shape[1]):
+            _new_attribute(mesh, _column_attribute(position, component), data_type, "POINT").data.foreach_set(
+                "value", np.ascontiguousarray(values[:, component], dtype=dtype)
+            )
+        layout.append(entry)
+    mesh[COLUMNS_KEY] = json.dumps(layout)
+
+
+def _load_columns(mesh, atom_count: int) -> Dict[str, np.ndarray]:
+    columns = {}
+    for position, entry in enumerate(json.loads(mesh.get(COLUMNS_KEY, "[]"))):
+        kind = entry["kind"]
+        dtype = _COLUMN_TYPES[kind][1] if kind in _COLUMN_TYPES else np.int32
+        values = np.empty((atom_count, max(entry["width"], 1)), dtype=dtype)
+        for component in range(values.shape[1]):
+            component_values = np.empty(atom_count, dtype=dtype)
+            mesh.attributes[_column_attribute(position, component)].data.foreach_get("value", component_values)
+            values[:, component] = component_values
+        if "values" in entry:
+            values = np.asarray(entry["values"], dtype=str)[values]
+        elif kind == "f":
+            values = values.astype(np.float64)
+        elif kind in "iu":
+            values = values.astype(np.int64)
+        columns[entry["name"]] = values if entry["width"] else values[:, 0]
+    return columns
+
+
+def _column_attribute(position: int, component: int) -> str:
+    return f"{COLUMN_ATTRIBUTE_PREFIX}:{position}:{component}"
+
+
+def _new_attribute(mesh, name: str, data_type: str, domain: str):
+    attribute = mesh.attributes.get(name)
+    if attribute is not None:
+        mesh.attributes.remove(attribute)
+    return mesh.attributes.new(name=name, type=data_type, domain=domain)
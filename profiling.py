@@ -0,0 +1,169 @@
+import contextlib
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Iterator, List, Optional
+
+PROFILE_STATS_LINES = 30
+
+
+@dataclass
+class PerformanceReport:
+    operation: str
+    label: str = ""
+    enabled: bool = True
+    capture_profile: bool = False
+    track_memory: bool = False
+    count_datablocks: bool = False
+    stages: Dict[str, float] = field(default_factory=dict)
+    total_seconds: float = 0.0
+    peak_memory_bytes: int = 0
+    created: Dict[str, int] = field(default_factory=dict)
+    profile_text: str = ""
+    _started: float = 0.0
+    _counts: Dict[str, int] = field(default_factory=dict)
+    _stats: Optional[pstats.Stats] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        # One profiler per stage so stages on the load worker thread are captured as well
+        profiler = cProfile.Profile() if self.capture_profile else None
+        if profiler is not None:
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is already active on this thread
+                profiler = None
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+                if profiler is not None:
+                    if self._stats is None:
+                        self._stats = pstats.Stats(profiler)
+                    else:
+                        self._stats.add(profiler)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "operation": self.operation,
+            "label": self.label,
+            "total_seconds": self.total_seconds,
+            "stages": dict(self.stages),
+            "peak_memory_bytes": self.peak_memory_bytes if self.track_memory else None,
+            "created": dict(self.created) if self.count_datablocks else None,
+            "profile": self.profile_text,
+        }
+
+
+class PerformanceRecorder:
+    def __init__(self, counter: Callable[[], Dict[str, int]], history_size: int = 20):
+        self.counter = counter
+        self.enabled = False
+        self.capture_profile = False
+        self.track_memory = False
+        self.reports: Deque[PerformanceReport] = deque(maxlen=history_size)
+        self._active = 0
+        self._owns_tracing = False
+
+    @property
+    def last_report(self) -> Optional[PerformanceReport]:
+        return self.reports[-1] if self.reports else None
+
+    def begin(self, operation: str, label: str = "", count_datablocks: bool = False) -> PerformanceReport:
+        """Start a report; ``count_datablocks`` is for operations that add or remove datablocks.
+
+        Counting walks every datablock list and tracemalloc slows all allocations, so slider
+        callbacks record timing alone unless memory tracking is switched on.
+        """
+        report = PerformanceReport(
+            operation,
+            label,
+            self.enabled,
+            self.enabled and self.capture_profile,
+            self.enabled and self.track_memory,
+            self.enabled and count_datablocks,
+        )
+        if not self.enabled:
+            return report
+
+        if report.track_memory:
+            if self._active == 0:
+                self._owns_tracing = not tracemalloc.is_tracing()
+                if self._owns_tracing:
+                    tracemalloc.start()
+                elif hasattr(tracemalloc, "reset_peak"):
+                    tracemalloc.reset_peak()
+            self._active += 1
+
+        if report.count_datablocks:
+            report._counts = self.counter()
+        report._started = time.perf_counter()
+        return report
+
+    def end(self, report: PerformanceReport, keep: bool = True) -> None:
+        if not report.enabled or report._started == 0.0:
+            return
+
+        report.total_seconds = time.perf_counter() - report._started
+        report._started = 0.0
+        if report.count_datablocks:
+            counts = self.counter()
+            report.created = {name: counts[name] - report._counts.get(name, 0) for name in counts}
+
+        if report._stats is not None:
+            stream = io.StringIO()
+            report._stats.stream = stream
+            report._stats.sort_stats("cumulative").print_stats(PROFILE_STATS_LINES)
+            report.profile_text = stream.getvalue()
+            report._stats = None
+
+        if report.track_memory:
+            report.peak_memory_bytes = tracemalloc.get_traced_memory()[1]
+            self._active -= 1
+            if self._active == 0 and self._owns_tracing:
+                tracemalloc.stop()
+                self._owns_tracing = False
+
+        if keep:
+            self.reports.append(report)
+
+    @contextlib.contextmanager
+    def record(self, operation: str, label: str = "", count_datablocks: bool = False) -> Iterator[PerformanceReport]:
+        report = self.begin(operation, label, count_datablocks)
+        try:
+            yield report
+        finally:
+            self.end(report)
+
+    def export_json(self, file_path: str) -> None:
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump([report.to_dict() for report in self.reports], f, indent=2)
+
+    def clear(self) -> None:
+        self.reports.clear()
+
+
+def format_bytes(count: int) -> str:
+    return f"{count / (1024 * 1024):.1f} MB"
+
+
+def stage_rows(report: PerformanceReport) -> List[str]:
+    return [f"{name}: {seconds * 1000:.1f} ms" for name, seconds in report.stages.items()]
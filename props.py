@@ -1,10 +1,19 @@
 import bpy
-from bpy.props import CollectionProperty, EnumProperty, FloatProperty, FloatVectorProperty, StringProperty
+from bpy.props import (
+    BoolProperty,
+    CollectionProperty,
+    EnumProperty,
+    FloatProperty,
+    FloatVectorProperty,
+    IntProperty,
+    IntVectorProperty,
+    StringProperty,
+)
 
 from bpy.types import PropertyGroup
 
 from .controller import get_controller
-from .state import state
+from .state import MAX_BOND_CUTOFF, state
 
 
 def update_atomic_radius(self, context):
@@ -27,6 +36,30 @@ def update_atom_appearance(self, context):
     get_controller().update_atom_appearance(context)
 
 
+def update_atom_display_mode(self, context):
+    get_controller().update_atom_display_mode(context)
+
+
+def update_level_of_detail(self, context):
+    get_controller().update_level_of_detail(context)
+
+
+def update_supercell(self, context):
+    get_controller().update_supercell(context)
+
+
+def update_watch_file(self, context):
+    get_controller().update_watch_file(context)
+
+
+def update_cache_settings(self, context):
+    get_controller().update_cache_settings(context)
+
+
+def update_performance_settings(self, context):
+    get_controller().update_performance_settings(context)
+
+
 def update_atom_color(self, context):
     get_controller().update_atom_color(self, context)
 
@@ -77,7 +110,7 @@ def register_scene_properties():
         description="Controls whether bonds will form between atoms or not",
         default=state.bond_cutoff_distance,
         min=0,
-        max=5,
+        max=MAX_BOND_CUTOFF,
         update=update_bond_cutoff_distance,
     )
 
@@ -123,6 +156,117 @@ def register_scene_properties():
         update=update_atom_appearance,
     )
 
+    bpy.types.Scene.atom_display_mode_scene = EnumProperty(
+        name="Atom Display",
+        description="How atoms are built when a structure is loaded",
+        items=[
+            ("AUTO", "Auto", "Per-atom objects for small structures, instancing for large ones, points for huge ones"),
+            ("OBJECTS", "Objects", "One sphere object per atom"),
+            ("INSTANCED", "Instanced", "One point mesh per element drawn with Geometry Nodes instances"),
+            ("POINTS", "Points", "Points in the viewport, spheres only when rendering or inside a region box"),
+        ],
+        default=state.atom_display_mode,
+        update=update_atom_display_mode,
+    )
+
+    bpy.types.Scene.atom_lod_scene = EnumProperty(
+        name="Level of Detail",
+        description="Sphere and bond resolution",
+        items=[
+            ("AUTO", "Auto", "Pick the resolution from atom count and on-screen atom size"),
+            ("LOW", "Low", "Icosphere with 2 subdivisions (80 faces)"),
+            ("MEDIUM", "Medium", "Icosphere with 3 subdivisions (320 faces)"),
+            ("HIGH", "High", "Icosphere with 4 subdivisions (1280 faces)"),
+            ("ULTRA", "Ultra", "Icosphere with 5 subdivisions (5120 faces)"),
+        ],
+        default=state.atom_lod,
+        update=update_level_of_detail,
+    )
+
+    bpy.types.Scene.viewport_proxy_scene = BoolProperty(
+        name="Low-Poly Viewport",
+        description="Draw coarser instanced spheres in the viewport and full resolution only when rendering",
+        default=state.viewport_proxy,
+        update=update_level_of_detail,
+    )
+
+    bpy.types.Scene.supercell_scene = IntVectorProperty(
+        name="Supercell",
+        description="Periodic images of the unit cell along each lattice vector, drawn as collection instances",
+        size=3,
+        default=state.supercell,
+        min=1,
+        max=20,
+        update=update_supercell,
+    )
+
+    bpy.types.Scene.watch_file_scene = BoolProperty(
+        name="Watch File",
+        description="Check the active structure's file once a second and reload it when it changes",
+        default=state.watch_file,
+        update=update_watch_file,
+    )
+
+    bpy.types.Scene.structure_cache_enabled_scene = BoolProperty(
+        name="Use Structure Cache",
+        description="Reuse parsed atoms and bond candidates from a binary cache when a file is reopened",
+        default=state.cache_enabled,
+        update=update_cache_settings,
+    )
+
+    bpy.types.Scene.structure_cache_dir_scene = StringProperty(
+        name="Cache Directory",
+        description="Directory holding the binary structure cache",
+        default=state.cache_dir,
+        subtype="DIR_PATH",
+        update=update_cache_settings,
+    )
+
+    bpy.types.Scene.structure_cache_size_scene = IntProperty(
+        name="Cache Size (MB)",
+        description="Least recently used cache entries are removed above this size",
+        default=state.cache_max_megabytes,
+        min=16,
+        max=65536,
+        update=update_cache_settings,
+    )
+
+    bpy.types.Scene.structure_memory_size_scene = IntProperty(
+        name="Memory (MB)",
+        description="Parsed atoms and bond candidates of loaded structures are kept in memory up to this size, "
+        "least recently shown dropped first",
+        default=state.memory_cache_megabytes,
+        min=64,
+        max=65536,
+        update=update_cache_settings,
+    )
+
+    bpy.types.Scene.show_performance_scene = BoolProperty(
+        name="Show Performance",
+        description="Show timing and memory of the last load and update",
+        default=False,
+    )
+
+    bpy.types.Scene.record_performance_scene = BoolProperty(
+        name="Record Performance",
+        description="Record wall time per stage, and the datablocks created by loads and structural edits",
+        default=state.record_performance,
+        update=update_performance_settings,
+    )
+
+    bpy.types.Scene.track_memory_scene = BoolProperty(
+        name="Track Memory",
+        description="Trace Python allocations to report peak memory; slows every recorded operation",
+        default=state.track_memory,
+        update=update_performance_settings,
+    )
+
+    bpy.types.Scene.capture_profile_scene = BoolProperty(
+        name="Capture cProfile",
+        description="Run recorded stages under cProfile and keep the top functions with each report",
+        default=state.capture_profile,
+        update=update_performance_settings,
+    )
 
 
 def unregister_scene_properties():
@@ -136,6 +280,19 @@ def unregister_scene_properties():
         "atom_translucency_scene",
         "atom_glossiness_scene",
         "material_style_scene",
+        "atom_display_mode_scene",
+        "atom_lod_scene",
+        "viewport_proxy_scene",
+        "supercell_scene",
+        "watch_file_scene",
+        "structure_cache_enabled_scene",
+        "structure_cache_dir_scene",
+        "structure_cache_size_scene",
+        "structure_memory_size_scene",
+        "show_performance_scene",
+        "record_performance_scene",
+        "track_memory_scene",
+        "capture_profile_scene",
     ]:
         if hasattr(bpy.types.Scene, name):
             delattr(bpy.types.Scene, name)
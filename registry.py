@@ -0,0 +1,99 @@
+from typing import Dict, List, Tuple
+
+import bpy
+
+ROLE_ATOM = "atom"
+ROLE_BOND = "bond"
+ROLE_COLLECTION = "collection"
+ROLE_MATERIAL = "material"
+ROLE_SPHERE = "sphere"
+ROLE_STRUCTURE = "structure"
+ROLE_IMAGE = "image"
+ROLE_DATA = "data"
+
+ROLE_KEY = "atoms_visualizer_role"
+ELEMENT_KEY = "atoms_visualizer_element"
+STRUCTURE_KEY = "atoms_visualizer_structure"
+
+
+def is_alive(datablock) -> bool:
+    try:
+        datablock.name
+        return True
+    except ReferenceError:
+        return False
+
+
+class SceneRegistry:
+    def __init__(self):
+        self.structure_key = ""
+        self._objects: Dict[Tuple[str, str], List[object]] = {}
+        self._datablocks: Dict[Tuple[str, str], object] = {}
+
+    def reset(self, structure_key: str) -> None:
+        self.structure_key = structure_key
+        self._objects = {}
+        self._datablocks = {}
+
+    def add_object(self, role: str, element: str, obj) -> None:
+        self._tag(obj, role, element)
+        self._objects.setdefault((role, element), []).append(obj)
+
+    def objects(self, role: str, element: str = "") -> List[object]:
+        objects = self._objects.get((role, element), [])
+        if not all(is_alive(obj) for obj in objects):
+            self.rebuild_from_data()
+            objects = self._objects.get((role, element), [])
+        return objects
+
+    def remove_objects(self, role: str, element: str = "") -> None:
+        self._objects.pop((role, element), None)
+
+    def first_object(self, role: str, element: str = ""):
+        # Only the returned object needs to be alive, so a large element is not scanned
+        objects = self._objects.get((role, element), [])
+        if objects and is_alive(objects[0]):
+            return objects[0]
+        objects = self.objects(role, element)
+        return objects[0] if objects else None
+
+    def set_datablock(self, role: str, element: str, datablock) -> None:
+        self._tag(datablock, role, element)
+        self._datablocks[(role, element)] = datablock
+
+    def datablock(self, role: str, element: str = ""):
+        datablock = self._datablocks.get((role, element))
+        if datablock is not None and not is_alive(datablock):
+            self.rebuild_from_data()
+            datablock = self._datablocks.get((role, element))
+        return datablock
+
+    def owned_objects(self) -> List[object]:
+        return [obj for objects in self._objects.values() for obj in objects if is_alive(obj)]
+
+    def owned_datablocks(self) -> List[Tuple[str, object]]:
+        return [(role, datablock) for (role, _), datablock in self._datablocks.items() if is_alive(datablock)]
+
+    def rebuild_from_data(self) -> None:
+        # Undo and file reloads invalidate cached references; the ID tags survive both
+        self._objects = {}
+        self._datablocks = {}
+        for obj in bpy.data.objects:
+            if self._owns(obj):
+                self._objects.setdefault((obj[ROLE_KEY], obj[ELEMENT_KEY]), []).append(obj)
+        for datablocks in (bpy.data.collections, bpy.data.materials, bpy.data.meshes):
+            for datablock in datablocks:
+                if self._owns(datablock):
+                    self._datablocks[(datablock[ROLE_KEY], datablock[ELEMENT_KEY])] = datablock
+
+    def _tag(self, datablock, role: str, element: str) -> None:
+        datablock[ROLE_KEY] = role
+        datablock[ELEMENT_KEY] = element
+        datablock[STRUCTURE_KEY] = self.structure_key
+
+    def _owns(self, datablock) -> bool:
+        return (
+            datablock.get(STRUCTURE_KEY) == self.structure_key
+            and ROLE_KEY in datablock
+            and ELEMENT_KEY in datablock
+        )
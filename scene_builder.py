@@ -1,88 +1,365 @@
+import itertools
 import math
+from typing import Dict, NamedTuple, Optional
 
 import bpy
 import mathutils
+import numpy as np
 
-from .state import VisualizerState
+from .geometry import bond_vertices, cylinder_topology, icosphere
+from .lod import LevelOfDetail, resolve_level_of_detail
+from .registry import (
+    ROLE_ATOM,
+    ROLE_BOND,
+    ROLE_COLLECTION,
+    ROLE_DATA,
+    ROLE_IMAGE,
+    ROLE_MATERIAL,
+    ROLE_SPHERE,
+    ROLE_STRUCTURE,
+    SceneRegistry,
+)
+from .state import MAX_BOND_CUTOFF, VisualizerState
+from .structure import AtomArrays
+
+ATOM_INSTANCER_NAME = "AtomsVisualizer_AtomInstancer"
+POINT_CLOUD_NAME = "AtomsVisualizer_PointCloud"
+REGION_OBJECT_NAME = "AtomsVisualizer_Region"
+COLOR_ATTRIBUTE = "atom_color"
+ATOM_MATERIAL_NAME = "AtomsVisualizer_AtomMaterial"
+ATOM_COLOR_NODE_NAME = "AtomsVisualizer_AtomColor"
+ATOM_SPHERE_NAME = "AtomsVisualizer_AtomSphere"
+SPHERE_LEVEL_KEY = "atoms_visualizer_sphere_level"
+ATOM_INDEX_KEY = "atoms_visualizer_index"
+BOND_OBJECT_NAME = "AtomsVisualizer_Bonds"
+STRUCTURE_COLLECTION_NAME = "AtomsVisualizer_Structure"
+SUPERCELL_COLLECTION_SUFFIX = "_Supercell"
+BOND_SEGMENTS_KEY = "atoms_visualizer_bond_segments"
+BOND_CAPACITY_MARGIN = 0.5
+INSTANCING_ATOM_THRESHOLD = 1000
+POINT_CLOUD_ATOM_THRESHOLD = 300_000
+REGION_SIZE_FRACTION = 0.25
+
+
+class PreparedBondMesh(NamedTuple):
+    cutoff: float
+    thickness: float
+    visible: int
+    segments: int
+    vertices: np.ndarray
+    loop_vertices: np.ndarray
+    loop_starts: np.ndarray
+    loop_totals: np.ndarray
 
 
 class StructureSceneBuilder:
     def __init__(self, app_state: VisualizerState):
         self.state = app_state
+        self.registry = SceneRegistry()
+        # One registry per loaded structure; self.registry is the active one
+        self._registries: Dict[str, SceneRegistry] = {}
+        self._material_inputs: Dict[str, float] = {}
+
+    def use_structure(self, structure_key: str) -> None:
+        self.registry = self.registry_for(structure_key)
+
+    def registry_for(self, structure_key: str) -> SceneRegistry:
+        registry = self._registries.get(structure_key)
+        if registry is None:
+            registry = SceneRegistry()
+            registry.reset(structure_key)
+            self._registries[structure_key] = registry
+        return registry
+
+    def forget_structures(self) -> None:
+        self._registries = {}
+        self.registry = SceneRegistry()
+
+    def remove_structure(self, structure_key: str) -> None:
+        registry = self.registry_for(structure_key)
+        registry.rebuild_from_data()
+        meshes = {}
+        for obj in registry.owned_objects():
+            if obj.type == "MESH":
+                meshes[obj.data.name] = obj.data
+            bpy.data.objects.remove(obj, do_unlink=True)
+        for role, datablock in registry.owned_datablocks():
+            if role in (ROLE_STRUCTURE, ROLE_COLLECTION, ROLE_IMAGE):
+                bpy.data.collections.remove(datablock)
+            elif role in (ROLE_SPHERE, ROLE_DATA):
+                meshes[datablock.name] = datablock
+            # The atom material is shared by every structure and stays
+        for mesh in meshes.values():
+            bpy.data.meshes.remove(mesh)
+
+        del self._registries[structure_key]
+        if self.registry is registry:
+            self.registry = SceneRegistry()
 
     def create_atom_spheres(self) -> None:
-        for index, atom_data in enumerate(self.state.atoms):
-            element, x, y, z = atom_data
+        display = self._atom_display()
+        if display == "POINTS":
+            group = self._ensure_point_cloud_node_group()
+        elif display == "INSTANCED":
+            group = self._ensure_atom_instancer_node_group()
+        else:
+            group = None
+        if group is not None:
+            self._create_instanced_atoms(group)
+            return
+
+        # Every atom object links the same unit sphere; size comes from object scale
+        sphere = self._ensure_atom_sphere()
+        structure = self.state.structure
+        for element_index, element in enumerate(structure.elements):
             if element not in self.state.atom_info:
                 continue
 
-            atomic_radius = self.state.atom_info[element]["radius"]
-            bpy.ops.mesh.primitive_uv_sphere_add(
-                radius=1.0,
-                location=(x, y, z),
-                scale=(atomic_radius, atomic_radius, atomic_radius),
-            )
-            atom_object = bpy.context.active_object
-            atom_object.name = f"{element}_{index + 1}"
-            self.apply_shiny_geometry_style(atom_object)
-
+            self._add_atom_objects(element, np.flatnonzero(structure.element_mask(element_index)), sphere)
             if element not in self.state.current_atoms_info:
                 self.state.current_atoms_info[element] = self.state.atom_info[element]
 
-    def create_bonds(self) -> None:
-        for bond in self._list_bonds():
-            self._create_cylinder_between_points(bond["elem1_pos"], bond["elem2_pos"], name="bond")
+    def update_changed_atoms(self, previous: AtomArrays) -> None:
+        # Atoms are matched by index, so a rewritten file that keeps its atom order only touches what changed
+        structure = self.state.structure
+        group = self._built_node_group(previous.elements)
+        elements = list(structure.elements) + [elem for elem in previous.elements if elem not in structure.elements]
+        for element in elements:
+            if element in structure.elements and element not in self.state.atom_info:
+                continue
+            old_indices = _element_atom_indices(previous, element)
+            new_indices = _element_atom_indices(structure, element)
+            objects = self.registry.objects(ROLE_ATOM, element)
+            if not objects:
+                if len(new_indices) > 0:
+                    self._create_element_atoms(element, new_indices, group)
+            elif objects[0].modifiers.get(ATOM_INSTANCER_NAME) is not None:
+                self._update_element_points(objects[0], element, previous, old_indices, new_indices)
+            else:
+                self._update_element_objects(objects, element, previous, old_indices, new_indices)
 
-    def organize_into_collections(self) -> None:
+    def set_element_radius(self, element, radius) -> None:
+        for obj in self.registry.objects(ROLE_ATOM, element):
+            if obj.modifiers.get(ATOM_INSTANCER_NAME) is not None:
+                self._write_point_radius(obj.data, radius)
+            else:
+                obj.scale = (radius, radius, radius)
+
+    def update_atom_positions(self) -> None:
+        structure = self.state.structure
+        for element_index, element in enumerate(structure.elements):
+            atom_object = self.registry.first_object(ROLE_ATOM, element)
+            if atom_object is None or atom_object.modifiers.get(ATOM_INSTANCER_NAME) is None:
+                continue
+            element_positions = structure.positions[structure.element_mask(element_index)]
+            if len(element_positions) != len(atom_object.data.vertices):
+                continue
+            atom_object.data.vertices.foreach_set("co", element_positions.astype(np.float32).ravel())
+            atom_object.data.update()
+
+        self._write_bond_vertices()
+
+    def level_of_detail(self, structure: AtomArrays, atom_info) -> LevelOfDetail:
+        # Pure NumPy like prepare_bond_mesh, so background loads can resolve it off the main thread
+        _, structure_radius = _bounding_sphere(structure, atom_info)
+        radii = [float(atom_info.get(elem, {}).get("radius", 1.0)) for elem in structure.elements]
+        return resolve_level_of_detail(
+            self.state.atom_lod,
+            len(structure),
+            max(radii, default=1.0),
+            self.state.bond_thickness / 2,
+            structure_radius,
+            self.state.render_resolution,
+            self.state.viewport_proxy,
+        )
+
+    def apply_level_of_detail(self) -> None:
+        lod = self.state.level_of_detail
+        for element in self.state.elem_list:
+            for obj in self.registry.objects(ROLE_ATOM, element):
+                instancer = obj.modifiers.get(ATOM_INSTANCER_NAME)
+                if instancer is not None:
+                    self._set_modifier_input(instancer, "Viewport Subdivisions", lod.viewport_level)
+                    self._set_modifier_input(instancer, "Render Subdivisions", lod.render_level)
+
+        sphere = self.registry.datablock(ROLE_SPHERE)
+        if sphere is not None:
+            self._write_sphere_mesh(sphere, lod.render_level)
+
+        bond_object = self.registry.first_object(ROLE_BOND)
+        if bond_object is not None and self._bond_mesh_capacity(bond_object.data) < 0:
+            self._write_bond_mesh(self._bond_capacity_for(self.state.bond_cutoff_distance))
+
+    def has_point_cloud(self) -> bool:
+        # Called on every panel redraw; a structure draws all its elements one way, so one object decides
         for element in self.state.elem_list:
-            collection = bpy.data.collections.get(element)
-            if collection is None:
-                collection = bpy.data.collections.new(element)
-                bpy.context.scene.collection.children.link(collection)
+            atom_object = self.registry.first_object(ROLE_ATOM, element)
+            if atom_object is not None:
+                return self._point_cloud_modifier(atom_object) is not None
+        return False
+
+    def add_point_region(self):
+        region = bpy.data.objects.get(REGION_OBJECT_NAME)
+        if region is None or region.type != "EMPTY":
+            region = bpy.data.objects.new(REGION_OBJECT_NAME, None)
+            region.empty_display_type = "CUBE"
+            bpy.context.scene.collection.objects.link(region)
+
+            center, radius = self._structure_center_and_radius()
+            size = radius * REGION_SIZE_FRACTION
+            region.location = center
+            region.scale = (size, size, size)
+
+        for modifier in self._point_cloud_modifiers():
+            self._set_region_inputs(modifier, region)
+        return region
+
+    def clear_point_region(self) -> None:
+        for modifier in self._point_cloud_modifiers():
+            self._set_region_inputs(modifier, None)
+        region = bpy.data.objects.get(REGION_OBJECT_NAME)
+        if region is not None:
+            bpy.data.objects.remove(region, do_unlink=True)
+
+    def prepare_bond_mesh(self, structure: AtomArrays, candidates, segments: int) -> PreparedBondMesh:
+        # Pure NumPy so background loads can build the arrays off the main thread
+        first, second, distances, shifts = candidates
+        cutoff = self.state.bond_cutoff_distance
+        thickness = self.state.bond_thickness
+        visible = _bond_count_below(distances, cutoff)
+        capacity = _bond_count_below(distances, min(cutoff + BOND_CAPACITY_MARGIN, MAX_BOND_CUTOFF))
+        vertices = bond_vertices(
+            structure.positions,
+            first[:visible],
+            second[:visible],
+            first[visible:capacity],
+            thickness / 2,
+            segments,
+            _image_offsets(shifts[:visible], structure.lattice),
+        )
+        return PreparedBondMesh(
+            cutoff, thickness, visible, segments, vertices, *cylinder_topology(capacity, segments)
+        )
+
+    def create_bonds(self, prepared: Optional[PreparedBondMesh] = None) -> None:
+        if "Cube" in bpy.data.objects:
+            bpy.data.objects.remove(bpy.data.objects["Cube"], do_unlink=True)
+
+        self.select_visible_bonds()
+        if prepared is not None and (
+            prepared.cutoff != self.state.bond_cutoff_distance
+            or prepared.thickness != self.state.bond_thickness
+            or prepared.visible != len(self.state.bond_first)
+            or prepared.segments != self.state.level_of_detail.bond_segments
+        ):
+            # The sliders moved while the arrays were being built
+            prepared = None
+        self._write_bond_mesh(self._bond_capacity_for(self.state.bond_cutoff_distance), prepared)
+
+    def update_bond_cutoff(self) -> None:
+        self.select_visible_bonds()
+        bond_object = self.registry.first_object(ROLE_BOND)
+        if bond_object is None:
+            return
+
+        if len(self.state.bond_first) > self._bond_mesh_capacity(bond_object.data):
+            self._write_bond_mesh(self._bond_capacity_for(self.state.bond_cutoff_distance))
+        else:
+            self._write_bond_vertices()
+
+    def update_bond_thickness(self) -> None:
+        self._write_bond_vertices()
 
-            for obj in bpy.context.scene.objects:
-                if obj.type == "MESH" and obj.name.startswith(element + "_"):
-                    for owner_collection in obj.users_collection:
-                        owner_collection.objects.unlink(obj)
-                    collection.objects.link(obj)
+    def select_visible_bonds(self) -> None:
+        count = _bond_count_below(self.state.bond_candidate_distances, self.state.bond_cutoff_distance)
+        self.state.bond_first = self.state.bond_candidate_first[:count]
+        self.state.bond_second = self.state.bond_candidate_second[:count]
+
+    def update_supercell(self) -> None:
+        for image in self.registry.objects(ROLE_IMAGE):
+            bpy.data.objects.remove(image, do_unlink=True)
+        self.registry.remove_objects(ROLE_IMAGE)
+
+        lattice = self.state.structure.lattice
+        if lattice is None or tuple(self.state.supercell) == (1, 1, 1):
+            return
+
+        # Periodic images are empties instancing the base cell, so they cost no mesh data
+        structure_collection = self._ensure_structure_collection()
+        image_collection = self.registry.datablock(ROLE_IMAGE)
+        if image_collection is None:
+            # Beside the structure collection, not inside it, or the images would instance themselves
+            image_collection = bpy.data.collections.new(structure_collection.name + SUPERCELL_COLLECTION_SUFFIX)
+            bpy.context.scene.collection.children.link(image_collection)
+            self.registry.set_datablock(ROLE_IMAGE, "", image_collection)
+
+        for shift in itertools.product(*(range(count) for count in self.state.supercell)):
+            if not any(shift):
+                continue
+            image = bpy.data.objects.new(f"{image_collection.name}_{shift[0]}_{shift[1]}_{shift[2]}", None)
+            image.instance_type = "COLLECTION"
+            image.instance_collection = structure_collection
+            image.location = (np.asarray(shift, dtype=np.float64) @ lattice).tolist()
+            image_collection.objects.link(image)
+            self.registry.add_object(ROLE_IMAGE, "", image)
+
+    def organize_into_collections(self) -> None:
+        for element in self.state.elem_list:
+            collection = self._ensure_element_collection(element)
+            for obj in self.registry.objects(ROLE_ATOM, element):
+                if collection not in obj.users_collection:
+                    self._move_to_collection(obj, collection)
 
     def apply_materials(self) -> None:
+        material = self._ensure_atom_material()
+        self.update_material_style()
+
+        sphere = self.registry.datablock(ROLE_SPHERE)
+        if sphere is not None:
+            _set_mesh_material(sphere, material)
         for element in self.state.elem_list:
             if element in self.state.atom_info:
-                color = self.state.atom_info[element]["color"]
-                self.apply_collection_color(element, color)
+                self._apply_element_material(element, material)
+
+    def _apply_element_material(self, element, material) -> None:
+        for obj in self.registry.objects(ROLE_ATOM, element):
+            instancer = obj.modifiers.get(ATOM_INSTANCER_NAME)
+            if instancer is None:
+                # Per-atom objects share the sphere mesh, which carries the material
+                break
+            self._set_modifier_input(instancer, "Material", material)
+            _set_mesh_material(obj.data, material)
+        self.apply_collection_color(element, self.state.atom_info[element]["color"])
 
     def apply_collection_color(self, collection_name, color) -> None:
-        material_name = f"{collection_name}_Material"
-        material = bpy.data.materials.get(material_name)
-        if material is None:
-            material = bpy.data.materials.new(name=material_name)
+        # The shared material reads the color per atom, so nothing here touches the material
+        for obj in self.registry.objects(ROLE_ATOM, collection_name):
+            if obj.modifiers.get(ATOM_INSTANCER_NAME) is not None:
+                self._write_point_color(obj.data, color)
+            else:
+                obj.color = (color[0], color[1], color[2], 1.0)
 
-        material.use_nodes = True
+    def update_material_style(self) -> None:
+        material = self._ensure_atom_material()
         bsdf = material.node_tree.nodes.get("Principled BSDF")
         if bsdf:
-            bsdf.inputs["Base Color"].default_value = color
-            self._apply_material_style(bsdf, color)
+            # Only inputs whose value moved are written, so a slider drag costs a few socket writes
+            for input_name, value in self._material_style_inputs().items():
+                if self._material_inputs.get(input_name) != value:
+                    self._set_input(bsdf, input_name, value)
+                    self._material_inputs[input_name] = value
 
-        if self.state.atom_translucency > 0.001 and hasattr(material, "blend_method"):
-            material.blend_method = "BLEND"
-            if hasattr(material, "shadow_method"):
+        if not hasattr(material, "blend_method"):
+            return
+        blend_method = "BLEND" if self.state.atom_translucency > 0.001 else "OPAQUE"
+        if material.blend_method != blend_method:
+            material.blend_method = blend_method
+            if blend_method == "BLEND" and hasattr(material, "shadow_method"):
                 material.shadow_method = "HASHED"
-        elif hasattr(material, "blend_method"):
-            material.blend_method = "OPAQUE"
 
-        collection = bpy.data.collections.get(collection_name)
-        if collection is None:
-            return
-
-        for obj in collection.objects:
-            if obj.type != "MESH":
-                continue
-            self.apply_shiny_geometry_style(obj)
-            if len(obj.data.materials) == 0:
-                obj.data.materials.append(material)
-            else:
-                obj.data.materials[0] = material
+    def forget_material_inputs(self) -> None:
+        # Another file's material may hold different values, so the next style update writes everything
+        self._material_inputs = {}
 
     def setup_default_sun_light(self) -> None:
         center, radius = self._structure_center_and_radius()
@@ -146,186 +423,657 @@ class StructureSceneBuilder:
                 c = self.state.current_atoms_info[elem].get("color", (1.0, 1.0, 1.0, 1.0))
                 color_item.value = (c[0], c[1], c[2], c[3])
 
-    def apply_shiny_geometry_style(self, obj) -> None:
-        if obj.type != "MESH":
-            return
+    def _ensure_atom_material(self):
+        material = self.registry.datablock(ROLE_MATERIAL)
+        if material is None:
+            material = bpy.data.materials.get(ATOM_MATERIAL_NAME)
+            if material is None:
+                material = bpy.data.materials.new(name=ATOM_MATERIAL_NAME)
+            material.use_nodes = True
+            self._link_atom_color(material)
+            self.registry.set_datablock(ROLE_MATERIAL, "", material)
+            self._material_inputs = {}
+        return material
 
-        for poly in obj.data.polygons:
-            poly.use_smooth = True
+    def _link_atom_color(self, material) -> None:
+        nodes = material.node_tree.nodes
+        links = material.node_tree.links
+        bsdf = nodes.get("Principled BSDF")
+        if bsdf is None or nodes.get(ATOM_COLOR_NODE_NAME) is not None:
+            return
 
         try:
-            group = self._ensure_shiny_geo_node_group()
-            if group is None:
-                return
-            modifier = obj.modifiers.get("AtomsVisualizer_GeoShiny")
-            if modifier is None:
-                modifier = obj.modifiers.new(name="AtomsVisualizer_GeoShiny", type="NODES")
-            modifier.node_group = group
+            # Per-atom objects carry the color on the object, instances on the instancer and point-cloud
+            # points on the point; each attribute's alpha is 1 where it exists and 0 where it does not
+            object_node = nodes.new("ShaderNodeObjectInfo")
+            object_node.location = (-900, 300)
+            color = object_node.outputs["Color"]
+            for offset, attribute_type in enumerate(("INSTANCER", "GEOMETRY")):
+                attribute_node = nodes.new("ShaderNodeAttribute")
+                attribute_node.location = (-900, 100 - 200 * offset)
+                attribute_node.attribute_type = attribute_type
+                attribute_node.attribute_name = COLOR_ATTRIBUTE
+                mix_node, color = _add_color_mix(
+                    nodes, links, attribute_node.outputs["Alpha"], color, attribute_node.outputs["Color"]
+                )
+                mix_node.location = (-600 + 200 * offset, 200)
+            mix_node.name = ATOM_COLOR_NODE_NAME
+
+            links.new(color, bsdf.inputs["Base Color"])
+            for input_name in ("Emission Color", "Emission"):
+                if input_name in bsdf.inputs:
+                    links.new(color, bsdf.inputs[input_name])
         except Exception:
             return
 
-    def _apply_material_style(self, bsdf, color) -> None:
+    def _material_style_inputs(self) -> Dict[str, float]:
         style = self.state.material_style
 
-        # Reset all style-affected inputs to neutral defaults so stale values never bleed through
-        self._set_input(bsdf, "Metallic", 0.0)
-        self._set_input(bsdf, "Transmission", 0.0)
-        self._set_input(bsdf, "Roughness", 0.5)
-        self._set_input(bsdf, "Specular", 0.5)
-        self._set_input(bsdf, "IOR", 1.45)
-        self._set_input(bsdf, "Emission Strength", 0.0)
-        self._set_input(bsdf, "Emission Color", (0.0, 0.0, 0.0, 1.0))
-        self._set_input(bsdf, "Emission", (0.0, 0.0, 0.0, 1.0))
-
+        # Every style sets every input it can affect so stale values never bleed through
+        inputs = {
+            "Metallic": 0.0,
+            "Transmission": 0.0,
+            "Roughness": 0.5,
+            "Specular": 0.5,
+            "IOR": 1.45,
+            "Emission Strength": 0.0,
+        }
         if style == "METAL":
-            self._set_input(bsdf, "Metallic", 0.95)
-            self._set_input(bsdf, "Transmission", 0.0)
-            self._set_input(bsdf, "Roughness", max(0.02, 1.0 - self.state.atom_glossiness))
-            self._set_input(bsdf, "Specular", 0.85)
+            inputs.update(Metallic=0.95, Roughness=max(0.02, 1.0 - self.state.atom_glossiness), Specular=0.85)
         elif style == "GLASS":
-            self._set_input(bsdf, "Metallic", 0.0)
-            self._set_input(bsdf, "Transmission", max(0.65, self.state.atom_translucency))
-            self._set_input(bsdf, "Roughness", 0.03)
-            self._set_input(bsdf, "Specular", 1.0)
-            self._set_input(bsdf, "IOR", 1.45)
+            inputs.update(Transmission=max(0.65, self.state.atom_translucency), Roughness=0.03, Specular=1.0)
         elif style == "PLASTIC":
-            self._set_input(bsdf, "Metallic", 0.0)
-            self._set_input(bsdf, "Transmission", 0.0)
-            self._set_input(bsdf, "Roughness", 0.22)
-            self._set_input(bsdf, "Specular", 0.65)
+            inputs.update(Roughness=0.22, Specular=0.65)
         elif style == "MATTE":
-            self._set_input(bsdf, "Metallic", 0.0)
-            self._set_input(bsdf, "Transmission", 0.0)
-            self._set_input(bsdf, "Roughness", 0.82)
-            self._set_input(bsdf, "Specular", 0.35)
+            inputs.update(Roughness=0.82, Specular=0.35)
         elif style == "EMISSION":
-            self._set_input(bsdf, "Metallic", 0.0)
-            self._set_input(bsdf, "Transmission", 0.0)
-            self._set_input(bsdf, "Roughness", 0.15)
-            self._set_input(bsdf, "Specular", 0.7)
-            self._set_input(bsdf, "Emission", color)
-            self._set_input(bsdf, "Emission Color", color)
-            self._set_input(bsdf, "Emission Strength", 0.8)
+            inputs.update(Roughness=0.15, Specular=0.7)
+            inputs["Emission Strength"] = 0.8
         else:
-            self._set_input(bsdf, "Metallic", self.state.atom_metallic)
-            self._set_input(bsdf, "Transmission", self.state.atom_translucency)
-            self._set_input(bsdf, "Roughness", 1.0 - self.state.atom_glossiness)
-            self._set_input(bsdf, "Specular", 0.75)
+            inputs.update(
+                Metallic=self.state.atom_metallic,
+                Transmission=self.state.atom_translucency,
+                Roughness=1.0 - self.state.atom_glossiness,
+                Specular=0.75,
+            )
+        return inputs
 
     def _set_input(self, bsdf, input_name, value) -> None:
         if input_name in bsdf.inputs:
             bsdf.inputs[input_name].default_value = value
 
-    def _ensure_shiny_geo_node_group(self):
-        group_name = "AtomsVisualizer_GeoShiny"
-        group = bpy.data.node_groups.get(group_name)
-        if group is None:
-            try:
-                group = bpy.data.node_groups.new(group_name, "GeometryNodeTree")
-            except Exception:
-                return None
+    def _ensure_structure_collection(self):
+        collection = self.registry.datablock(ROLE_STRUCTURE)
+        if collection is None:
+            # Each structure gets its own root collection; Blender suffixes repeated file names
+            collection = bpy.data.collections.new(self.state.structure_name or STRUCTURE_COLLECTION_NAME)
+            bpy.context.scene.collection.children.link(collection)
+            self.registry.set_datablock(ROLE_STRUCTURE, "", collection)
+            self.state.structure_name = collection.name
+        return collection
 
-        if len(group.nodes) > 0:
-            return group
+    def _ensure_element_collection(self, element):
+        collection = self.registry.datablock(ROLE_COLLECTION, element)
+        if collection is None:
+            collection = bpy.data.collections.new(element)
+            self._ensure_structure_collection().children.link(collection)
+            self.registry.set_datablock(ROLE_COLLECTION, element, collection)
+        return collection
 
-        nodes = group.nodes
-        links = group.links
+    def _move_to_collection(self, obj, collection) -> None:
+        for owner_collection in obj.users_collection:
+            owner_collection.objects.unlink(obj)
+        collection.objects.link(obj)
+
+    def _ensure_atom_sphere(self):
+        sphere = self.registry.datablock(ROLE_SPHERE)
+        if sphere is None:
+            sphere = bpy.data.meshes.new(ATOM_SPHERE_NAME)
+            self.registry.set_datablock(ROLE_SPHERE, "", sphere)
+        self._write_sphere_mesh(sphere, self.state.level_of_detail.render_level)
+        return sphere
+
+    def _write_sphere_mesh(self, mesh, level: int) -> None:
+        if mesh.get(SPHERE_LEVEL_KEY) == level:
+            return
+
+        vertices, faces = icosphere(level)
+        _write_mesh_geometry(
+            mesh,
+            vertices,
+            faces.ravel(),
+            np.arange(0, faces.size, 3),
+            np.full(len(faces), 3),
+        )
+        mesh.polygons.foreach_set("use_smooth", np.ones(len(faces), dtype=bool))
+        mesh[SPHERE_LEVEL_KEY] = level
+
+    def _atom_display(self) -> str:
+        mode = self.state.atom_display_mode
+        atom_count = len(self.state.structure)
+        if mode == "AUTO":
+            if atom_count > POINT_CLOUD_ATOM_THRESHOLD:
+                return "POINTS"
+            if atom_count > INSTANCING_ATOM_THRESHOLD:
+                return "INSTANCED"
+            mode = "OBJECTS"
+        if mode == "OBJECTS" and self.state.trajectory is not None:
+            # Playback moves vertices in bulk, which needs one point mesh per element
+            return "INSTANCED"
+        return mode
+
+    def _create_instanced_atoms(self, group) -> None:
+        structure = self.state.structure
+        for element_index, element in enumerate(structure.elements):
+            if element not in self.state.atom_info:
+                continue
+
+            self._add_point_object(element, structure.element_mask(element_index), group)
+            if element not in self.state.current_atoms_info:
+                self.state.current_atoms_info[element] = self.state.atom_info[element]
+
+    def _add_point_object(self, element, mask, group):
+        mesh = bpy.data.meshes.new(f"{element}_atoms")
+        self._write_point_mesh(mesh, element, mask)
+
+        atom_object = bpy.data.objects.new(f"{element}_atoms", mesh)
+        self._ensure_element_collection(element).objects.link(atom_object)
+        self.registry.add_object(ROLE_ATOM, element, atom_object)
+        modifier = atom_object.modifiers.new(name=ATOM_INSTANCER_NAME, type="NODES")
+        modifier.node_group = group
+        self._set_modifier_input(modifier, "Viewport Subdivisions", self.state.level_of_detail.viewport_level)
+        self._set_modifier_input(modifier, "Render Subdivisions", self.state.level_of_detail.render_level)
+        region = bpy.data.objects.get(REGION_OBJECT_NAME)
+        if region is not None:
+            self._set_region_inputs(modifier, region)
+        return atom_object
+
+    def _write_point_mesh(self, mesh, element, mask) -> None:
+        structure = self.state.structure
+        element_positions = structure.positions[mask]
+        mesh.clear_geometry()
+        mesh.vertices.add(len(element_positions))
+        mesh.vertices.foreach_set("co", element_positions.astype(np.float32).ravel())
+
+        for name, data_type in (("radius", "FLOAT"), ("element", "INT"), (COLOR_ATTRIBUTE, "FLOAT_COLOR")):
+            attribute = mesh.attributes.get(name)
+            if attribute is not None:
+                mesh.attributes.remove(attribute)
+            mesh.attributes.new(name=name, type=data_type, domain="POINT")
+        if hasattr(mesh, "color_attributes"):
+            # Lets Solid shading with Attribute color show element colors
+            mesh.color_attributes.active_color = mesh.attributes[COLOR_ATTRIBUTE]
+        # Radius edits are kept in current_atoms_info, which a rewrite must not lose
+        info = self.state.current_atoms_info.get(element, self.state.atom_info[element])
+        self._write_point_radius(mesh, info["radius"])
+        self._write_point_color(mesh, self.state.atom_info[element]["color"])
+        mesh.attributes["element"].data.foreach_set(
+            "value", np.full(len(element_positions), structure.elements.index(element), dtype=np.int32)
+        )
+        mesh.update()
+
+    def _add_atom_objects(self, element, indices, sphere) -> None:
+        structure = self.state.structure
+        info = self.state.current_atoms_info.get(element, self.state.atom_info[element])
+        atomic_radius = info["radius"]
+        collection = self._ensure_element_collection(element)
+        for index in indices:
+            atom_object = bpy.data.objects.new(f"{element}_{index + 1}", sphere)
+            atom_object.location = tuple(structure.positions[index])
+            atom_object.scale = (atomic_radius, atomic_radius, atomic_radius)
+            atom_object[ATOM_INDEX_KEY] = int(index)
+            collection.objects.link(atom_object)
+            self.registry.add_object(ROLE_ATOM, element, atom_object)
+
+    def _built_node_group(self, elements):
+        # New elements are drawn the way the rest of the structure already is
+        for element in elements:
+            atom_object = self.registry.first_object(ROLE_ATOM, element)
+            if atom_object is not None:
+                instancer = atom_object.modifiers.get(ATOM_INSTANCER_NAME)
+                return instancer.node_group if instancer is not None else None
+        display = self._atom_display()
+        if display == "POINTS":
+            return self._ensure_point_cloud_node_group()
+        if display == "INSTANCED":
+            return self._ensure_atom_instancer_node_group()
+        return None
+
+    def _create_element_atoms(self, element, indices, group) -> None:
+        structure = self.state.structure
+        if group is not None:
+            self._add_point_object(element, structure.element_mask(structure.elements.index(element)), group)
+        else:
+            self._add_atom_objects(element, indices, self._ensure_atom_sphere())
+        if element not in self.state.current_atoms_info:
+            self.state.current_atoms_info[element] = self.state.atom_info[element]
+        self._apply_element_material(element, self._ensure_atom_material())
+
+    def _update_element_points(self, atom_object, element, previous, old_indices, new_indices) -> None:
+        structure = self.state.structure
+        mesh = atom_object.data
+        if len(new_indices) == 0:
+            self.registry.remove_objects(ROLE_ATOM, element)
+            bpy.data.objects.remove(atom_object, do_unlink=True)
+            bpy.data.meshes.remove(mesh)
+        elif np.array_equal(old_indices, new_indices) and len(mesh.vertices) == len(new_indices):
+            # Same atoms in the same order: one bulk write of the positions, if any moved
+            if not np.array_equal(previous.positions[old_indices], structure.positions[new_indices]):
+                mesh.vertices.foreach_set("co", structure.positions[new_indices].astype(np.float32).ravel())
+                mesh.update()
+        else:
+            # A point mesh cannot insert or drop single vertices, so this element's mesh is rewritten
+            self._write_point_mesh(mesh, element, new_indices)
+
+    def _update_element_objects(self, objects, element, previous, old_indices, new_indices) -> None:
+        structure = self.state.structure
+        by_index = {obj.get(ATOM_INDEX_KEY): obj for obj in objects}
+        if None in by_index or len(by_index) != len(objects):
+            # Built before objects carried their atom index; start this element over
+            by_index = {}
+            for obj in objects:
+                bpy.data.objects.remove(obj, do_unlink=True)
+            old_indices = np.zeros(0, dtype=np.int64)
+
+        kept = np.intersect1d(old_indices, new_indices)
+        moved = kept[np.any(previous.positions[kept] != structure.positions[kept], axis=1)]
+        for index in moved:
+            by_index[int(index)].location = tuple(structure.positions[index])
+        for index in np.setdiff1d(old_indices, new_indices):
+            bpy.data.objects.remove(by_index.pop(int(index)), do_unlink=True)
+
+        self.registry.remove_objects(ROLE_ATOM, element)
+        for index in kept:
+            self.registry.add_object(ROLE_ATOM, element, by_index[int(index)])
+        added = np.setdiff1d(new_indices, old_indices)
+        if len(added) > 0:
+            self._add_atom_objects(element, added, self._ensure_atom_sphere())
+            color = self.state.atom_info[element]["color"]
+            for obj in self.registry.objects(ROLE_ATOM, element)[len(kept):]:
+                obj.color = (color[0], color[1], color[2], 1.0)
+
+    def _write_point_radius(self, mesh, radius) -> None:
+        attribute = mesh.attributes.get("radius")
+        if attribute is None:
+            return
+        attribute.data.foreach_set("value", np.full(len(mesh.vertices), radius, dtype=np.float32))
+        mesh.update()
+
+    def _write_point_color(self, mesh, color) -> None:
+        attribute = mesh.attributes.get(COLOR_ATTRIBUTE)
+        if attribute is None:
+            return
+        # Alpha stays 1: the material uses it to tell a written color from a missing attribute
+        colors = np.tile(np.array((color[0], color[1], color[2], 1.0), dtype=np.float32), (len(mesh.vertices), 1))
+        attribute.data.foreach_set("color", colors.ravel())
+        mesh.update()
+
+    def _ensure_atom_instancer_node_group(self):
+        group = bpy.data.node_groups.get(ATOM_INSTANCER_NAME)
+        if group is not None and len(group.nodes) > 0:
+            if self._group_input(group, "Render Subdivisions") is not None:
+                return group
+            # Built by an older version with a fixed UV sphere
+            bpy.data.node_groups.remove(group)
+            group = None
 
         try:
-            group.inputs.clear()
-            group.outputs.clear()
-            group.inputs.new("NodeSocketGeometry", "Geometry")
-            group.outputs.new("NodeSocketGeometry", "Geometry")
+            if group is None:
+                group = bpy.data.node_groups.new(ATOM_INSTANCER_NAME, "GeometryNodeTree")
+            nodes = group.nodes
+            links = group.links
+
+            self._new_group_socket(group, "Geometry", "INPUT", "NodeSocketGeometry")
+            self._new_group_socket(group, "Material", "INPUT", "NodeSocketMaterial")
+            self._new_group_socket(group, "Viewport Subdivisions", "INPUT", "NodeSocketInt")
+            self._new_group_socket(group, "Render Subdivisions", "INPUT", "NodeSocketInt")
+            self._new_group_socket(group, "Geometry", "OUTPUT", "NodeSocketGeometry")
+
+            input_node = nodes.new("NodeGroupInput")
+            output_node = nodes.new("NodeGroupOutput")
+            input_node.location = (-600, 0)
+            output_node.location = (400, 0)
+
+            _, sphere_output = self._add_sphere_nodes(group, input_node)
+            radius_node = _add_radius_node(nodes)
+
+            instance_node = nodes.new("GeometryNodeInstanceOnPoints")
+            instance_node.location = (100, 0)
+
+            links.new(input_node.outputs["Geometry"], instance_node.inputs["Points"])
+            links.new(sphere_output, instance_node.inputs["Instance"])
+            links.new(radius_node.outputs["Attribute"], instance_node.inputs["Scale"])
+            links.new(instance_node.outputs["Instances"], output_node.inputs["Geometry"])
         except Exception:
-            try:
-                interface = group.interface
-                for item in list(interface.items_tree):
-                    interface.remove(item)
-                interface.new_socket("Geometry", in_out="INPUT", socket_type="NodeSocketGeometry")
-                interface.new_socket("Geometry", in_out="OUTPUT", socket_type="NodeSocketGeometry")
-            except Exception:
-                return None
-
-        input_node = nodes.new("NodeGroupInput")
-        output_node = nodes.new("NodeGroupOutput")
-        input_node.location = (-220, 0)
-        output_node.location = (260, 0)
+            if group is not None:
+                bpy.data.node_groups.remove(group)
+            return None
+
+        return group
+
+    def _ensure_point_cloud_node_group(self):
+        group = bpy.data.node_groups.get(POINT_CLOUD_NAME)
+        if group is not None and len(group.nodes) > 0:
+            return group
 
         try:
-            smooth_node = nodes.new("GeometryNodeSetShadeSmooth")
-            smooth_node.location = (10, 0)
-            if "Shade Smooth" in smooth_node.inputs:
-                smooth_node.inputs["Shade Smooth"].default_value = True
-            links.new(input_node.outputs["Geometry"], smooth_node.inputs["Geometry"])
-            links.new(smooth_node.outputs["Geometry"], output_node.inputs["Geometry"])
+            if group is None:
+                group = bpy.data.node_groups.new(POINT_CLOUD_NAME, "GeometryNodeTree")
+            nodes = group.nodes
+            links = group.links
+
+            self._new_group_socket(group, "Geometry", "INPUT", "NodeSocketGeometry")
+            self._new_group_socket(group, "Material", "INPUT", "NodeSocketMaterial")
+            self._new_group_socket(group, "Viewport Subdivisions", "INPUT", "NodeSocketInt")
+            self._new_group_socket(group, "Render Subdivisions", "INPUT", "NodeSocketInt")
+            self._new_group_socket(group, "Region", "INPUT", "NodeSocketObject")
+            self._new_group_socket(group, "Use Region", "INPUT", "NodeSocketBool")
+            self._new_group_socket(group, "Geometry", "OUTPUT", "NodeSocketGeometry")
+
+            input_node = nodes.new("NodeGroupInput")
+            output_node = nodes.new("NodeGroupOutput")
+            input_node.location = (-1200, 0)
+            output_node.location = (700, 0)
+
+            is_viewport_node, sphere_output = self._add_sphere_nodes(group, input_node)
+            radius_node = _add_radius_node(nodes)
+
+            # Atoms inside the region's cube: |position - location| <= scale on every axis
+            region_node = nodes.new("GeometryNodeObjectInfo")
+            region_node.location = (-1000, 400)
+            position_node = nodes.new("GeometryNodeInputPosition")
+            position_node.location = (-1000, 200)
+            offset_node = nodes.new("ShaderNodeVectorMath")
+            offset_node.location = (-800, 300)
+            offset_node.operation = "SUBTRACT"
+            distance_node = nodes.new("ShaderNodeVectorMath")
+            distance_node.location = (-600, 300)
+            distance_node.operation = "ABSOLUTE"
+            inside_node = nodes.new("FunctionNodeCompare")
+            inside_node.location = (-400, 300)
+            inside_node.data_type = "VECTOR"
+            inside_node.mode = "ELEMENT"
+            inside_node.operation = "LESS_EQUAL"
+            in_region_node = _add_boolean_node(nodes, "AND", (-200, 300))
+
+            # Spheres when rendering or inside the region, plain points everywhere else in the viewport
+            rendering_node = _add_boolean_node(nodes, "NOT", (-200, 100))
+            spheres_node = _add_boolean_node(nodes, "OR", (0, 200))
+            points_node = _add_boolean_node(nodes, "NOT", (200, 200))
+
+            instance_node = nodes.new("GeometryNodeInstanceOnPoints")
+            instance_node.location = (300, 0)
+            to_points_node = nodes.new("GeometryNodeMeshToPoints")
+            to_points_node.location = (300, 300)
+            point_material_node = nodes.new("GeometryNodeSetMaterial")
+            point_material_node.location = (450, 300)
+            join_node = nodes.new("GeometryNodeJoinGeometry")
+            join_node.location = (550, 0)
+
+            links.new(input_node.outputs["Region"], region_node.inputs["Object"])
+            links.new(position_node.outputs["Position"], offset_node.inputs[0])
+            links.new(region_node.outputs["Location"], offset_node.inputs[1])
+            links.new(offset_node.outputs["Vector"], distance_node.inputs[0])
+            links.new(distance_node.outputs["Vector"], _enabled_socket(inside_node.inputs, "A"))
+            links.new(region_node.outputs["Scale"], _enabled_socket(inside_node.inputs, "B"))
+            links.new(input_node.outputs["Use Region"], in_region_node.inputs[0])
+            links.new(inside_node.outputs["Result"], in_region_node.inputs[1])
+            links.new(is_viewport_node.outputs["Is Viewport"], rendering_node.inputs[0])
+            links.new(rendering_node.outputs["Boolean"], spheres_node.inputs[0])
+            links.new(in_region_node.outputs["Boolean"], spheres_node.inputs[1])
+            links.new(spheres_node.outputs["Boolean"], points_node.inputs[0])
+
+            links.new(input_node.outputs["Geometry"], instance_node.inputs["Points"])
+            links.new(spheres_node.outputs["Boolean"], instance_node.inputs["Selection"])
+            links.new(sphere_output, instance_node.inputs["Instance"])
+            links.new(radius_node.outputs["Attribute"], instance_node.inputs["Scale"])
+
+            links.new(input_node.outputs["Geometry"], to_points_node.inputs["Mesh"])
+            links.new(points_node.outputs["Boolean"], to_points_node.inputs["Selection"])
+            links.new(radius_node.outputs["Attribute"], to_points_node.inputs["Radius"])
+            links.new(to_points_node.outputs["Points"], point_material_node.inputs["Geometry"])
+            links.new(input_node.outputs["Material"], point_material_node.inputs["Material"])
+
+            links.new(point_material_node.outputs["Geometry"], join_node.inputs["Geometry"])
+            links.new(instance_node.outputs["Instances"], join_node.inputs["Geometry"])
+            links.new(join_node.outputs["Geometry"], output_node.inputs["Geometry"])
         except Exception:
-            links.new(input_node.outputs["Geometry"], output_node.inputs["Geometry"])
+            if group is not None:
+                bpy.data.node_groups.remove(group)
+            return None
 
         return group
 
-    def _list_bonds(self):
-        bonds = []
-        num_atoms = len(self.state.atoms)
-        for ind1 in range(num_atoms):
-            elem1, x1, y1, z1 = self.state.atoms[ind1]
-            for ind2 in range(ind1 + 1, num_atoms):
-                elem2, x2, y2, z2 = self.state.atoms[ind2]
-                if elem2 in self.state.bond_info.get(elem1, []) or elem1 in self.state.bond_info.get(elem2, []):
-                    distance = ((x2 - x1) ** 2 + (y2 - y1) ** 2 + (z2 - z1) ** 2) ** 0.5
-                    if distance < self.state.bond_cutoff_distance:
-                        bonds.append({
-                            "elem1_pos": (x1, y1, z1),
-                            "elem2_pos": (x2, y2, z2),
-                        })
-        return bonds
-
-    def _create_cylinder_between_points(self, point1, point2, name="CustomCylinder"):
-        if "Cube" in bpy.data.objects:
-            bpy.data.objects.remove(bpy.data.objects["Cube"], do_unlink=True)
+    def _add_sphere_nodes(self, group, input_node):
+        nodes = group.nodes
+        links = group.links
 
-        p1 = mathutils.Vector(point1)
-        p2 = mathutils.Vector(point2)
-        distance = (p2 - p1).length
+        # Low-poly proxy in the viewport, full resolution only when rendering
+        is_viewport_node = nodes.new("GeometryNodeIsViewport")
+        is_viewport_node.location = (-1000, -220)
+        switch_node = nodes.new("GeometryNodeSwitch")
+        switch_node.location = (-800, -220)
+        switch_node.input_type = "INT"
 
-        bpy.ops.mesh.primitive_cylinder_add(
-            radius=1.0,
-            depth=distance,
-            vertices=32,
-            location=(0, 0, 0),
+        sphere_node = nodes.new("GeometryNodeMeshIcoSphere")
+        sphere_node.location = (-600, -220)
+        sphere_node.inputs["Radius"].default_value = 1.0
+
+        smooth_node = nodes.new("GeometryNodeSetShadeSmooth")
+        smooth_node.location = (-400, -220)
+        material_node = nodes.new("GeometryNodeSetMaterial")
+        material_node.location = (-200, -220)
+
+        links.new(is_viewport_node.outputs["Is Viewport"], _enabled_socket(switch_node.inputs, "Switch"))
+        links.new(input_node.outputs["Viewport Subdivisions"], _enabled_socket(switch_node.inputs, "True"))
+        links.new(input_node.outputs["Render Subdivisions"], _enabled_socket(switch_node.inputs, "False"))
+        links.new(_enabled_socket(switch_node.outputs, "Output"), sphere_node.inputs["Subdivisions"])
+        links.new(sphere_node.outputs["Mesh"], smooth_node.inputs["Geometry"])
+        links.new(smooth_node.outputs["Geometry"], material_node.inputs["Geometry"])
+        links.new(input_node.outputs["Material"], material_node.inputs["Material"])
+        return is_viewport_node, material_node.outputs["Geometry"]
+
+    def _point_cloud_modifiers(self):
+        for element in self.state.elem_list:
+            for obj in self.registry.objects(ROLE_ATOM, element):
+                instancer = self._point_cloud_modifier(obj)
+                if instancer is not None:
+                    yield instancer
+
+    def _point_cloud_modifier(self, atom_object):
+        instancer = atom_object.modifiers.get(ATOM_INSTANCER_NAME)
+        if instancer is not None and _group_name(instancer.node_group) == POINT_CLOUD_NAME:
+            return instancer
+        return None
+
+    def _set_region_inputs(self, modifier, region) -> None:
+        # Object sockets cannot be set to None; a removed region object clears the pointer by itself
+        if region is not None:
+            self._set_modifier_input(modifier, "Region", region)
+        self._set_modifier_input(modifier, "Use Region", region is not None)
+
+    def _new_group_socket(self, group, name, in_out, socket_type):
+        if hasattr(group, "interface"):
+            return group.interface.new_socket(name, in_out=in_out, socket_type=socket_type)
+        sockets = group.inputs if in_out == "INPUT" else group.outputs
+        return sockets.new(socket_type, name)
+
+    def _set_modifier_input(self, modifier, input_name, value) -> None:
+        group = modifier.node_group
+        if group is None:
+            return
+
+        socket = self._group_input(group, input_name)
+        if socket is not None:
+            modifier[socket.identifier] = value
+            modifier.id_data.update_tag()
+
+    def _group_input(self, group, input_name):
+        if hasattr(group, "interface"):
+            sockets = [
+                item for item in group.interface.items_tree
+                if getattr(item, "item_type", "") == "SOCKET" and item.in_out == "INPUT"
+            ]
+        else:
+            sockets = list(group.inputs)
+
+        for socket in sockets:
+            if socket.name == input_name:
+                return socket
+        return None
+
+    def _bond_capacity_for(self, cutoff: float) -> int:
+        headroom_cutoff = min(cutoff + BOND_CAPACITY_MARGIN, MAX_BOND_CUTOFF)
+        return _bond_count_below(self.state.bond_candidate_distances, headroom_cutoff)
+
+    def _bond_vertex_array(self, capacity: int) -> np.ndarray:
+        visible = len(self.state.bond_first)
+        return bond_vertices(
+            self.state.structure.positions,
+            self.state.bond_first,
+            self.state.bond_second,
+            self.state.bond_candidate_first[visible:capacity],
+            self.state.bond_thickness / 2,
+            self.state.level_of_detail.bond_segments,
+            _image_offsets(self.state.bond_candidate_shifts[:visible], self.state.structure.lattice),
         )
 
-        cylinder = bpy.context.active_object
-        cylinder.name = name
-        cylinder.scale = (self.state.bond_thickness / 2, self.state.bond_thickness / 2, 1)
+    def _bond_mesh_capacity(self, mesh) -> int:
+        # A mesh written with a different cylinder resolution has no usable capacity
+        segments = self.state.level_of_detail.bond_segments
+        if mesh.get(BOND_SEGMENTS_KEY) != segments:
+            return -1
+        return len(mesh.vertices) // (2 * segments)
 
-        direction = p2 - p1
-        direction.normalize()
-        z_axis = mathutils.Vector((0, 0, 1))
-        axis = z_axis.cross(direction)
+    def _write_bond_vertices(self) -> None:
+        bond_object = self.registry.first_object(ROLE_BOND)
+        if bond_object is None:
+            return
 
-        if axis.length > 0.001:
-            axis.normalize()
-            angle = math.acos(min(1, max(-1, z_axis.dot(direction))))
-            rotation = mathutils.Quaternion(axis, angle)
-            cylinder.rotation_mode = "QUATERNION"
-            cylinder.rotation_quaternion = rotation
+        mesh = bond_object.data
+        capacity = self._bond_mesh_capacity(mesh)
+        # A reloaded structure can have fewer candidates than the mesh has room for
+        if capacity < len(self.state.bond_first) or capacity > len(self.state.bond_candidate_first):
+            self._write_bond_mesh(self._bond_capacity_for(self.state.bond_cutoff_distance))
+            return
+
+        mesh.vertices.foreach_set("co", self._bond_vertex_array(capacity).ravel())
+        mesh.update()
+
+    def _write_bond_mesh(self, capacity: int, prepared: Optional[PreparedBondMesh] = None) -> None:
+        bond_object = self.registry.first_object(ROLE_BOND)
+        if bond_object is None:
+            bond_object = bpy.data.objects.new(BOND_OBJECT_NAME, bpy.data.meshes.new(BOND_OBJECT_NAME))
+            self._ensure_structure_collection().objects.link(bond_object)
+            self.registry.add_object(ROLE_BOND, "", bond_object)
+
+        segments = self.state.level_of_detail.bond_segments
+        if prepared is not None:
+            vertices = prepared.vertices
+            loop_vertices, loop_starts, loop_totals = prepared.loop_vertices, prepared.loop_starts, prepared.loop_totals
+        else:
+            capacity = max(capacity, len(self.state.bond_first))
+            vertices = self._bond_vertex_array(capacity)
+            loop_vertices, loop_starts, loop_totals = cylinder_topology(capacity, segments)
 
-        cylinder.location = (p1 + p2) / 2
-        return cylinder
+        bond_object.data[BOND_SEGMENTS_KEY] = segments
+        _write_mesh_geometry(bond_object.data, vertices, loop_vertices, loop_starts, loop_totals)
 
     def _structure_center_and_radius(self):
-        if not self.state.atoms:
-            return mathutils.Vector((0.0, 0.0, 0.0)), 1.0
+        center, radius = _bounding_sphere(self.state.structure, self.state.atom_info)
+        return mathutils.Vector(center.tolist()), radius
+
+
+def _bounding_sphere(structure: AtomArrays, atom_info):
+    if len(structure) == 0:
+        return np.zeros(3), 1.0
+
+    center = structure.positions.mean(axis=0)
+    element_radii = np.array([float(atom_info.get(elem, {}).get("radius", 1.0)) for elem in structure.elements])
+    distances = np.linalg.norm(structure.positions - center, axis=1)
+    radius = float(np.max(distances + element_radii[structure.element_indices]))
+    return center, max(radius, 1.0)
+
+
+def _image_offsets(shifts: np.ndarray, lattice: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    if lattice is None or not shifts.any():
+        return None
+    return shifts @ np.asarray(lattice, dtype=np.float64)
+
+
+def _write_mesh_geometry(mesh, vertices, loop_vertices, loop_starts, loop_totals) -> None:
+    mesh.clear_geometry()
+    mesh.vertices.add(len(vertices))
+    mesh.loops.add(len(loop_vertices))
+    mesh.polygons.add(len(loop_starts))
+    mesh.vertices.foreach_set("co", np.asarray(vertices, dtype=np.float32).ravel())
+    mesh.loops.foreach_set("vertex_index", loop_vertices.astype(np.int32))
+    mesh.polygons.foreach_set("loop_start", loop_starts.astype(np.int32))
+    try:
+        mesh.polygons.foreach_set("loop_total", loop_totals.astype(np.int32))
+    except (AttributeError, TypeError, RuntimeError):
+        # Newer Blender derives polygon sizes from loop_start and exposes loop_total read-only
+        pass
+    mesh.update(calc_edges=True)
+
+
+def _set_mesh_material(mesh, material) -> None:
+    if len(mesh.materials) == 0:
+        mesh.materials.append(material)
+    elif mesh.materials[0] != material:
+        mesh.materials[0] = material
+
+
+def _group_name(group) -> str:
+    return group.name if group is not None else ""
+
+
+def _add_color_mix(nodes, links, factor, first, second):
+    try:
+        mix_node = nodes.new("ShaderNodeMix")
+        mix_node.data_type = "RGBA"
+        inputs = [_enabled_socket(mix_node.inputs, name) for name in ("Factor", "A", "B")]
+        output = _enabled_socket(mix_node.outputs, "Result")
+    except RuntimeError:
+        # Blender before 3.4 only has the legacy MixRGB node
+        mix_node = nodes.new("ShaderNodeMixRGB")
+        inputs = [mix_node.inputs[name] for name in ("Fac", "Color1", "Color2")]
+        output = mix_node.outputs["Color"]
+
+    for source, target in zip((factor, first, second), inputs):
+        links.new(source, target)
+    return mix_node, output
+
+
+def _add_radius_node(nodes):
+    radius_node = nodes.new("GeometryNodeInputNamedAttribute")
+    radius_node.location = (-200, -420)
+    radius_node.data_type = "FLOAT"
+    radius_node.inputs["Name"].default_value = "radius"
+    return radius_node
+
+
+def _add_boolean_node(nodes, operation, location):
+    node = nodes.new("FunctionNodeBooleanMath")
+    node.location = location
+    node.operation = operation
+    return node
+
+
+def _enabled_socket(sockets, name):
+    # Blender 3.x Switch nodes carry one hidden socket set per data type under the same names
+    for socket in sockets:
+        if socket.name == name and getattr(socket, "enabled", True):
+            return socket
+    return sockets[name]
+
 
-        center = mathutils.Vector((0.0, 0.0, 0.0))
-        for _, x, y, z in self.state.atoms:
-            center += mathutils.Vector((x, y, z))
-        center /= len(self.state.atoms)
+def _element_atom_indices(structure: AtomArrays, element: str) -> np.ndarray:
+    if element not in structure.elements:
+        return np.zeros(0, dtype=np.int64)
+    return np.flatnonzero(structure.element_mask(structure.elements.index(element)))
 
-        radius = 0.0
-        for elem, x, y, z in self.state.atoms:
-            atom_pos = mathutils.Vector((x, y, z))
-            atom_radius = float(self.state.atom_info.get(elem, {}).get("radius", 1.0))
-            radius = max(radius, (atom_pos - center).length + atom_radius)
 
-        return center, max(radius, 1.0)
+def _bond_count_below(distances: np.ndarray, cutoff: float) -> int:
+    # Candidates are sorted by length, so the bonds under a cutoff are always a prefix
+    return int(np.searchsorted(distances, cutoff, side="left"))
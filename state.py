@@ -1,7 +1,41 @@
-from dataclasses import dataclass, field
-from typing import Dict, List, Tuple
+import uuid
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Optional, Tuple
 
-AtomRecord = Tuple[str, float, float, float]
+import numpy as np
+
+from .cache import DEFAULT_CACHE_DIR
+from .loading import BackgroundLoad
+from .lod import DEFAULT_LEVEL_OF_DETAIL, LevelOfDetail
+from .neighbor_search import VerletBondList
+from .structure import AtomArrays
+from .trajectory import TrajectoryPlayback
+
+MAX_BOND_CUTOFF = 5.0
+
+
+@dataclass
+class StructureRecord:
+    """Settings of a loaded structure while another one is active; its arrays sit in the memory cache."""
+
+    structure_key: str = ""
+    structure_name: str = ""
+    file_path: str = ""
+    elem_list: List[str] = field(default_factory=list)
+    current_atoms_info: Dict[str, Dict[str, object]] = field(default_factory=dict)
+    atom_info: Dict[str, Dict[str, object]] = field(default_factory=dict)
+    bond_info: Dict[str, List[str]] = field(default_factory=dict)
+    bond_compatibility: np.ndarray = field(default_factory=lambda: np.zeros((0, 0), dtype=bool))
+    bond_pair_cutoffs: np.ndarray = field(default_factory=lambda: np.zeros((0, 0), dtype=np.float64))
+    bond_thickness: float = 0.2
+    bond_cutoff_distance: float = 3.0
+    level_of_detail: LevelOfDetail = DEFAULT_LEVEL_OF_DETAIL
+    supercell: Tuple[int, int, int] = (1, 1, 1)
+    trajectory: Optional[TrajectoryPlayback] = None
+    trajectory_bonds: Optional[VerletBondList] = None
+
+
+RECORD_FIELDS = tuple(record_field.name for record_field in fields(StructureRecord))
 
 
 @dataclass
@@ -14,16 +48,77 @@ class VisualizerState:
     atom_translucency: float = 0.18
     atom_glossiness: float = 0.82
     material_style: str = "PBR"
-    atoms: List[AtomRecord] = field(default_factory=list)
+    atom_display_mode: str = "AUTO"
+    atom_lod: str = "AUTO"
+    viewport_proxy: bool = True
+    render_resolution: int = 1080
+    level_of_detail: LevelOfDetail = DEFAULT_LEVEL_OF_DETAIL
+    cache_enabled: bool = True
+    cache_dir: str = DEFAULT_CACHE_DIR
+    cache_max_megabytes: int = 2048
+    memory_cache_megabytes: int = 1024
+    watch_file: bool = False
+    watch_error: str = ""
+    record_performance: bool = False
+    capture_profile: bool = False
+    track_memory: bool = False
+    structure: AtomArrays = field(default_factory=AtomArrays)
     atom_info: Dict[str, Dict[str, object]] = field(default_factory=dict)
     bond_info: Dict[str, List[str]] = field(default_factory=dict)
+    bond_compatibility: np.ndarray = field(default_factory=lambda: np.zeros((0, 0), dtype=bool))
+    bond_pair_cutoffs: np.ndarray = field(default_factory=lambda: np.zeros((0, 0), dtype=np.float64))
+    bond_candidate_first: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    bond_candidate_second: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    bond_candidate_distances: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float64))
+    bond_candidate_shifts: np.ndarray = field(default_factory=lambda: np.zeros((0, 3), dtype=np.int32))
+    bond_first: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    bond_second: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    supercell: Tuple[int, int, int] = (1, 1, 1)
+    trajectory: Optional[TrajectoryPlayback] = None
+    trajectory_bonds: Optional[VerletBondList] = None
+    structure_key: str = ""
+    structure_name: str = ""
+    file_path: str = ""
+    structures: Dict[str, StructureRecord] = field(default_factory=dict)
+    load_job: Optional[BackgroundLoad] = None
 
     def reset_structure(self) -> None:
+        # Other loaded structures keep their records, so an active trajectory is detached, not closed
+        self.trajectory = None
+        self.trajectory_bonds = None
+        self.structure_key = uuid.uuid4().hex
+        self.structure_name = ""
+        self.file_path = ""
         self.elem_list = []
         self.current_atoms_info = {}
-        self.atoms = []
+        self.structure = AtomArrays()
         self.atom_info = {}
         self.bond_info = {}
+        self.bond_compatibility = np.zeros((0, 0), dtype=bool)
+        self.bond_pair_cutoffs = np.zeros((0, 0), dtype=np.float64)
+        self.bond_candidate_first = np.zeros(0, dtype=np.int64)
+        self.bond_candidate_second = np.zeros(0, dtype=np.int64)
+        self.bond_candidate_distances = np.zeros(0, dtype=np.float64)
+        self.bond_candidate_shifts = np.zeros((0, 3), dtype=np.int32)
+        self.bond_first = np.zeros(0, dtype=np.int64)
+        self.bond_second = np.zeros(0, dtype=np.int64)
+
+    def record_active(self) -> None:
+        self.structures[self.structure_key] = StructureRecord(**{name: getattr(self, name) for name in RECORD_FIELDS})
+
+    def activate(self, record: StructureRecord) -> None:
+        self.reset_structure()
+        for name in RECORD_FIELDS:
+            setattr(self, name, getattr(record, name))
+
+    def clear_structures(self) -> None:
+        playbacks = {id(record.trajectory): record.trajectory for record in self.structures.values()}
+        playbacks[id(self.trajectory)] = self.trajectory
+        for playback in playbacks.values():
+            if playback is not None:
+                playback.close()
+        self.structures = {}
+        self.reset_structure()
 
 
 state = VisualizerState()
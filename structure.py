@@ -0,0 +1,56 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+@dataclass
+class AtomArrays:
+    positions: np.ndarray = field(default_factory=lambda: np.zeros((0, 3), dtype=np.float64))
+    element_indices: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int32))
+    elements: List[str] = field(default_factory=list)
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+    lattice: Optional[np.ndarray] = None
+    pbc: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_arrays(
+        cls,
+        atom_elements: Sequence[str],
+        positions: np.ndarray,
+        columns: Optional[Dict[str, np.ndarray]] = None,
+        lattice: Optional[np.ndarray] = None,
+        pbc: Optional[np.ndarray] = None,
+    ) -> "AtomArrays":
+        elements, first_seen, element_indices = np.unique(
+            np.asarray(atom_elements, dtype=str), return_index=True, return_inverse=True
+        )
+        # Keep the element table in order of first appearance, matching the sidebar order
+        order = np.argsort(first_seen)
+        remap = np.empty_like(order)
+        remap[order] = np.arange(len(order))
+
+        return cls(
+            positions=np.ascontiguousarray(positions, dtype=np.float64).reshape(-1, 3),
+            element_indices=remap[element_indices.ravel()].astype(np.int32),
+            elements=[str(elements[i]) for i in order],
+            columns=dict(columns or {}),
+            lattice=lattice,
+            pbc=pbc,
+        )
+
+    def __len__(self) -> int:
+        return len(self.element_indices)
+
+    def element_mask(self, element_index: int) -> np.ndarray:
+        return self.element_indices == element_index
+
+    def atom_elements(self) -> np.ndarray:
+        return np.asarray(self.elements, dtype=object)[self.element_indices]
+
+    def nbytes(self) -> int:
+        return (
+            self.positions.nbytes
+            + self.element_indices.nbytes
+            + sum(column.nbytes for column in self.columns.values())
+        )
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The addon is imported against the benchmarks' fake bpy, so the tests run without Blender
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.runner import import_addon  # noqa: E402
+
+import_addon()
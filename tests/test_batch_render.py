@@ -0,0 +1,22 @@
+import shutil
+
+import pytest
+
+from atoms_visualizer import batch_render
+
+
+@pytest.mark.skipif(shutil.which("false") is None, reason="needs a 'false' executable")
+def test_worker_that_never_starts_fails_its_files(tmp_path):
+    for name in ("a.xyz", "b.xyz"):
+        (tmp_path / name).write_text("1\n\nH 0 0 0\n")
+    args = batch_render.parse_args([str(tmp_path), "--output", str(tmp_path / "out"), "--workers", "1", "--retries", "1"])
+    coordinator = batch_render.BatchCoordinator(args, shutil.which("false"))
+
+    try:
+        records = coordinator.run(batch_render.collect_inputs(args.inputs))
+    finally:
+        coordinator.cleanup(keep_logs=False)
+
+    assert [record["status"] for record in records] == [batch_render.STATUS_FAILED] * 2
+    assert [record["attempts"] for record in records] == [2, 2]
+    assert "before starting any file" in records[0]["error"]
@@ -0,0 +1,200 @@
+import bpy
+import numpy as np
+import pytest
+
+from atoms_visualizer import addon, props
+from atoms_visualizer import controller as controller_module
+from atoms_visualizer.controller import get_controller
+from atoms_visualizer.trajectory import TrajectoryPlayback
+from benchmarks import fake_bpy
+
+
+def _write_water(path, oxygen):
+    path.write_text(f"3\n\nO {oxygen[0]} {oxygen[1]} {oxygen[2]}\nH 0.96 0.0 0.0\nH -0.24 0.93 0.0\n")
+
+
+_SETTINGS = (
+    "cache_enabled",
+    "cache_dir",
+    "cache_max_megabytes",
+    "memory_cache_megabytes",
+    "record_performance",
+    "capture_profile",
+    "track_memory",
+    "bond_cutoff_distance",
+)
+
+
+@pytest.fixture
+def controller():
+    fake_bpy.reset()
+    scene = bpy.context.scene
+    scene.bond_thickness_scene = 0.1
+    scene.bond_cutoff_distance_scene = 1.2
+    scene.supercell_scene = (1, 1, 1)
+    scene.watch_file_scene = False
+    controller = get_controller()
+    settings = {name: getattr(controller.state, name) for name in _SETTINGS}
+    max_bytes = controller.structure_arrays.max_bytes
+    controller.state.cache_enabled = False
+    yield controller
+    controller.clear_structures()
+    for name, value in settings.items():
+        setattr(controller.state, name, value)
+    controller.structure_arrays.max_bytes = max_bytes
+    controller.profiler.enabled = controller.state.record_performance
+    controller.profiler.capture_profile = controller.state.capture_profile
+    controller.profiler.track_memory = controller.state.track_memory
+
+
+def test_save_after_reload_stores_reloaded_positions(controller, tmp_path):
+    path = tmp_path / "water.xyz"
+    _write_water(path, (0.0, 0.0, 0.0))
+    controller.load_structure(str(path))
+    addon.save_structure_data()
+
+    _write_water(path, (1.5, 1.5, 1.5))
+    controller.reload_structure()
+    addon.save_structure_data()
+    # Restoring must read the .blend, not the file on disk
+    _write_water(path, (9.0, 9.0, 9.0))
+
+    controller.state.reset_structure()
+    addon.initialize_all_scenes()
+    controller._ensure_hydrated()
+
+    np.testing.assert_allclose(controller.state.structure.positions[0], [1.5, 1.5, 1.5])
+
+
+def test_opening_a_file_applies_its_cache_settings(controller, tmp_path):
+    scene = bpy.context.scene
+    scene.structure_cache_enabled_scene = True
+    scene.structure_cache_dir_scene = str(tmp_path)
+    scene.structure_cache_size_scene = 64
+    scene.structure_memory_size_scene = 32
+
+    addon.initialize_all_scenes()
+
+    assert controller.state.cache_enabled
+    assert controller.state.cache_dir == str(tmp_path)
+    assert controller.state.cache_max_megabytes == 64
+    assert controller.structure_arrays.max_bytes == 32 * 1024 * 1024
+
+
+def test_opening_a_file_applies_its_performance_settings(controller):
+    scene = bpy.context.scene
+    scene.record_performance_scene = True
+    scene.capture_profile_scene = False
+    scene.track_memory_scene = True
+
+    addon.initialize_all_scenes()
+
+    assert controller.profiler.enabled
+    assert not controller.profiler.capture_profile
+    assert controller.profiler.track_memory
+
+
+def test_loading_does_not_queue_an_appearance_flush(controller, tmp_path):
+    scene = bpy.context.scene
+    for name, value in (
+        ("atom_metallic_scene", 0.0),
+        ("atom_translucency_scene", 0.0),
+        ("atom_glossiness_scene", 0.5),
+        ("material_style_scene", "PBR"),
+        ("atom_display_mode_scene", "AUTO"),
+    ):
+        setattr(scene, name, value)
+    # The fake scene does not run update callbacks; this one does, like Blender
+    scene.__class__ = type("CallbackScene", (type(scene),), {"__setattr__": _set_with_callback})
+    path = tmp_path / "water.xyz"
+    _write_water(path, (0.0, 0.0, 0.0))
+
+    controller.load_structure(str(path))
+
+    assert not controller._style_dirty
+
+
+def _set_with_callback(scene, name, value):
+    object.__setattr__(scene, name, value)
+    if name in ("atom_metallic_scene", "atom_translucency_scene", "atom_glossiness_scene", "material_style_scene"):
+        props.update_atom_appearance(scene, bpy.context)
+    elif name == "atom_display_mode_scene":
+        props.update_atom_display_mode(scene, bpy.context)
+
+
+def test_bond_cutoff_uses_spare_mesh_capacity(controller, tmp_path, monkeypatch):
+    # Isolated C-C pairs 1.0, 1.2, ... 3.0 apart, so each cutoff step shows a known number of bonds
+    lengths = np.arange(1.0, 3.01, 0.2)
+    lines = []
+    for index, length in enumerate(lengths):
+        lines += [f"C {30.0 * index} 0.0 0.0", f"C {30.0 * index + length} 0.0 0.0"]
+    path = tmp_path / "pairs.xyz"
+    path.write_text(f"{len(lines)}\n\n" + "\n".join(lines) + "\n")
+    scene = bpy.context.scene
+    controller.state.bond_cutoff_distance = scene.bond_cutoff_distance_scene = 1.5
+    controller.load_structure(str(path))
+
+    builder = controller.scene_builder
+    rewrites = []
+    write_bond_mesh = builder._write_bond_mesh
+    monkeypatch.setattr(builder, "_write_bond_mesh", lambda *args: rewrites.append(args) or write_bond_mesh(*args))
+    mesh = builder.registry.first_object("bond").data
+    state = controller.state
+
+    def set_cutoff(cutoff):
+        scene.bond_cutoff_distance_scene = cutoff
+        controller.update_bond_cutoff_distance(bpy.context)
+        return len(state.bond_first), builder._bond_mesh_capacity(mesh)
+
+    assert (len(state.bond_first), builder._bond_mesh_capacity(mesh)) == (3, 5)
+
+    # Within the margin the spare bonds take the new ones and the mesh keeps its topology
+    assert set_cutoff(1.9) == (5, 5)
+    assert rewrites == []
+
+    # Past it the mesh is written again, with new spare room above the cutoff
+    assert set_cutoff(2.5) == (8, 10)
+    assert len(rewrites) == 1
+
+    # Lowering only moves vertices; bonds above the cutoff collapse onto their first atom
+    assert set_cutoff(1.3) == (2, 10)
+    assert len(rewrites) == 1
+    segments = state.level_of_detail.bond_segments
+    vertices = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", vertices)
+    bonds = vertices.reshape(10, 2 * segments, 3)
+    first_atoms = state.structure.positions[state.bond_candidate_first[2:10]]
+    np.testing.assert_allclose(bonds[2:], np.repeat(first_atoms[:, None], 2 * segments, axis=1), atol=1e-5)
+    assert np.ptp(bonds[:2], axis=1).max() > 0
+
+
+def test_failed_trajectory_load_closes_playback_and_restores_structure(controller, tmp_path, monkeypatch):
+    path = tmp_path / "water.xyz"
+    _write_water(path, (0.0, 0.0, 0.0))
+    controller.load_structure(str(path))
+    previous_key = controller.state.structure_key
+    trajectory_path = tmp_path / "trajectory.xyz"
+    trajectory_path.write_text("".join(f"2\n\nH 0 0 {frame}\nH 0.7 0 {frame}\n" for frame in range(4)))
+
+    playbacks = []
+
+    def open_playback(file_path):
+        playbacks.append(TrajectoryPlayback(file_path))
+        return playbacks[-1]
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("scene build failed")
+
+    monkeypatch.setattr(controller_module, "TrajectoryPlayback", open_playback)
+    monkeypatch.setattr(controller, "_build_scene", fail)
+
+    with pytest.raises(RuntimeError):
+        controller.load_trajectory(str(trajectory_path))
+
+    assert not playbacks[0].prefetcher._thread.is_alive()
+    assert controller.state.structure_key == previous_key
+    assert controller.state.trajectory is None
+    assert list(controller.state.structures) == [previous_key]
+    controller._ensure_hydrated()
+    assert controller.state.elem_list == ["O", "H"]
+    assert len(controller.state.structure) == 3
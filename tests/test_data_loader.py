@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from atoms_visualizer.data_loader import parse_atom_lines, parse_comment_line
+
+
+def test_uniform_rows_keep_extra_columns():
+    elements, positions, columns = parse_atom_lines(["C 0 0 0 1.5 2.5\n", "O 1 2 3 3.5 4.5\n"])
+
+    assert elements.tolist() == ["C", "O"]
+    assert positions.tolist() == [[0, 0, 0], [1, 2, 3]]
+    assert columns["extra"].tolist() == [[1.5, 2.5], [3.5, 4.5]]
+
+
+def test_ragged_rows_are_read_line_by_line():
+    # 12 tokens over 3 lines divide evenly, but the rows are not 4 wide
+    elements, positions, columns = parse_atom_lines(["H 0 0 0 5\n", "H 1 1 1\n", "H 2 2 2 7 8\n"])
+
+    assert elements.tolist() == ["H", "H", "H"]
+    assert positions.tolist() == [[0, 0, 0], [1, 1, 1], [2, 2, 2]]
+    assert columns == {}
+
+
+def test_short_row_is_rejected():
+    with pytest.raises(ValueError, match="Expected 4 columns"):
+        parse_atom_lines(["H 0 0 0\n", "H 1 1\n"])
+
+
+def test_blank_row_is_rejected():
+    with pytest.raises(ValueError):
+        parse_atom_lines(["H 0 0 0\n", "\n"])
+
+
+def test_extended_xyz_properties():
+    properties, lattice, pbc = parse_comment_line(
+        'Properties=species:S:1:pos:R:3:tag:I:1:fixed:L:1:force:R:3 Lattice="2 0 0 0 2 0 0 0 2" pbc="T T F"'
+    )
+    elements, positions, columns = parse_atom_lines(
+        ["Fe 0 0 0 3 T 1 2 3\n", "O 1 1 1 4 F 4 5 6\n"], properties
+    )
+
+    assert elements.tolist() == ["Fe", "O"]
+    assert positions.tolist() == [[0, 0, 0], [1, 1, 1]]
+    assert columns["tag"].tolist() == [3, 4]
+    assert columns["fixed"].tolist() == [True, False]
+    assert columns["force"].tolist() == [[1, 2, 3], [4, 5, 6]]
+    assert np.array_equal(lattice, np.eye(3) * 2)
+    assert pbc.tolist() == [True, True, False]
+
+
+def test_long_species_names_are_not_truncated():
+    elements, _, _ = parse_atom_lines(["Carbon_backbone_alpha 0 0 0\n", "H 1 1 1\n"])
+
+    assert elements.tolist() == ["Carbon_backbone_alpha", "H"]
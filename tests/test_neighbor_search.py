@@ -0,0 +1,238 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from atoms_visualizer.neighbor_search import VerletBondList, bond_candidates, neighbor_pairs, periodic_neighbor_pairs
+
+CUTOFF = 2.0
+
+
+def _random_structure(seed, count=60, box=8.0, element_count=3):
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(-box / 2, box / 2, (count, 3))
+    element_indices = rng.integers(0, element_count, count)
+    compatibility = rng.random((element_count, element_count)) < 0.7
+    compatibility = compatibility | compatibility.T
+    return positions, element_indices, compatibility
+
+
+def _brute_force_pairs(positions, cutoff, element_indices=None, compatibility=None, pair_cutoffs=None):
+    pairs = {}
+    for i in range(len(positions)):
+        for j in range(i + 1, len(positions)):
+            limit = cutoff
+            if element_indices is not None:
+                a, b = element_indices[i], element_indices[j]
+                if compatibility is not None and not compatibility[a, b]:
+                    continue
+                if pair_cutoffs is not None:
+                    limit = min(limit, pair_cutoffs[a, b])
+            distance = np.linalg.norm(positions[j] - positions[i])
+            if distance < limit:
+                pairs[(i, j)] = distance
+    return pairs
+
+
+def _as_dict(first, second, distances):
+    return {(int(i), int(j)): float(d) for i, j, d in zip(first, second, distances)}
+
+
+def _assert_same_pairs(found, expected):
+    assert sorted(found) == sorted(expected)
+    for pair, distance in expected.items():
+        assert found[pair] == pytest.approx(distance)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_neighbor_pairs_match_brute_force(seed):
+    positions, element_indices, compatibility = _random_structure(seed)
+
+    found = _as_dict(*neighbor_pairs(positions, CUTOFF, element_indices, compatibility))
+
+    _assert_same_pairs(found, _brute_force_pairs(positions, CUTOFF, element_indices, compatibility))
+
+
+def test_neighbor_pairs_without_elements():
+    positions, _, _ = _random_structure(7)
+
+    found = _as_dict(*neighbor_pairs(positions, CUTOFF))
+
+    _assert_same_pairs(found, _brute_force_pairs(positions, CUTOFF))
+
+
+def test_pair_cutoffs_tighten_the_limit():
+    positions, element_indices, compatibility = _random_structure(11)
+    pair_cutoffs = np.array([[1.0, 1.5, np.inf], [1.5, np.inf, 1.2], [np.inf, 1.2, 3.0]])
+
+    found = _as_dict(*neighbor_pairs(positions, CUTOFF, element_indices, compatibility, pair_cutoffs))
+
+    expected = _brute_force_pairs(positions, CUTOFF, element_indices, compatibility, pair_cutoffs)
+    _assert_same_pairs(found, expected)
+
+
+def test_pairs_exactly_at_the_cutoff_are_left_out():
+    # Spacing equal to the cutoff also puts every atom on a cell boundary
+    positions = np.array([[0.0, 0.0, 0.0], [2.0, 0.0, 0.0], [4.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 2.0]])
+
+    found = _as_dict(*neighbor_pairs(positions, CUTOFF))
+
+    assert found == _brute_force_pairs(positions, CUTOFF)
+    assert sorted(found) == [(0, 3), (1, 3)]
+
+
+@pytest.mark.parametrize("count", [0, 1])
+def test_fewer_than_two_atoms_have_no_pairs(count):
+    positions = np.zeros((count, 3))
+    element_indices = np.zeros(count, dtype=np.int64)
+    compatibility = np.ones((1, 1), dtype=bool)
+
+    first, second, distances = neighbor_pairs(positions, CUTOFF, element_indices, compatibility)
+    candidates = bond_candidates(positions, element_indices, compatibility, CUTOFF)
+
+    assert len(first) == len(second) == len(distances) == 0
+    assert [len(array) for array in candidates] == [0, 0, 0, 0]
+    assert candidates[3].shape == (0, 3)
+
+
+def test_bond_candidates_are_sorted_by_distance():
+    positions, element_indices, compatibility = _random_structure(3)
+
+    first, second, distances, shifts = bond_candidates(positions, element_indices, compatibility, CUTOFF)
+
+    assert np.all(np.diff(distances) >= 0)
+    assert not shifts.any()
+    _assert_same_pairs(
+        _as_dict(first, second, distances), _brute_force_pairs(positions, CUTOFF, element_indices, compatibility)
+    )
+
+
+ORTHORHOMBIC = np.diag([6.0, 7.0, 5.0])
+TRICLINIC = np.array([[6.0, 0.0, 0.0], [2.5, 5.5, 0.0], [-1.5, 1.0, 5.0]])
+
+
+def _brute_force_periodic(positions, cutoff, lattice, pbc, element_indices, compatibility):
+    # Images up to three cells away cover atoms given up to one cell outside the lattice
+    ranges = [range(-3, 4) if periodic else range(1) for periodic in pbc]
+    shifts = list(itertools.product(*ranges))
+    offsets = np.array(shifts) @ lattice
+    pairs = {}
+    for i, j in itertools.combinations_with_replacement(range(len(positions)), 2):
+        if not compatibility[element_indices[i], element_indices[j]]:
+            continue
+        distances = np.linalg.norm(positions[j] + offsets - positions[i], axis=1)
+        for index in np.flatnonzero(distances < cutoff):
+            # A pair through the boundary is listed once, with the image on the positive side
+            if i < j or shifts[index] > (0, 0, 0):
+                pairs[(i, j, shifts[index])] = float(distances[index])
+    return pairs
+
+
+def _periodic_structure(seed, lattice, count=30, unwrapped=False):
+    rng = np.random.default_rng(seed)
+    fractional = rng.random((count, 3))
+    if unwrapped:
+        # Callers may pass atoms outside the cell; shifts must stay in their coordinates
+        fractional += rng.integers(-1, 2, (count, 3))
+    element_indices = rng.integers(0, 2, count)
+    compatibility = np.array([[True, True], [True, False]])
+    return fractional @ lattice, element_indices, compatibility
+
+
+def _periodic_dict(first, second, distances, shifts):
+    return {
+        (int(i), int(j), tuple(int(k) for k in shift)): float(d)
+        for i, j, d, shift in zip(first, second, distances, shifts)
+    }
+
+
+@pytest.mark.parametrize("lattice", [ORTHORHOMBIC, TRICLINIC], ids=["orthorhombic", "triclinic"])
+@pytest.mark.parametrize(
+    "pbc", [(True, True, True), (True, False, True), (False, False, True)], ids=["full", "slab", "wire"]
+)
+@pytest.mark.parametrize("cutoff", [2.0, 4.5])
+@pytest.mark.parametrize("unwrapped", [False, True])
+def test_periodic_pairs_match_brute_force(lattice, pbc, cutoff, unwrapped):
+    positions, element_indices, compatibility = _periodic_structure(1, lattice, unwrapped=unwrapped)
+
+    found = _periodic_dict(
+        *periodic_neighbor_pairs(positions, cutoff, lattice, np.array(pbc), element_indices, compatibility)
+    )
+
+    expected = _brute_force_periodic(positions, cutoff, lattice, pbc, element_indices, compatibility)
+    _assert_same_pairs(found, expected)
+
+
+def test_cutoff_near_the_cell_length_finds_self_images():
+    lattice = np.diag([3.0, 3.0, 3.0])
+    positions = np.array([[0.5, 0.5, 0.5], [2.0, 1.0, 2.5]])
+    element_indices = np.zeros(2, dtype=np.int64)
+    compatibility = np.ones((1, 1), dtype=bool)
+    pbc = (True, True, True)
+
+    found = _periodic_dict(*periodic_neighbor_pairs(positions, 3.1, lattice, None, element_indices, compatibility))
+
+    expected = _brute_force_periodic(positions, 3.1, lattice, pbc, element_indices, compatibility)
+    _assert_same_pairs(found, expected)
+    assert (0, 0, (1, 0, 0)) in found and (0, 0, (-1, 0, 0)) not in found
+
+
+def test_bond_candidates_use_the_lattice():
+    positions, element_indices, compatibility = _periodic_structure(4, TRICLINIC)
+    pbc = np.array([True, True, False])
+
+    candidates = bond_candidates(positions, element_indices, compatibility, CUTOFF, None, TRICLINIC, pbc)
+
+    assert np.all(np.diff(candidates[2]) >= 0)
+    expected = _brute_force_periodic(positions, CUTOFF, TRICLINIC, pbc, element_indices, compatibility)
+    _assert_same_pairs(_periodic_dict(*candidates), expected)
+
+
+@pytest.mark.parametrize("lattice", [None, TRICLINIC], ids=["open", "periodic"])
+def test_verlet_list_matches_a_fresh_search_every_frame(lattice):
+    if lattice is None:
+        positions, element_indices, compatibility = _random_structure(5)
+    else:
+        positions, element_indices, compatibility = _periodic_structure(5, lattice)
+    pbc = None if lattice is None else np.array([True, True, True])
+    bonds = VerletBondList(element_indices, compatibility, CUTOFF, None, lattice, pbc, skin=1.0)
+    rng = np.random.default_rng(6)
+
+    reference = positions
+    expected_rebuilds = 0
+    for frame in range(12):
+        if frame:
+            positions = positions + rng.normal(0.0, 0.06, positions.shape)
+        moved = np.linalg.norm(positions - reference, axis=1).max() if frame else np.inf
+        if moved > bonds.skin / 2:
+            reference = positions
+            expected_rebuilds += 1
+
+        first, second, distances, shifts = bonds.update(positions)
+
+        assert bonds.rebuilds == expected_rebuilds
+        finite = np.isfinite(distances)
+        # Pairs past the cutoff trail the list
+        assert finite[: finite.sum()].all()
+        fresh = bond_candidates(positions, element_indices, compatibility, CUTOFF, None, lattice, pbc)
+        np.testing.assert_array_equal(first[finite], fresh[0])
+        np.testing.assert_array_equal(second[finite], fresh[1])
+        np.testing.assert_allclose(distances[finite], fresh[2])
+        np.testing.assert_array_equal(shifts[finite], fresh[3])
+    # Frames both inside and past the skin were exercised
+    assert 1 < expected_rebuilds < 12
+
+
+def test_verlet_list_rebuilds_only_past_half_the_skin():
+    positions, element_indices, compatibility = _random_structure(8)
+    bonds = VerletBondList(element_indices, compatibility, CUTOFF, skin=1.0)
+    bonds.update(positions)
+    step = np.zeros_like(positions)
+
+    step[0] = (0.49, 0.0, 0.0)
+    bonds.update(positions + step)
+    assert bonds.rebuilds == 1
+
+    step[0] = (0.51, 0.0, 0.0)
+    bonds.update(positions + step)
+    assert bonds.rebuilds == 2
@@ -0,0 +1,50 @@
+import numpy as np
+
+from atoms_visualizer import persistence
+from atoms_visualizer.data_loader import parse_atom_lines
+from atoms_visualizer.structure import AtomArrays
+
+
+def _round_trip(structure, candidates):
+    mesh = persistence.new_data_mesh()
+    persistence.store_arrays(mesh, structure, candidates, "key")
+    return persistence.load_arrays(mesh, "key", structure.elements, structure.lattice, structure.pbc)
+
+
+def test_extended_xyz_columns_are_stored():
+    lines = [
+        "O 0.0 0.0 0.0 -0.8 T 8 0.1 0.2 0.3 Ow\n",
+        "H 0.9 0.0 0.0 0.4 F 1 0.4 0.5 0.6 Hw\n",
+    ]
+    properties = [
+        ("species", "S", 1),
+        ("pos", "R", 3),
+        ("charge", "R", 1),
+        ("fixed", "L", 1),
+        ("Z", "I", 1),
+        ("forces", "R", 3),
+        ("label", "S", 1),
+    ]
+    elements, positions, columns = parse_atom_lines(lines, properties)
+    structure = AtomArrays.from_arrays(elements, positions, columns)
+    candidates = (np.array([0]), np.array([1]), np.array([0.9]), np.zeros((1, 3), dtype=np.int32))
+
+    restored, restored_candidates = _round_trip(structure, candidates)
+
+    assert list(restored.columns) == ["charge", "fixed", "Z", "forces", "label"]
+    np.testing.assert_allclose(restored.columns["charge"], [-0.8, 0.4], rtol=1e-6)
+    np.testing.assert_allclose(restored.columns["forces"], columns["forces"], rtol=1e-6)
+    assert restored.columns["forces"].shape == (2, 3)
+    assert restored.columns["fixed"].tolist() == [True, False]
+    assert restored.columns["Z"].tolist() == [8, 1]
+    assert restored.columns["label"].tolist() == ["Ow", "Hw"]
+    np.testing.assert_array_equal(restored_candidates[0], [0])
+
+
+def test_structure_without_columns():
+    structure = AtomArrays.from_arrays(["H"], np.zeros((1, 3)))
+    empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros((0, 3), dtype=np.int32))
+
+    restored, _ = _round_trip(structure, empty)
+
+    assert restored.columns == {}
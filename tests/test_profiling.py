@@ -0,0 +1,51 @@
+import tracemalloc
+
+from atoms_visualizer.profiling import PerformanceRecorder
+
+
+def _counting_recorder():
+    calls = []
+
+    def counter():
+        calls.append(1)
+        return {"objects": len(calls)}
+
+    return PerformanceRecorder(counter), calls
+
+
+def test_recorder_is_off_by_default():
+    recorder, calls = _counting_recorder()
+
+    with recorder.record("update_bond_cutoff", count_datablocks=True):
+        pass
+
+    assert recorder.last_report is None
+    assert calls == []
+
+
+def test_timing_only_by_default():
+    recorder, calls = _counting_recorder()
+    recorder.enabled = True
+
+    with recorder.record("update_bond_cutoff") as report:
+        assert not tracemalloc.is_tracing()
+
+    assert calls == []
+    assert report.total_seconds > 0.0
+    assert report.to_dict()["peak_memory_bytes"] is None
+    assert report.to_dict()["created"] is None
+
+
+def test_datablocks_and_memory_on_request():
+    recorder, calls = _counting_recorder()
+    recorder.enabled = True
+    recorder.track_memory = True
+
+    with recorder.record("load_structure", count_datablocks=True) as report:
+        assert tracemalloc.is_tracing()
+        data = [bytearray(1 << 20)]
+
+    assert not tracemalloc.is_tracing()
+    assert len(calls) == 2
+    assert report.created == {"objects": 1}
+    assert report.peak_memory_bytes >= len(data[0])
@@ -0,0 +1,203 @@
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+from .data_loader import TrajectoryFrame, parse_frame
+from .structure import AtomArrays
+
+INDEX_SUFFIX = ".avidx.npz"
+
+
+class TrajectoryIndex:
+    def __init__(self, file_path: str, starts: np.ndarray, ends: np.ndarray, atom_counts: np.ndarray):
+        self.file_path = file_path
+        self.starts = starts
+        self.ends = ends
+        self.atom_counts = atom_counts
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.starts)
+
+    @classmethod
+    def open(cls, file_path: str) -> "TrajectoryIndex":
+        index = cls.load(file_path)
+        if index is None:
+            index = cls.build(file_path)
+            index.save()
+        return index
+
+    @classmethod
+    def build(cls, file_path: str) -> "TrajectoryIndex":
+        starts: List[int] = []
+        ends: List[int] = []
+        atom_counts: List[int] = []
+
+        with open(file_path, "rb") as f:
+            while True:
+                start = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                num_atoms = int(line)
+                for _ in range(num_atoms + 1):
+                    if not f.readline():
+                        raise ValueError(f"Frame {len(starts)} in {file_path} is truncated")
+
+                starts.append(start)
+                ends.append(f.tell())
+                atom_counts.append(num_atoms)
+
+        return cls(
+            file_path,
+            np.array(starts, dtype=np.int64),
+            np.array(ends, dtype=np.int64),
+            np.array(atom_counts, dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, file_path: str) -> Optional["TrajectoryIndex"]:
+        index_path = file_path + INDEX_SUFFIX
+        if not os.path.exists(index_path):
+            return None
+
+        try:
+            with np.load(index_path) as data:
+                stat = os.stat(file_path)
+                if int(data["file_size"]) != stat.st_size or int(data["file_mtime_ns"]) != stat.st_mtime_ns:
+                    return None
+                return cls(file_path, data["starts"], data["ends"], data["atom_counts"])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def save(self) -> None:
+        stat = os.stat(self.file_path)
+        try:
+            with open(self.file_path + INDEX_SUFFIX, "wb") as f:
+                np.savez(
+                    f,
+                    starts=self.starts,
+                    ends=self.ends,
+                    atom_counts=self.atom_counts,
+                    file_size=stat.st_size,
+                    file_mtime_ns=stat.st_mtime_ns,
+                )
+        except OSError:
+            # A read-only data directory only costs a rescan on the next open
+            pass
+
+
+class TrajectoryFile:
+    def __init__(self, index: TrajectoryIndex):
+        self.index = index
+        self._file = open(index.file_path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read_frame(self, frame: int) -> TrajectoryFrame:
+        start, end = int(self.index.starts[frame]), int(self.index.ends[frame])
+        lines = self._map[start:end].decode("utf-8").splitlines()
+        num_atoms = int(self.index.atom_counts[frame])
+        return parse_frame(frame, lines[1], lines[2:2 + num_atoms])
+
+    def read_positions(self, frame: int) -> np.ndarray:
+        return self.read_frame(frame).positions
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+class FramePrefetcher:
+    def __init__(self, trajectory_file: TrajectoryFile, capacity: int = 8, lookahead: int = 3):
+        self.trajectory_file = trajectory_file
+        self.capacity = max(capacity, lookahead + 2)
+        self.lookahead = lookahead
+        self._cache: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._pending: List[int] = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="AtomsVisualizerPrefetch", daemon=True)
+        self._thread.start()
+
+    def get(self, frame: int) -> np.ndarray:
+        with self._condition:
+            positions = self._cache.get(frame)
+            if positions is not None:
+                self._cache.move_to_end(frame)
+
+        if positions is None:
+            positions = self.trajectory_file.read_positions(frame)
+            self._store(frame, positions)
+
+        frame_count = self.trajectory_file.index.frame_count
+        nearby = [frame + step for step in range(1, self.lookahead + 1)] + [frame - 1]
+        with self._condition:
+            self._pending = [i for i in nearby if 0 <= i < frame_count and i not in self._cache]
+            self._condition.notify()
+
+        return positions
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _store(self, frame: int, positions: np.ndarray) -> None:
+        with self._condition:
+            self._cache[frame] = positions
+            self._cache.move_to_end(frame)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                frame = self._pending.pop(0)
+                if frame in self._cache:
+                    continue
+
+            try:
+                positions = self.trajectory_file.read_positions(frame)
+            except (ValueError, IndexError):
+                continue
+            self._store(frame, positions)
+
+
+class TrajectoryPlayback:
+    def __init__(self, file_path: str):
+        self.index = TrajectoryIndex.open(file_path)
+        if self.index.frame_count == 0:
+            raise ValueError(f"No frames found in {file_path}")
+
+        self.trajectory_file = TrajectoryFile(self.index)
+        first = self.trajectory_file.read_frame(0)
+        self.structure = AtomArrays.from_arrays(
+            first.elements, first.positions, first.columns, first.lattice, first.pbc
+        )
+        self.prefetcher = FramePrefetcher(self.trajectory_file)
+
+    @property
+    def frame_count(self) -> int:
+        return self.index.frame_count
+
+    def positions(self, frame: int) -> Optional[np.ndarray]:
+        frame = min(max(frame, 0), self.frame_count - 1)
+        if int(self.index.atom_counts[frame]) != len(self.structure):
+            return None
+        return self.prefetcher.get(frame)
+
+    def close(self) -> None:
+        self.prefetcher.close()
+        self.trajectory_file.close()
@@ -2,7 +2,16 @@ import os
 
 from bpy.types import Panel
 
-from .operators import LoadFileOperator
+from .controller import get_controller
+from .operators import (
+    ExportPerformanceOperator,
+    LoadFileOperator,
+    LoadTrajectoryOperator,
+    PointRegionOperator,
+    ReloadStructureOperator,
+    SelectStructureOperator,
+)
+from .profiling import format_bytes, stage_rows
 from .state import state
 
 
@@ -23,8 +32,56 @@ class FILE_PT_loader_panel(Panel):
             box.label(text=os.path.basename(scene.last_loaded_file))
 
         layout.label(text="Load Structure:")
+        if state.load_job is not None:
+            box = layout.box()
+            box.label(text=f"Loading {os.path.basename(state.load_job.file_path)}", icon="TIME")
+            box.label(text=f"{state.load_job.stage} ({state.load_job.fraction:.0%})")
+            box.label(text="Press Esc to cancel")
+
         row = layout.row()
+        row.enabled = state.load_job is None
         row.operator(LoadFileOperator.bl_idname, text=".xyz", icon="FILE")
+        row.operator(LoadTrajectoryOperator.bl_idname, text="Trajectory", icon="SEQUENCE")
+
+        if state.structures:
+            layout.label(text="Structures:")
+            col = layout.column(align=True)
+            for structure_key, record in state.structures.items():
+                row = col.row(align=True)
+                select = row.operator(
+                    SelectStructureOperator.bl_idname,
+                    text=record.structure_name,
+                    depress=structure_key == state.structure_key,
+                )
+                select.structure_key = structure_key
+                remove = row.operator(SelectStructureOperator.bl_idname, text="", icon="X")
+                remove.structure_key = structure_key
+                remove.remove = True
+            row = layout.row(align=True)
+            row.operator(ReloadStructureOperator.bl_idname, text="Reload", icon="FILE_REFRESH")
+            row.prop(scene, "watch_file_scene", text="Watch", toggle=True)
+            if state.watch_error:
+                layout.label(text=state.watch_error, icon="ERROR")
+
+        layout.prop(scene, "atom_display_mode_scene", text="Display")
+        if state.elem_list and get_controller().scene_builder.has_point_cloud():
+            row = layout.row(align=True)
+            row.operator(PointRegionOperator.bl_idname, text="Sphere Region", icon="CUBE")
+            row.operator(PointRegionOperator.bl_idname, text="", icon="X").clear = True
+        row = layout.row(align=True)
+        row.prop(scene, "atom_lod_scene", text="Detail")
+        row.prop(scene, "viewport_proxy_scene", text="", icon="RESTRICT_VIEW_OFF")
+        if state.elem_list:
+            lod = state.level_of_detail
+            layout.label(
+                text=f"Spheres: viewport {lod.viewport_level} / render {lod.render_level}, bonds {lod.bond_segments} sides"
+            )
+
+        if state.structure.lattice is not None:
+            layout.prop(scene, "supercell_scene", text="Supercell")
+
+        if state.trajectory is not None:
+            layout.label(text=f"Trajectory: {state.trajectory.frame_count} frames")
 
         layout.label(text="Atomic Radius & Color:")
         col = layout.column(align=True)
@@ -46,3 +103,48 @@ class FILE_PT_loader_panel(Panel):
         layout.prop(scene, "atom_metallic_scene", text="Metallic")
         layout.prop(scene, "atom_translucency_scene", text="Translucency")
         layout.prop(scene, "atom_glossiness_scene", text="Glossiness")
+
+        layout.label(text="Structure Cache:")
+        layout.prop(scene, "structure_cache_enabled_scene", text="Enabled")
+        col = layout.column()
+        col.enabled = scene.structure_cache_enabled_scene
+        col.prop(scene, "structure_cache_dir_scene", text="")
+        col.prop(scene, "structure_cache_size_scene", text="Size (MB)")
+        layout.prop(scene, "structure_memory_size_scene", text="Memory (MB)")
+
+        self.draw_performance(layout, scene)
+
+    def draw_performance(self, layout, scene):
+        box = layout.box()
+        expanded = scene.show_performance_scene
+        box.prop(
+            scene,
+            "show_performance_scene",
+            text="Performance",
+            icon="TRIA_DOWN" if expanded else "TRIA_RIGHT",
+            emboss=False,
+        )
+        if not expanded:
+            return
+
+        box.prop(scene, "record_performance_scene", text="Record")
+        box.prop(scene, "track_memory_scene", text="Track Memory")
+        box.prop(scene, "capture_profile_scene", text="Capture cProfile")
+
+        report = get_controller().profiler.last_report
+        if report is None:
+            box.label(text="No reports yet")
+            return
+
+        title = f"{report.operation} ({report.label})" if report.label else report.operation
+        box.label(text=title)
+        box.label(text=f"Total: {report.total_seconds * 1000:.1f} ms")
+        col = box.column(align=True)
+        for row in stage_rows(report):
+            col.label(text=row)
+        if report.track_memory:
+            box.label(text=f"Peak Python memory: {format_bytes(report.peak_memory_bytes)}")
+        if report.count_datablocks:
+            created = ", ".join(f"{count} {name}" for name, count in report.created.items() if count)
+            box.label(text=f"Created: {created or 'nothing'}")
+        box.operator(ExportPerformanceOperator.bl_idname, text="Export JSON", icon="EXPORT")